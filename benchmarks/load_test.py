@@ -0,0 +1,341 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+
+# Importing scripts
+from benchmarks.synthetic_courses import SUBCATEGORIES, write_courses_csv
+from dashboard.service.udemy_stats.courses_stats import file_version
+from dashboard.service.udemy_stats.snapshot import MANIFEST_FILE, SNAPSHOT_FORMAT_VERSION
+
+"""HTTP load test of the dashboard
+Starts the service with uvicorn (or in-process) on a synthetic fixture dataset,
+replays a weighted mix of requests at a fixed concurrency and reports the
+throughput, the latency percentiles, the response sizes and the memory (RSS
+and PSS) of the server processes:
+
+    python -m benchmarks.load_test --rows 100000 --workers 2 --concurrency 32 --duration 30
+    python -m benchmarks.load_test --server gunicorn --workers 4
+    python -m benchmarks.load_test --no-cache --output results/no_cache.json
+
+A request path may contain {subcategory}, replaced by a random subcategory on
+every request. Saved results carry their configuration so runs can be compared.
+"""
+
+REPO_FOLDER = os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_FOLDER = os.path.join(REPO_FOLDER, "data/benchmarks")
+
+# Path -> weight, roughly what a visit to the dashboard requests
+DEFAULT_MIX = {
+    "/": 2,
+    "/dashboard?subcategory={subcategory}": 4,
+    "/dashboard/section/overview?subcategory={subcategory}": 4,
+    "/dashboard/section/price?subcategory={subcategory}": 2,
+    "/api/figures/overview/0?subcategory={subcategory}": 4,
+    "/api/figures/ratings/0?subcategory={subcategory}": 2,
+    "/assets/css/tailwind.css": 1,
+    "/assets/js/figures.js": 1,
+}
+
+
+def parse_mix(items):
+    # "PATH=WEIGHT" items, the weight defaults to 1
+    mix = {}
+    for item in items:
+        path, separator, weight = item.rpartition("=")
+        if not separator or not weight.replace(".", "", 1).isdigit():
+            path, weight = item, 1
+        mix[path] = float(weight)
+    return mix
+
+
+def process_memory_bytes(pid):
+    """Memory of a process and of all its children (the server workers).
+
+    Returns the number of processes, their total RSS and their total PSS. RSS
+    counts the pages shared between processes (e.g. the memory-mapped snapshot)
+    once per process, PSS splits them between the processes sharing them, so
+    the PSS total is what the server really uses.
+    """
+    processes, rss, pss = 0, 0, 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/smaps_rollup") as smaps_file:
+                for line in smaps_file:
+                    if line.startswith("Rss:"):
+                        rss += int(line.split()[1]) * 1024
+                    elif line.startswith("Pss:"):
+                        pss += int(line.split()[1]) * 1024
+            processes += 1
+            with open(f"/proc/{current}/task/{current}/children") as children_file:
+                pending.extend(int(child) for child in children_file.read().split())
+        except (FileNotFoundError, ProcessLookupError):
+            continue
+    return processes, rss, pss
+
+
+def server_command(server, port, workers):
+    if server == "gunicorn":
+        # Preloaded app, the workers share the data loaded by the master
+        return [sys.executable, "-m", "gunicorn", "-c", os.path.join(REPO_FOLDER, "gunicorn.conf.py"),
+                "--bind", f"127.0.0.1:{port}", "--workers", str(workers),
+                "--log-level", "warning", "dashboard.service.main:app"]
+    return [sys.executable, "-m", "uvicorn", "dashboard.service.main:app",
+            "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers),
+            "--log-level", "warning"]
+
+
+def start_server(server_name, port, workers, environment):
+    server = subprocess.Popen(
+        server_command(server_name, port, workers),
+        cwd=REPO_FOLDER, env=environment,
+        stdout=subprocess.DEVNULL,
+    )
+
+    # Ready once a static asset is served
+    deadline = time.time() + 300
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("The server exited before being ready")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/assets/js/figures.js").status_code == 200:
+                return server
+        except httpx.TransportError:
+            pass
+        time.sleep(0.5)
+
+    server.terminate()
+    raise RuntimeError("The server was not ready after 300s")
+
+
+def snapshot_is_current(snapshot_path, csv_file_path):
+    # Same check as the service, without memory-mapping the columns
+    manifest_path = os.path.join(snapshot_path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return False
+    with open(manifest_path) as manifest_file:
+        manifest = json.load(manifest_file)
+    return (
+        manifest.get("format_version") == SNAPSHOT_FORMAT_VERSION
+        and manifest.get("dataset_version") == file_version(csv_file_path)
+    )
+
+
+def fixture_environment(rows, cache):
+    # The service memory-maps the fixture's snapshot, as it does in production
+    os.makedirs(DATA_FOLDER, exist_ok=True)
+    csv_file_path = os.path.join(DATA_FOLDER, f"courses_{rows}_seed42.csv")
+    if not os.path.exists(csv_file_path):
+        print(f"Generating {rows} synthetic courses")
+        write_courses_csv(csv_file_path, rows)
+
+    environment = dict(os.environ)
+    environment.update({
+        "COURSES_CSV_PATH": csv_file_path,
+        "COURSES_SNAPSHOT_PATH": os.path.join(DATA_FOLDER, f"courses_{rows}_snapshot"),
+        "PYTHONPATH": REPO_FOLDER,
+        "DASHBOARD_WARM_DELAY": "3600",  # The load decides what is warm
+    })
+
+    if not snapshot_is_current(environment["COURSES_SNAPSHOT_PATH"], csv_file_path):
+        print(f"Building the snapshot of {rows} synthetic courses")
+        subprocess.run([sys.executable, "-m", "dashboard.service.datasets"],
+                       cwd=REPO_FOLDER, env=environment, check=True, stdout=subprocess.DEVNULL)
+    if not cache:
+        environment.update({"DASHBOARD_CACHE_SIZE": "0", "PAGE_CACHE_SIZE": "0", "BROWSER_CACHE_SIZE": "0"})
+    return environment
+
+
+def settled_memory(sample_memory, timeout=60):
+    # Workers load the data at their own pace, wait until their memory stops growing
+    previous = sample_memory()
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        time.sleep(1)
+        current = sample_memory()
+        if current[0] == previous[0] and current[1] <= previous[1] * 1.01:
+            return current
+        previous = current
+    return previous
+
+
+async def replay(client, mix, concurrency, duration, seed, sample_memory):
+    paths = list(mix)
+    weights = list(mix.values())
+    samples = []  # (path template, status, seconds, bytes)
+    memory_samples = []  # (processes, rss, pss)
+    deadline = time.perf_counter() + duration
+
+    async def user(index):
+        rng = random.Random(seed + index)
+        while time.perf_counter() < deadline:
+            path = rng.choices(paths, weights)[0]
+            url = path.format(subcategory=rng.choice(SUBCATEGORIES))
+            start = time.perf_counter()
+            try:
+                response = await client.get(url)
+                seconds = time.perf_counter() - start
+                # Bytes on the wire, before decompression
+                samples.append((path, response.status_code, seconds, response.num_bytes_downloaded))
+            except httpx.HTTPError:
+                samples.append((path, None, time.perf_counter() - start, 0))
+
+    async def memory_sampler():
+        while time.perf_counter() < deadline:
+            memory_samples.append(sample_memory())
+            await asyncio.sleep(0.5)
+
+    start = time.perf_counter()
+    await asyncio.gather(memory_sampler(), *(user(index) for index in range(concurrency)))
+    return samples, memory_samples, time.perf_counter() - start
+
+
+def summarize(samples, elapsed):
+    def stats(group):
+        seconds = np.array([sample[2] for sample in group])
+        sizes = np.array([sample[3] for sample in group])
+        errors = sum(1 for sample in group if sample[1] is None or sample[1] >= 400)
+        return {
+            "requests": len(group),
+            "errors": errors,
+            "throughput_rps": len(group) / elapsed,
+            "latency_p50_ms": float(np.percentile(seconds, 50) * 1000),
+            "latency_p95_ms": float(np.percentile(seconds, 95) * 1000),
+            "latency_p99_ms": float(np.percentile(seconds, 99) * 1000),
+            "latency_max_ms": float(seconds.max() * 1000),
+            "response_bytes_mean": float(sizes.mean()),
+            "response_bytes_total": int(sizes.sum()),
+        }
+
+    by_path = {}
+    for sample in samples:
+        by_path.setdefault(sample[0], []).append(sample)
+
+    return {
+        "overall": stats(samples) if samples else {},
+        "paths": {path: stats(group) for path, group in by_path.items()},
+    }
+
+
+def print_summary(summary):
+    columns = f"{'requests':>9} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'bytes':>10} {'errors':>7}"
+    print(f"{'':<55} {columns}")
+    for name, stats in [("overall", summary["overall"]), *summary["paths"].items()]:
+        print(
+            f"{name[:55]:<55} {stats['requests']:>9} {stats['throughput_rps']:>8.1f}"
+            f" {stats['latency_p50_ms']:>9.1f} {stats['latency_p95_ms']:>9.1f} {stats['latency_p99_ms']:>9.1f}"
+            f" {stats['response_bytes_mean']:>10.0f} {stats['errors']:>7}"
+        )
+
+
+async def run(args, mix):
+    headers = {"Accept-Encoding": args.accept_encoding}
+    limits = httpx.Limits(max_connections=args.concurrency)
+    server = None
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, headers=headers, limits=limits, timeout=120)
+        sample_memory = lambda: (0, 0, 0)  # A remote server's memory is not visible
+    elif args.in_process:
+        os.environ.update(fixture_environment(args.rows, not args.no_cache))
+        import dashboard.service.main as main
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=main.app), base_url="http://dashboard",
+            headers=headers, timeout=120
+        )
+        sample_memory = lambda: process_memory_bytes(os.getpid())
+    else:
+        server = start_server(args.server, args.port, args.workers, fixture_environment(args.rows, not args.no_cache))
+        client = httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{args.port}", headers=headers, limits=limits, timeout=120
+        )
+        sample_memory = lambda: process_memory_bytes(server.pid)
+
+    try:
+        async with client:
+            # Memory of the idle server: the loaded dataset, before any request
+            startup_memory = settled_memory(sample_memory)
+            if args.warmup > 0:
+                await replay(client, mix, args.concurrency, args.warmup, args.seed, sample_memory)
+            samples, memory_samples, elapsed = await replay(
+                client, mix, args.concurrency, args.duration, args.seed, sample_memory
+            )
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    return {
+        "config": {
+            "target": args.url or ("in-process" if args.in_process else args.server),
+            "rows": args.rows,
+            "workers": args.workers,
+            "cache": not args.no_cache,
+            "concurrency": args.concurrency,
+            "duration_seconds": args.duration,
+            "warmup_seconds": args.warmup,
+            "accept_encoding": args.accept_encoding,
+            "mix": mix,
+        },
+        "elapsed_seconds": elapsed,
+        "processes": startup_memory[0],
+        "startup_rss_bytes": startup_memory[1],
+        "startup_pss_bytes": startup_memory[2],
+        "rss_bytes_max": max((sample[1] for sample in memory_samples), default=0),
+        "rss_bytes_last": memory_samples[-1][1] if memory_samples else 0,
+        "pss_bytes_max": max((sample[2] for sample in memory_samples), default=0),
+        "pss_bytes_last": memory_samples[-1][2] if memory_samples else 0,
+        **summarize(samples, elapsed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the dashboard over HTTP")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="Load an already running server instead of starting one")
+    target.add_argument("--in-process", action="store_true", help="Serve the app in this process")
+    parser.add_argument("--rows", type=int, default=10_000, help="Courses in the fixture dataset")
+    parser.add_argument("--server", choices=["uvicorn", "gunicorn"], default="uvicorn",
+                        help="gunicorn preloads the app and shares its data with the workers")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--no-cache", action="store_true", help="Disable the dashboard and page caches")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20, help="Seconds of measured load")
+    parser.add_argument("--warmup", type=float, default=5, help="Seconds of load before measuring")
+    parser.add_argument("--mix", nargs="+", help="Requests as PATH=WEIGHT, defaults to a dashboard visit")
+    parser.add_argument("--accept-encoding", default="gzip, br")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix) if args.mix else DEFAULT_MIX
+    results = asyncio.run(run(args, mix))
+
+    print_summary(results)
+    print(
+        f"Server memory over {results['processes']} processes: at startup"
+        f" RSS {results['startup_rss_bytes'] / 2**20:.1f} MiB, PSS {results['startup_pss_bytes'] / 2**20:.1f} MiB;"
+        f" under load"
+        f" RSS max {results['rss_bytes_max'] / 2**20:.1f} MiB, last {results['rss_bytes_last'] / 2**20:.1f} MiB,"
+        f" PSS max {results['pss_bytes_max'] / 2**20:.1f} MiB, last {results['pss_bytes_last'] / 2**20:.1f} MiB"
+    )
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+        print(f"Saved the results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+import argparse
+import contextlib
+import inspect
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+# Importing scripts
+import dashboard.service.udemy_stats.courses_stats as courses_stats
+from dashboard.service.udemy_stats.courses_stats import Courses
+from benchmarks.synthetic_courses import write_courses_csv
+from transformation.columnar import parquet_available, write_courses_parquet
+
+"""Benchmarks of the courses statistics and charts
+Times every benchmark (best of --repeat runs) and measures its peak memory
+with tracemalloc on synthetic datasets of each size, then compares the results
+with the stored baseline. The memory footprint of the courses is reported as
+read from the csv and once typed by Courses.load. With pyarrow installed, the
+courses are also loaded from a parquet dataset, whole or only some columns
+and subcategories, and its size on disk is reported next to the csv's:
+
+    python -m benchmarks.run_benchmarks --sizes 10000 100000 1000000
+    python -m benchmarks.run_benchmarks --update-baseline
+
+Exits with an error when a benchmark is slower or uses more memory than its
+baseline by more than the tolerance.
+"""
+
+BENCHMARKS_FOLDER = os.path.dirname(__file__)
+BASELINE_PATH = os.path.join(BENCHMARKS_FOLDER, "baseline.json")
+DATA_FOLDER = os.path.normpath(os.path.join(BENCHMARKS_FOLDER, "../data/benchmarks"))
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+SEED = 42
+
+# Differences below these are noise, whatever the ratio to the baseline
+MIN_SECONDS = 0.005
+MIN_PEAK_BYTES = 1024 * 1024
+
+# Courses of the charts built before the benchmarks
+WARM_UP_ROWS = 200
+
+
+def fresh_courses(loaded):
+    # Courses sharing the loaded data without its cached indexes, so every run pays for them
+    courses = Courses()
+    courses.df = loaded.df
+    courses.version = loaded.version
+    return courses
+
+
+# Columns and subcategory of the partial loads, e.g. the ratings chart of one subcategory
+PARTIAL_LOAD_COLUMNS = ["rating", "num_reviews"]
+PARTIAL_LOAD_SUBCATEGORY = "Data Science"
+
+
+def courses_benchmarks(csv_file_path, loaded, parquet_path=None):
+    # Name -> (setup, function), only the function is measured
+    benchmarks = {
+        "Courses.load": (lambda: (), lambda: Courses(csv_file_path)),
+        "Courses.load partial": (
+            lambda: (),
+            lambda: Courses(csv_file_path, columns=PARTIAL_LOAD_COLUMNS, subcategories=[PARTIAL_LOAD_SUBCATEGORY]),
+        ),
+        "Courses.add_deciles": (
+            lambda: (fresh_courses(loaded),), lambda courses: courses.add_deciles()
+        ),
+    }
+
+    for method in ["summarize", "top10_by_revenue", "price_categories",
+                   "instructors_summary", "labels_summary"]:
+        benchmarks[f"Courses.{method}"] = (
+            lambda: (fresh_courses(loaded),),
+            lambda courses, method=method: getattr(courses, method)(),
+        )
+
+    # Sort orders are built once, then every page of the browser reuses them
+    benchmarks["Courses.sort_orders"] = (
+        lambda: (fresh_courses(loaded),), lambda courses: courses.sort_orders
+    )
+    benchmarks["Courses.browse"] = (
+        lambda: (loaded, loaded.browse("rating")[1]),
+        lambda courses, after: courses.browse("rating", after),
+    )
+
+    if parquet_path is not None:
+        benchmarks["Courses.load parquet"] = (lambda: (), lambda: Courses(parquet_path))
+        benchmarks["Courses.load parquet partial"] = (
+            lambda: (),
+            lambda: Courses(parquet_path, columns=PARTIAL_LOAD_COLUMNS, subcategories=[PARTIAL_LOAD_SUBCATEGORY]),
+        )
+
+    for function in ["instructors_summary_from", "explode_labels"]:
+        benchmarks[function] = (
+            lambda: (loaded.df,), getattr(courses_stats, function)
+        )
+
+    # Every chart, with the data it is given by the dashboard
+    for name, function in inspect.getmembers(courses_stats, inspect.isfunction):
+        if name.startswith("plot_"):
+            benchmarks[name] = (lambda: (loaded.df,), function)
+
+    return benchmarks
+
+
+def measure(setup, function, repeat):
+    seconds = []
+    for _ in range(repeat):
+        arguments = setup()
+        start = time.perf_counter()
+        function(*arguments)
+        seconds.append(time.perf_counter() - start)
+
+    # Peak memory in a separate run, tracing allocations slows the function down
+    arguments = setup()
+    tracemalloc.start()
+    try:
+        function(*arguments)
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {"seconds": min(seconds), "peak_bytes": peak_bytes}
+
+
+def warm_up(loaded):
+    # Build every chart once on a few courses, so the first benchmark does not pay
+    # for importing plotly express and its first figure
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name, function in inspect.getmembers(courses_stats, inspect.isfunction):
+            if name.startswith("plot_"):
+                function(loaded.df.head(WARM_UP_ROWS))
+
+
+def dataset_path(data_folder, num_rows):
+    # Datasets are generated once per size and seed
+    os.makedirs(data_folder, exist_ok=True)
+    csv_file_path = os.path.join(data_folder, f"courses_{num_rows}_seed{SEED}.csv")
+    if not os.path.exists(csv_file_path):
+        print(f"Generating {num_rows} synthetic courses")
+        write_courses_csv(csv_file_path, num_rows, seed=SEED)
+    return csv_file_path
+
+
+def parquet_dataset_path(csv_file_path):
+    # Parquet dataset of the same courses, written once next to the csv
+    parquet_path = os.path.splitext(csv_file_path)[0] + ".parquet"
+    if not os.path.exists(parquet_path):
+        print(f"Writing {parquet_path}")
+        write_courses_parquet(pd.read_csv(csv_file_path), parquet_path)
+    return parquet_path
+
+
+def disk_size(path):
+    # Bytes of a file, or of every file of a directory
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(directory, name)) for directory, _, names in os.walk(path) for name in names)
+
+
+def run(sizes, repeat, only=None, data_folder=DATA_FOLDER):
+    results = {}
+    footprints = {}
+    for num_rows in sizes:
+        csv_file_path = dataset_path(data_folder, num_rows)
+        with contextlib.redirect_stdout(io.StringIO()):
+            loaded = Courses(csv_file_path)
+        if not results:
+            warm_up(loaded)
+
+        # Memory of the courses as read from the csv and with the schema applied
+        as_read = courses_stats.memory_footprint(pd.read_csv(csv_file_path))
+        typed = courses_stats.memory_footprint(loaded.df)
+        footprints[str(num_rows)] = {"as_read_bytes": as_read, "typed_bytes": typed}
+        print(f"{num_rows:>9} {'memory footprint':<45} {as_read / 2**20:9.1f} MiB as read {typed / 2**20:9.1f} MiB typed")
+
+        parquet_path = None
+        if parquet_available():
+            parquet_path = parquet_dataset_path(csv_file_path)
+            csv_bytes, parquet_bytes = disk_size(csv_file_path), disk_size(parquet_path)
+            footprints[str(num_rows)].update({"csv_disk_bytes": csv_bytes, "parquet_disk_bytes": parquet_bytes})
+            print(f"{num_rows:>9} {'size on disk':<45} {csv_bytes / 2**20:9.1f} MiB csv {parquet_bytes / 2**20:9.1f} MiB parquet")
+
+        results[str(num_rows)] = {}
+        for name, (setup, function) in courses_benchmarks(csv_file_path, loaded, parquet_path).items():
+            if only and only not in name:
+                continue
+            # The functions report their progress with prints
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = measure(setup, function, repeat)
+            results[str(num_rows)][name] = result
+            print(f"{num_rows:>9} {name:<45} {result['seconds']:9.4f}s {result['peak_bytes'] / 2**20:9.1f} MiB")
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+        },
+        "results": results,
+        "footprints": footprints,
+    }
+
+
+def compare(current, baseline, time_tolerance, memory_tolerance):
+    # Regressions against the baseline, benchmarks missing from either side are skipped
+    regressions = []
+    for num_rows, benchmarks in current["results"].items():
+        for name, result in benchmarks.items():
+            reference = baseline["results"].get(num_rows, {}).get(name)
+            if reference is None:
+                continue
+
+            checks = [
+                ("seconds", time_tolerance, MIN_SECONDS),
+                ("peak_bytes", memory_tolerance, MIN_PEAK_BYTES),
+            ]
+            for measure_name, tolerance, minimum in checks:
+                value, reference_value = result[measure_name], reference[measure_name]
+                if value > reference_value * (1 + tolerance) and value - reference_value > minimum:
+                    regressions.append(
+                        f"{num_rows} rows {name}: {measure_name} {value:.4g} vs baseline {reference_value:.4g}"
+                        f" (+{(value / reference_value - 1) * 100:.0f}%)"
+                    )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the courses statistics and charts")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", help="Only run the benchmarks whose name contains this text")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--time-tolerance", type=float, default=0.25)
+    parser.add_argument("--memory-tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    current = run(args.sizes, args.repeat, only=args.only)
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(current, output_file, indent=2)
+
+    if args.update_baseline:
+        # Sizes and benchmarks not run this time keep their previous baseline
+        baseline = {"results": {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as baseline_file:
+                baseline = json.load(baseline_file)
+        baseline["environment"] = current["environment"]
+        for num_rows, benchmarks in current["results"].items():
+            baseline["results"].setdefault(num_rows, {}).update(benchmarks)
+        baseline.setdefault("footprints", {}).update(current["footprints"])
+
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+        print(f"Updated the baseline {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --update-baseline to create it")
+        return
+
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+
+    regressions = compare(current, baseline, args.time_tolerance, args.memory_tolerance)
+    if regressions:
+        print("\nRegressions against the baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print("\nNo regression against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import json
+import numpy as np
+import pandas as pd
+from ast import literal_eval
+
+"""Synthetic courses
+Seeded generator of courses with the schema of
+courses_numerical_categorical_data.csv, and of their text with the schema of
+courses_text_data.csv, to benchmark the dashboard at any size. Raw courses,
+as in courses_udemy_raw.json, exercise the transformation scripts. The same seed
+and number of rows always give the same dataset.
+"""
+
+SUBCATEGORIES = [
+    "Web Development",
+    "Data Science",
+    "Mobile Development",
+    "Programming Languages",
+    "Game Development",
+    "Database Design & Development",
+    "Software Testing",
+    "Software Engineering",
+    "Software Development Tools",
+    "No-Code Development",
+]
+
+# Locales with their share of the courses
+LOCALES = {
+    "English (US)": 0.7,
+    "Spanish (Spain)": 0.1,
+    "Portuguese (Brazil)": 0.1,
+    "Turkish (Turkey)": 0.1,
+}
+
+# Words of the course texts, each subcategory has its own topics
+TOPIC_WORDS = {
+    "Web Development": ["html", "css", "javascript", "react", "angular", "vue", "node", "django", "frontend", "backend"],
+    "Data Science": ["python", "pandas", "statistics", "machine", "learning", "regression", "numpy", "visualization", "neural", "tensorflow"],
+    "Mobile Development": ["android", "ios", "swift", "kotlin", "flutter", "dart", "app", "mobile", "xcode", "firebase"],
+    "Programming Languages": ["java", "python", "c", "rust", "go", "syntax", "compiler", "functions", "objects", "types"],
+    "Game Development": ["unity", "unreal", "game", "c", "blender", "physics", "sprites", "shaders", "levels", "multiplayer"],
+    "Database Design & Development": ["sql", "mysql", "postgresql", "mongodb", "queries", "schema", "indexes", "tables", "joins", "oracle"],
+    "Software Testing": ["testing", "selenium", "automation", "junit", "cypress", "qa", "bugs", "postman", "api", "regression"],
+    "Software Engineering": ["architecture", "design", "patterns", "microservices", "agile", "scrum", "clean", "code", "uml", "devops"],
+    "Software Development Tools": ["git", "github", "docker", "kubernetes", "jenkins", "linux", "terminal", "vscode", "ci", "cd"],
+    "No-Code Development": ["nocode", "bubble", "webflow", "zapier", "airtable", "automation", "notion", "wordpress", "apps", "builder"],
+}
+COMMON_WORDS = [
+    "learn", "course", "complete", "guide", "beginners", "advanced", "projects", "build", "real", "world",
+    "master", "skills", "step", "by", "hands", "on", "bootcamp", "practical", "professional", "developer",
+    "the", "and", "to", "with", "for", "in", "of", "a", "you", "your", "will", "how", "from", "scratch",
+]
+AUDIENCES = ["beginners", "students", "developers", "engineers", "professionals", "freelancers", "managers"]
+
+PRICES = [19.99, 29.99, 49.99, 84.99, 109.99, 199.99]
+
+FIRST_CREATED = pd.Timestamp("2010-01-01")
+LAST_CREATED = pd.Timestamp("2024-03-01")
+
+
+def generate_courses(num_rows, seed=42):
+    rng = np.random.default_rng(seed)
+
+    # Instructors and labels grow with the dataset, as in the real catalog
+    instructors = np.array([f"Instructor {i}" for i in range(max(100, num_rows // 4))])
+    labels = np.array([f"Label {i}" for i in range(max(50, min(5000, num_rows // 10)))])
+
+    created = pd.to_datetime(
+        rng.integers(FIRST_CREATED.value // 10**9, LAST_CREATED.value // 10**9, num_rows),
+        unit="s"
+    ).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    content_length_minutes = rng.gamma(2.0, 180, num_rows).astype(int) + 30
+
+    return pd.DataFrame({
+        "udemy_id": rng.permutation(np.arange(10_000, 10_000 + num_rows * 5))[:num_rows],
+        "title": [f"Course {i} about topic {i % 997}" for i in range(num_rows)],
+        # Few courses have most subscribers
+        "num_subscribers": (rng.pareto(1.2, num_rows) * 1000).astype(int),
+        "rating": np.round(rng.beta(8, 2, num_rows) * 5, 6),
+        "num_reviews": (rng.pareto(1.5, num_rows) * 50).astype(int),
+        "created": created,
+        "num_published_lectures": rng.integers(5, 300, num_rows),
+        "num_curriculum_items": rng.integers(5, 400, num_rows),
+        "content_length_hours": np.round(content_length_minutes / 60, 1),
+        "content_length_minutes": content_length_minutes,
+        "locale": rng.choice(list(LOCALES), num_rows, p=list(LOCALES.values())),
+        "category": "Development",
+        "subcategory": rng.choice(SUBCATEGORIES, num_rows),
+        "labels": _list_column(rng, labels, num_rows, max_items=4, min_items=0),
+        "instructors": _list_column(rng, instructors, num_rows, max_items=3, min_items=1),
+        "price": rng.choice(PRICES, num_rows),
+    })
+
+
+def _list_column(rng, names, num_rows, max_items, min_items):
+    # Lists written like the transformation writes them, e.g. "['Python', 'Django']"
+    counts = rng.integers(min_items, max_items, num_rows, endpoint=False)
+    picked = names[rng.integers(0, len(names), counts.sum())]
+    ends = np.cumsum(counts)
+    return [str(picked[end - count:end].tolist()) for count, end in zip(counts, ends)]
+
+
+def generate_courses_text(courses, seed=42):
+    """Text of the given courses, mostly with the topics of their subcategory."""
+    rng = np.random.default_rng(seed)
+    common_words = np.asarray(COMMON_WORDS)
+    topic_words = {subcategory: np.asarray(words) for subcategory, words in TOPIC_WORDS.items()}
+
+    rows = []
+    for udemy_id, title, subcategory in zip(courses["udemy_id"], courses["title"], courses["subcategory"]):
+        num_sentences = rng.integers(2, 8)
+        num_objectives = rng.integers(2, 5)
+        lengths = [4, 10, *[20] * num_sentences, 5, 6, 6, 6, 3, 3, *[6] * num_objectives]
+
+        # Topic words are a third of the words, the rest are common ones
+        topics = topic_words[subcategory]
+        num_words = sum(lengths)
+        words = np.where(
+            rng.random(num_words) < 1 / 3,
+            topics[rng.integers(0, len(topics), num_words)],
+            common_words[rng.integers(0, len(common_words), num_words)],
+        )
+        ends = np.cumsum(lengths)
+        sentences = iter(" ".join(words[end - length:end]) for length, end in zip(lengths, ends))
+        audiences = rng.choice(AUDIENCES, 2)
+
+        rows.append({
+            "udemy_id": udemy_id,
+            "title": f"{title} {next(sentences)}",
+            "url": f"/course/course-{udemy_id}/",
+            "headline": next(sentences),
+            "description": ". ".join(next(sentences) for _ in range(num_sentences)),
+            "image": f"https://img-c.udemycdn.com/course/480x270/{udemy_id}.jpg",
+            "requirements_data": str([next(sentences)]),
+            "what_you_will_learn_data": str([next(sentences) for _ in range(3)]),
+            "target_audiences": str([f"{audience} {next(sentences)}" for audience in audiences]),
+            "objectives": str([next(sentences) for _ in range(num_objectives)]),
+        })
+
+    columns = ["udemy_id", "title", "url", "description", "headline", "image", "requirements_data",
+               "what_you_will_learn_data", "target_audiences", "objectives"]
+    return pd.DataFrame(rows, columns=columns)
+
+
+def write_courses_text_csv(csv_file_path, courses, seed=42):
+    generate_courses_text(courses, seed=seed).to_csv(csv_file_path, index=False)
+    return csv_file_path
+
+
+def write_courses_csv(csv_file_path, num_rows, seed=42):
+    generate_courses(num_rows, seed=seed).to_csv(csv_file_path, index=False)
+    return csv_file_path
+
+
+# Keys of a course in courses_udemy_raw.json, in the order of the scrape
+RAW_KEYS = [
+    "id", "title", "url", "is_paid", "num_subscribers", "rating", "num_reviews", "created",
+    "num_published_lectures", "num_curriculum_items", "content_info", "estimated_content_length",
+    "has_certificate", "locale", "primary_category", "primary_subcategory", "labels",
+    "visible_instructors", "price_detail", "features", "discount", "discount_price",
+    "description", "headline", "image", "requirements_data", "what_you_will_learn_data",
+    "target_audiences", "objectives",
+]
+
+
+def generate_raw_courses(num_rows, seed=42):
+    """Courses as scraped, the input of the transformation scripts, one dict at a time."""
+    courses = generate_courses(num_rows, seed=seed)
+    texts = generate_courses_text(courses, seed=seed)
+
+    for course, text in zip(courses.itertuples(index=False), texts.itertuples(index=False)):
+        # Practice tests count questions instead of hours
+        if course.content_length_minutes % 50 == 0:
+            content_info = f"{course.content_length_minutes // 5} questions"
+        elif course.content_length_minutes < 60:
+            content_info = f"{course.content_length_minutes} total mins"
+        else:
+            content_info = f"{course.content_length_hours} total hours"
+
+        yield dict(zip(RAW_KEYS, [
+            int(course.udemy_id), text.title, text.url, True, int(course.num_subscribers),
+            float(course.rating), int(course.num_reviews), course.created,
+            int(course.num_published_lectures), int(course.num_curriculum_items), content_info,
+            int(course.content_length_minutes), True,
+            {"_class": "locale", "locale": course.locale[:2].lower(), "title": course.locale},
+            {"_class": "course_category", "id": 288, "title": course.category},
+            {"_class": "course_subcategory", "id": SUBCATEGORIES.index(course.subcategory),
+             "title": course.subcategory},
+            [{"_class": "course_label", "title": title} for title in literal_eval(course.labels)],
+            [{"_class": "user", "title": name, "url": f"/user/{name.lower().replace(' ', '-')}/"}
+             for name in literal_eval(course.instructors)],
+            {"amount": float(course.price), "currency": "EUR", "price_string": f"€{course.price}"},
+            {"has_lifetime_access": True, "has_assignments": False},
+            None, None,
+            "<p>" + "</p><p>".join(text.description.split(". ")) + "</p>",
+            text.headline, text.image, literal_eval(text.requirements_data),
+            literal_eval(text.what_you_will_learn_data), literal_eval(text.target_audiences),
+            literal_eval(text.objectives),
+        ]))
+
+
+def write_raw_courses_json(json_file_path, num_rows, seed=42, ndjson=False):
+    # A JSON array like the scrape, or one course per line
+    with open(json_file_path, "w", encoding="utf-8") as json_file:
+        if not ndjson:
+            json_file.write("[")
+        for i, course in enumerate(generate_raw_courses(num_rows, seed=seed)):
+            if ndjson:
+                json_file.write(json.dumps(course) + "\n")
+            else:
+                json_file.write((",\n" if i else "\n") + json.dumps(course))
+        if not ndjson:
+            json_file.write("\n]\n")
+    return json_file_path
@@ -0,0 +1,31 @@
+// Render the dashboard figures client-side from their JSON spec.
+// Each chart container holds the URL of its figure in `data-figure-url`.
+function renderFigures(element) {
+  element.querySelectorAll("[data-figure-url]").forEach((container) => {
+    const figureUrl = container.dataset.figureUrl;
+    container.removeAttribute("data-figure-url"); // Render each figure only once
+
+    fetch(figureUrl)
+      .then((response) => {
+        if (!response.ok) {
+          throw new Error(`${response.status} ${response.statusText}`);
+        }
+        return response.json();
+      })
+      .then((figure) => {
+        Plotly.newPlot(container, figure.data, figure.layout, { responsive: true });
+      })
+      .catch((error) => showFigureError(container, error));
+  });
+}
+
+// Replaces the chart with a message when its figure could not be loaded
+function showFigureError(container, error) {
+  const message = document.createElement("p");
+  message.className = "py-4 text-sm text-gray-500 dark:text-gray-400";
+  message.textContent = `This chart could not be loaded (${error.message}).`;
+  container.replaceChildren(message);
+}
+
+// Runs for the initial page and for every HTMX swap of the dashboard
+htmx.onLoad(renderFigures);
@@ -0,0 +1,91 @@
+import threading
+from collections import OrderedDict
+
+
+class DashboardCache:
+    """Bounded LRU cache for the rendered dashboard content and pages.
+
+    Keys start with the dataset version, e.g. (version, filters) with the
+    normalized filter tuple of a dashboard, so a new dataset never serves
+    stale charts. When the cache is full the least recently used entry is
+    evicted.
+    """
+
+    def __init__(self, max_entries=12):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}  # One lock per key so a value is computed only once
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        try:
+            with key_lock:
+                # Another thread may have computed the value while we were waiting
+                with self._lock:
+                    if key in self._entries:
+                        self._entries.move_to_end(key)
+                        return self._entries[key]
+
+                value = compute()
+                self.put(key, value)
+        finally:
+            # Also when compute raises, so failing keys do not keep their lock
+            with self._lock:
+                self._key_locks.pop(key, None)
+
+        return value
+
+    def items(self):
+        # A copy of the entries, from the least to the most recently used
+        with self._lock:
+            return list(self._entries.items())
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,233 @@
+import pandas as pd
+from io import StringIO
+import threading
+import time
+
+# Importing scripts
+import dashboard.service.udemy_stats.courses_stats as courses_stats
+from dashboard.service.instrumentation import span
+
+
+def subcategories_description(subcategories_filter=[]):
+    subcategories_in_use = ", ".join(subcategories_filter)
+    if len(subcategories_filter) == 0:
+        subcategories_in_use = 'all categories'
+    return subcategories_in_use
+
+
+def table_rows(data):
+    # Cells of a section table as text, converted a column at a time so integers stay integers
+    return data.astype(str).to_numpy().tolist()
+
+
+# Every section is built on its own so sections can be computed concurrently
+def overview_section(courses, subcategories_in_use):
+    return {
+        "id": "overview",
+        "title": "Courses overview",
+        "description": f"Below you have a list of top 10 courses and the scatter of all courses in the following subcategories: {subcategories_in_use}.",
+        "charts": [
+            courses_stats.plot_scatter(courses.df),
+            courses_stats.plot_box_deciles(courses.df)
+        ],
+        "tables": [
+            {
+                "title": "Top 10 courses",
+                "data": (
+                    courses
+                    .top10_by_revenue()[['title', 'num_subscribers', 'price', 'estimated_revenue']]
+                    .rename(columns={
+                        'title': 'Course',
+                        'num_subscribers': 'Subscribers',
+                        'price': 'Price',
+                        'estimated_revenue': 'Revenue (millions USD)'}
+                    )
+                )
+            }
+        ]
+    }
+
+
+def ratings_section(courses, subcategories_in_use):
+    return {
+        "id": "ratings",
+        "title": "Ratings",
+        "description": f"How does the ratings of a course in { subcategories_in_use } could afect the number of subscribers?",
+        "charts": [
+            courses_stats.plot_scatter_ratings(courses.df, trendlines=courses.trendlines)
+        ]
+    }
+
+
+def price_section(courses, subcategories_in_use):
+    return {
+        "id": "price",
+        "title": "Price",
+        "description": f"How does the pricing of a course in { subcategories_in_use } could afect the number of subscribers?",
+        "charts": [
+            courses_stats.plot_scatter_price(courses.df, trendlines=courses.trendlines)
+        ],
+        "tables": [
+            {
+                "title": "Price categories",
+                "data": courses.price_categories()
+            }
+        ]
+    }
+
+
+def time_of_publication_section(courses, subcategories_in_use):
+    return {
+        "id": "time-of-publication",
+        "title": "Time of Publication",
+        "description": f"How does the time of publication could affect the number of subscribers of a course in { subcategories_in_use }?",
+        "charts": [
+            courses_stats.plot_time_publication(courses.df),
+            courses_stats.plot_subscribers_by_year(courses.df)
+        ]
+    }
+
+
+def curriculum_section(courses, subcategories_in_use):
+    return {
+        "id": "curriculum",
+        "title": "Curriculum and Course Length",
+        "description": f"How does the number of curriculum items and content length in { subcategories_in_use } could affect the number of subscribers of a course?",
+        "charts": [
+            courses_stats.plot_scatter_curriculum_items(courses.df, trendlines=courses.trendlines),
+            courses_stats.plot_scatter_content_length(courses.df, trendlines=courses.trendlines)
+        ]
+    }
+
+
+def topics_section(courses, subcategories_in_use):
+    return {
+        "id": "topics",
+        "title": "Topics",
+        "description": f"What are the topics most popular in a courses in { subcategories_in_use }?",
+        "charts": [
+            courses_stats.plot_topn_labels_by_count(
+                courses.df, labels_summary=courses.labels_summary()
+            )
+        ]
+    }
+
+
+def instructors_section(courses, subcategories_in_use):
+    # Shared by the instructors charts
+    instructors_summary = courses.instructors_summary()
+
+    return {
+        "id": "instructors",
+        "title": "Instructors",
+        "description": f"What are the most popular instructors in { subcategories_in_use }?",
+        "charts": [
+            courses_stats.plot_topn_instructors_by_subscribers(
+                courses.df, instructors_summary=instructors_summary
+            ),
+            courses_stats.plot_topn_instructors_by_courses(
+                courses.df, instructors_summary=instructors_summary
+            )
+        ]
+    }
+
+
+# Section builders in the order the sections are shown
+SECTION_BUILDERS = {
+    "overview": overview_section,
+    "ratings": ratings_section,
+    "price": price_section,
+    "time-of-publication": time_of_publication_section,
+    "curriculum": curriculum_section,
+    "topics": topics_section,
+    "instructors": instructors_section,
+}
+
+
+class SectionTimings:
+    """Build time of every section, to tell which sections are expensive."""
+
+    def __init__(self):
+        self._timings = {}
+        self._lock = threading.Lock()
+
+    def record(self, section_id, seconds):
+        with self._lock:
+            timing = self._timings.setdefault(
+                section_id, {"builds": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+            )
+            timing["builds"] += 1
+            timing["total_seconds"] += seconds
+            timing["max_seconds"] = max(timing["max_seconds"], seconds)
+
+    def stats(self):
+        with self._lock:
+            return {
+                section_id: {
+                    **timing,
+                    "mean_seconds": timing["total_seconds"] / timing["builds"],
+                }
+                for section_id, timing in self._timings.items()
+            }
+
+
+section_timings = SectionTimings()
+
+
+def build_section(section_id, courses, subcategories_in_use):
+    start = time.perf_counter()
+    with span(f"section.{section_id}"):
+        section = SECTION_BUILDERS[section_id](courses, subcategories_in_use)
+    seconds = time.perf_counter() - start
+
+    section_timings.record(section_id, seconds)
+    print(f"# Finished building section {section_id} in {seconds:.3f}s")
+    return section
+
+
+# generate scatter plot of courses for chosen category
+def load_dashboard_sections(courses, subcategories_filter=[]):
+    subcategories_in_use = subcategories_description(subcategories_filter)
+    return [
+        build_section(section_id, courses, subcategories_in_use)
+        for section_id in SECTION_BUILDERS
+    ]
+
+
+def serialize_dashboard(dashboard_content):
+    # JSON-compatible copy of the dashboard content, tables are stored as split dataframes
+    return {
+        "summary_stats": dashboard_content["summary_stats"],
+        "sections": [
+            {
+                **section,
+                "tables": [
+                    {**table, "data": table["data"].to_json(orient="split")}
+                    for table in section.get("tables", [])
+                ]
+            }
+            for section in dashboard_content["sections"]
+        ]
+    }
+
+
+def deserialize_dashboard(data):
+    return {
+        "summary_stats": data["summary_stats"],
+        "sections": [
+            {
+                **section,
+                "tables": [
+                    {
+                        **table,
+                        "data": pd.read_json(
+                            StringIO(table["data"]), orient="split",
+                            convert_dates=False, precise_float=True
+                        )
+                    }
+                    for table in section["tables"]
+                ]
+            }
+            for section in data["sections"]
+        ]
+    }
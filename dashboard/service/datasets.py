@@ -0,0 +1,111 @@
+import os  # For file paths
+
+# Importing scripts
+from dashboard.service.udemy_stats.courses_stats import Courses
+from dashboard.service.udemy_stats.course_texts import CourseTexts
+from dashboard.service.dashboard_sections import load_dashboard_sections, serialize_dashboard
+
+"""Datasets of the dashboard
+The service loads a snapshot of the prepared courses, built beforehand with:
+
+    python -m dashboard.service.datasets
+
+It falls back to the CSV when the snapshot is missing or stale. COURSES_CSV_PATH
+and COURSES_SNAPSHOT_PATH point the service at another dataset, e.g. a fixture
+or the parquet dataset written by the transformation pipeline.
+With DASHBOARD_PREPARE_INDEXES=1 every index is built while loading, which
+gunicorn.conf.py sets so the workers inherit them from the preloading master.
+
+Search uses the indexes of courses_text_data.csv (COURSES_TEXT_CSV_PATH),
+stored in their own snapshot (COURSES_TEXT_SNAPSHOT_PATH). The Docker image
+only ships that snapshot; without the csv the snapshot is used as it is, and
+without either, search and similar courses are disabled.
+"""
+
+data_folder_path = os.path.join(
+    os.path.dirname(__file__), "../../data/"
+)
+
+file_path = os.environ.get("COURSES_CSV_PATH") or os.path.normpath(
+    data_folder_path + "courses_numerical_categorical_data.csv"
+)
+
+snapshot_path = os.environ.get("COURSES_SNAPSHOT_PATH") or os.path.normpath(
+    data_folder_path + "courses_snapshot"
+)
+
+text_file_path = os.environ.get("COURSES_TEXT_CSV_PATH") or os.path.normpath(
+    data_folder_path + "courses_text_data.csv"
+)
+
+text_snapshot_path = os.environ.get("COURSES_TEXT_SNAPSHOT_PATH") or os.path.normpath(
+    data_folder_path + "courses_text_snapshot"
+)
+
+
+def load_courses():
+    courses = Courses.from_snapshot(snapshot_path, csv_file_path=file_path)
+    if courses is None:
+        print("No up-to-date snapshot, loading the csv")
+        courses = Courses(csv_file_path=file_path)
+
+    if os.environ.get("DASHBOARD_PREPARE_INDEXES") == "1":
+        courses.prepare_indexes()
+    return courses
+
+
+def load_course_texts():
+    # Search needs the text snapshot (the image only ships that) or the textual dataset
+    has_csv = os.path.exists(text_file_path)
+    texts = CourseTexts.from_snapshot(text_snapshot_path, csv_file_path=text_file_path if has_csv else None)
+    if texts is not None:
+        return texts
+
+    if not has_csv:
+        print(f"No text dataset at {text_file_path} nor text snapshot, search and similar courses are disabled")
+        return None
+
+    # Building the similarity index also imports scikit-learn and scipy into the service
+    print(
+        f"No up-to-date text snapshot at {text_snapshot_path}, building the search and similarity indexes "
+        "at startup (python -m dashboard.service.datasets builds them offline)"
+    )
+    return CourseTexts(csv_file_path=text_file_path)
+
+
+def load_csv_courses():
+    # Reloads read the csv, the snapshot is only rebuilt with the image
+    return Courses(csv_file_path=file_path)
+
+
+def dataset_file_state():
+    # Changes whenever the csv is written again, or any file of a parquet dataset
+    if os.path.isdir(file_path):
+        stats = [os.stat(os.path.join(directory, name)) for directory, _, names in os.walk(file_path) for name in names]
+        return max((stat.st_mtime_ns for stat in stats), default=0), sum(stat.st_size for stat in stats), len(stats)
+    stat = os.stat(file_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def build_snapshot():
+    courses = Courses(csv_file_path=file_path)
+
+    # The landing page is served straight from the snapshot
+    dashboard_content = {
+        "summary_stats": courses.summarize(),
+        "sections": load_dashboard_sections(courses=courses),
+    }
+
+    manifest = courses.save_snapshot(
+        snapshot_path,
+        artifacts={"dashboard": serialize_dashboard(dashboard_content)}
+    )
+    print(f"Wrote snapshot {manifest['dataset_version']} with {manifest['num_rows']} courses to {snapshot_path}")
+
+    if os.path.exists(text_file_path):
+        manifest = CourseTexts(csv_file_path=text_file_path).save_snapshot(text_snapshot_path)
+        print(f"Wrote text snapshot {manifest['dataset_version']} with {manifest['num_rows']} courses to {text_snapshot_path}")
+
+
+if __name__ == "__main__":
+    build_snapshot()
@@ -0,0 +1,107 @@
+import gzip
+import hashlib
+import os
+
+try:
+    import brotli  # Optional, pages are only gzipped without it
+except ImportError:
+    brotli = None
+
+from fastapi.responses import Response
+
+# Pages are compressed once, so the slower but smaller settings are affordable
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 9
+
+# Bodies this small are not worth an encoding
+MIN_COMPRESSED_SIZE = 512
+
+
+def page_etag(*parts):
+    # Weak, as the same ETag is shared by every encoding of a page
+    digest = hashlib.sha256("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'W/"{digest[:20]}"'
+
+
+def directory_version(path):
+    # Hash of every file of a directory, e.g. to change the ETags when the templates change
+    digest = hashlib.sha256()
+    for root, directories, files in sorted(os.walk(path)):
+        for name in sorted(files):
+            with open(os.path.join(root, name), "rb") as file:
+                digest.update(name.encode())
+                digest.update(file.read())
+    return digest.hexdigest()[:16]
+
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    # Weak comparison: W/ prefixes are ignored
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag.removeprefix("W/") in tags
+
+
+def accepted_encodings(accept_encoding):
+    # Encodings of an Accept-Encoding header with a non-zero quality
+    accepted = set()
+    for item in (accept_encoding or "").split(","):
+        encoding, _, parameters = item.partition(";")
+        quality = 1.0
+        name, _, value = parameters.strip().partition("=")
+        if name.strip() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        if encoding.strip() and quality > 0:
+            accepted.add(encoding.strip().lower())
+    return accepted
+
+
+class PrecompressedPage:
+    """A rendered page stored with its gzip and brotli encodings.
+
+    Compression happens once when the page is created, every response then
+    picks the best encoding the client accepts. Brotli is used only when the
+    brotli package is installed.
+    """
+
+    def __init__(self, body, media_type):
+        if isinstance(body, str):
+            body = body.encode()
+
+        self.media_type = media_type
+        self.bodies = {"identity": body}
+
+        if len(body) >= MIN_COMPRESSED_SIZE:
+            self.bodies["gzip"] = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+            if brotli is not None:
+                self.bodies["br"] = brotli.compress(body, quality=BROTLI_QUALITY)
+
+    def encoding_for(self, accept_encoding):
+        accepted = accepted_encodings(accept_encoding)
+        for encoding in ["br", "gzip"]:
+            if encoding in self.bodies and (encoding in accepted or "*" in accepted):
+                return encoding
+        return "identity"
+
+    def response(self, accept_encoding, headers):
+        encoding = self.encoding_for(accept_encoding)
+        headers = dict(headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+
+        return Response(
+            content=self.bodies[encoding], media_type=self.media_type, headers=headers
+        )
+
+    def size(self):
+        return {encoding: len(body) for encoding, body in self.bodies.items()}
+
+
+def not_modified_response(headers):
+    return Response(status_code=304, headers=headers)
@@ -0,0 +1,150 @@
+import bisect
+import contextvars
+import numbers
+import threading
+import time
+from contextlib import contextmanager
+
+"""Instrumentation of the dashboard
+Timing spans of the work done for a request, sent back in its Server-Timing
+header, and Prometheus metrics (counters and histograms) served as text by
+/metrics.
+"""
+
+# Latency buckets in seconds, from a cached page to building a large chart
+LATENCY_BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+
+
+class Counter:
+    """Prometheus counter, one value per combination of labels."""
+
+    kind = "counter"
+
+    def __init__(self, name, description, label_names=()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, dict(zip(self.label_names, key)), value)
+                    for key, value in sorted(self._values.items())]
+
+
+class Histogram:
+    """Prometheus histogram with cumulative buckets, one per combination of labels."""
+
+    kind = "histogram"
+
+    def __init__(self, name, description, label_names=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self.buckets = list(buckets)
+        self._values = {}  # Labels -> (count per bucket and +Inf, sum)
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.label_names)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                labels = dict(zip(self.label_names, key))
+                cumulative = 0
+                for bound, count in zip(self.buckets + ["+Inf"], counts):
+                    cumulative += count
+                    samples.append((f"{self.name}_bucket", {**labels, "le": str(bound)}, cumulative))
+                samples.append((f"{self.name}_sum", labels, total))
+                samples.append((f"{self.name}_count", labels, cumulative))
+        return samples
+
+
+class CallbackMetric:
+    """Metric whose values are read when scraped, e.g. from a cache's own stats."""
+
+    def __init__(self, name, description, kind, collect):
+        self.name = name
+        self.description = description
+        self.kind = kind
+        self.collect = collect  # Returns a list of (labels, value)
+
+    def samples(self):
+        return [(self.name, labels, value) for labels, value in self.collect()]
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_value(value):
+    # Integers are written in full and floats with every digit, so counters never lose increments
+    if isinstance(value, numbers.Integral):
+        return str(int(value))
+    return repr(float(value))
+
+
+def render_metrics(metrics):
+    # Prometheus text exposition format
+    lines = []
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.description}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, labels, value in metric.samples():
+            label_text = ",".join(
+                f'{label}="{escape_label(label_value)}"' for label, label_value in labels.items()
+            )
+            value_text = format_value(value)
+            lines.append(f"{name}{{{label_text}}} {value_text}" if label_text else f"{name} {value_text}")
+    return "\n".join(lines) + "\n"
+
+
+span_duration = Histogram(
+    "dashboard_span_duration_seconds",
+    "Duration of the timed steps of the dashboard (filtering, charts, serialization, rendering)",
+    label_names=["span"],
+)
+
+# Spans of the current request, None outside of a request
+request_spans = contextvars.ContextVar("request_spans", default=None)
+
+
+@contextmanager
+def span(name):
+    """Time a block, for the current request's Server-Timing and the span histogram."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        span_duration.observe(seconds, span=name)
+
+        spans = request_spans.get()
+        if spans is not None:
+            spans.append((name, seconds))
+
+
+def server_timing_header(spans):
+    # Spans with the same name (e.g. serializing several charts) are summed
+    durations = {}
+    counts = {}
+    for name, seconds in spans:
+        durations[name] = durations.get(name, 0.0) + seconds
+        counts[name] = counts.get(name, 0) + 1
+
+    return ", ".join(
+        f"{name};dur={seconds * 1000:.1f}" + (f';desc="{counts[name]} calls"' if counts[name] > 1 else "")
+        for name, seconds in durations.items()
+    )
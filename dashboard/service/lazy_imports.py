@@ -0,0 +1,34 @@
+import importlib
+import threading
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Module imported on the first access to one of its attributes.
+
+    Keeps heavy libraries off the start of the service when they are only
+    needed to build charts. The import goes through importlib, so concurrent
+    first uses from several threads import the module once.
+    """
+
+    def __init__(self, name):
+        super().__init__(name)
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._module is None:
+                self._module = importlib.import_module(self.__name__)
+        return self._module
+
+    def __getattr__(self, attribute):
+        # Only called for attributes missing on the proxy itself
+        return getattr(self._module or self._load(), attribute)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name):
+    return LazyModule(name)
@@ -1,29 +1,84 @@
-from typing import Optional
-from fastapi import FastAPI, Request, Header
-from fastapi.responses import HTMLResponse
+from typing import List, Optional
+from fastapi import FastAPI, Request, Header, Query, Depends
+from fastapi import HTTPException
+from fastapi.responses import HTMLResponse, Response, PlainTextResponse
 from fastapi.templating import Jinja2Templates  # For HTML templates
 from fastapi.staticfiles import StaticFiles  # for mounting static files
 from fastapi.responses import RedirectResponse
-import copy
+import asyncio
+import contextvars
+import hmac
+import threading
+import time
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlencode
 
 import os  # For file paths
-import debugpy  # For debugging
 
 # Importing scripts
-from dashboard.service.udemy_stats.courses_stats import Courses
-import dashboard.service.udemy_stats.courses_stats as courses_stats
+from dashboard.service.datasets import dataset_file_state, load_course_texts, load_courses, load_csv_courses
+from dashboard.service.dashboard_sections import (
+    SECTION_BUILDERS, build_section, section_timings, subcategories_description, deserialize_dashboard,
+    table_rows
+)
+from dashboard.service.udemy_stats.course_browser import (
+    COLUMN_SORT_ORDERS, COLUMNS, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, SORT_ORDERS, format_courses
+)
+from dashboard.service.udemy_stats.dataset_diff import diff_courses
+from dashboard.service.udemy_stats.row_index import parse_range
+from dashboard.service.dashboard_cache import DashboardCache
+from dashboard.service.instrumentation import (
+    CallbackMetric, Counter, Histogram, render_metrics, request_spans, server_timing_header, span, span_duration
+)
+from dashboard.service.http_cache import (
+    PrecompressedPage, directory_version, etag_matches, not_modified_response, page_etag
+)
 
-# For debugging
-debugpy.listen(("0.0.0.0", 5678))
+# For debugging, opt-in with DEBUGPY=1 as debugpy slows down the start
+if os.environ.get("DEBUGPY") == "1":
+    import debugpy
+    debugpy.listen(("0.0.0.0", int(os.environ.get("DEBUGPY_PORT", 5678))))
 
 # Create the FastAPI app
 app = FastAPI()
 
+# Request metrics, scraped at /metrics
+request_duration = Histogram(
+    "dashboard_request_duration_seconds",
+    "Duration of the requests", label_names=["route", "method", "status"]
+)
+response_bytes = Counter(
+    "dashboard_response_bytes_total",
+    "Bytes sent in response bodies (as encoded)", label_names=["route"]
+)
+
+
+@app.middleware("http")
+async def instrument_requests(request: Request, call_next):
+    # Spans of the work done for this request are sent back in Server-Timing
+    spans = []
+    request_spans.set(spans)
+    start = time.perf_counter()
+
+    response = await call_next(request)
+
+    seconds = time.perf_counter() - start
+    # Route template, or the mount path for static assets
+    route = getattr(request.scope.get("route"), "path", None) or request.scope.get("root_path") or "unmatched"
+    request_duration.observe(seconds, route=route, method=request.method, status=response.status_code)
+    response_bytes.inc(int(response.headers.get("content-length", 0)), route=route)
+
+    response.headers["Server-Timing"] = server_timing_header(spans + [("total", seconds)])
+    return response
+
 # Set-up templating engine
 templates_directory = os.path.normpath(
     os.path.join(os.path.dirname(__file__), "../templates/")
 )
 templates = Jinja2Templates(directory=templates_directory)
+templates.env.filters["table_rows"] = table_rows
+templates_version = directory_version(templates_directory)
 
 # Mount static assets
 app.mount("/assets", StaticFiles(directory="./dashboard/assets"), name="assets")
@@ -32,146 +87,670 @@ app.mount("/assets", StaticFiles(directory="./dashboard/assets"), name="assets")
 To accelerate the request, we'll load the data beforehand.
 """
 
-# generate scatter plot of courses for chosen category
-def load_dashboard_sections(courses, subcategories_filter=[]):
+# First load, replaced as a whole when the dataset is reloaded (see reload_dataset)
+courses = load_courses()
 
-    subcategories_in_use = ", ".join(subcategories_filter)
-    if len(subcategories_filter) == 0: 
-        subcategories_in_use = 'all categories'
+# Search indexes of the courses' text, None without the textual dataset
+course_texts = load_course_texts()
 
-    return [
-        {
-            "title": "Courses overview",
-            "description": f"Below you have a list of top 10 courses and the scatter of all courses in the following subcategories: {subcategories_in_use}.",
-            "charts": [
-                courses_stats.plot_scatter(courses.df),
-                courses_stats.plot_box_deciles(courses.df)
-            ],
-            "tables": [
-                {
-                    "title": "Top 10 courses",
-                    "data": (
-                        courses
-                        .top10_by_revenue()[['title', 'num_subscribers', 'price', 'estimated_revenue']]
-                        .rename(columns={
-                            'title': 'Course',
-                            'num_subscribers': 'Subscribers',
-                            'price': 'Price',
-                            'estimated_revenue': 'Revenue (millions USD)'}
-                        )
-                    )
-                }
-            ]
-        },
-        {
-            "title": "Ratings",
-            "description": f"How does the ratings of a course in { subcategories_in_use } could afect the number of subscribers?",
-            "charts": [
-                courses_stats.plot_scatter_ratings(courses.df)
-            ]
-        },
-        {
-            "title": "Price",
-            "description": f"How does the pricing of a course in { subcategories_in_use } could afect the number of subscribers?",
-            "charts": [
-                courses_stats.plot_scatter_price(courses.df)
-            ],
-            "tables": [
-                {
-                    "title": "Price categories",
-                    "data": courses.price_categories()
-                }
-            ]
-        },
-        {
-            "title": "Time of Publication",
-            "description": f"How does the time of publication could affect the number of subscribers of a course in { subcategories_in_use }?",
-            "charts": [
-                courses_stats.plot_time_publication(courses.df),
-                courses_stats.plot_subscribers_by_year(courses.df)
-            ]
-        },
-        {
-            "title": "Curriculum and Course Length",
-            "description": f"How does the number of curriculum items and content length in { subcategories_in_use } could affect the number of subscribers of a course?",
-            "charts": [
-                courses_stats.plot_scatter_curriculum_items(courses.df),
-                courses_stats.plot_scatter_content_length(courses.df)
-            ]
-        },
-        {
-            "title": "Topics",
-            "description": f"What are the topics most popular in a courses in { subcategories_in_use }?",
-            "charts": [
-                courses_stats.plot_topn_labels_by_count(courses.df)
-            ]
-        },
-        {
-            "title": "Instructors",
-            "description": f"What are the most popular instructors in { subcategories_in_use }?",
-            "charts": [
-                courses_stats.plot_topn_instructors_by_subscribers(courses.df),
-                courses_stats.plot_topn_instructors_by_courses(courses.df)
-            ]
-        }
-    ]
+# Rendered dashboard content per set of filters
+ALL_SUBCATEGORIES = "All Subcategories"
+dashboard_cache = DashboardCache(
+    max_entries=int(os.environ.get("DASHBOARD_CACHE_SIZE", 12))
+)
 
-# Load courses 
-data_folder_path = os.path.join(
-    os.path.dirname(__file__), "../../data/"
+# Rendered pages, figures and sections, stored precompressed
+page_cache = DashboardCache(
+    max_entries=int(os.environ.get("PAGE_CACHE_SIZE", 256))
 )
 
-file_path = os.path.normpath(
-    data_folder_path + "courses_numerical_categorical_data.csv"
+# Pages of the course browser, apart so crawling the cursors never evicts the dashboards
+browser_cache = DashboardCache(
+    max_entries=int(os.environ.get("BROWSER_CACHE_SIZE", 32))
+)
+
+# Pages only change with the dataset, shared caches may keep them for a while
+PAGE_CACHE_CONTROL = f"public, max-age={int(os.environ.get('PAGE_MAX_AGE', 300))}"
+
+# Sections are built in worker threads, the event loop only waits for them
+section_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("DASHBOARD_WORKERS", 4)),
+    thread_name_prefix="dashboard-section"
 )
 
-# First load
-courses = Courses(csv_file_path=file_path)
-all_categories = courses.subcategories()
 
-# Get data to fill dashboard
-stats = courses.summarize()
-dashboard_sections = load_dashboard_sections(courses=courses)
+def submit(function, *args):
+    # Run in the section pool with the caller's context, so spans reach the request's Server-Timing
+    return section_executor.submit(contextvars.copy_context().run, function, *args)
+
+
+def summarize(courses_filtered):
+    with span("summarize"):
+        return courses_filtered.summarize()
+
+# Query-string filters of the dashboard, ranges are written low..high, e.g.
+# /dashboard?subcategory=Data Science&subcategory=Web Development&price=..50&rating=4..&year=2019..2021
+VALUE_FILTERS = {"subcategory": "subcategory", "locale": "locale"}
+RANGE_FILTERS = {
+    "price": "price",
+    "rating": "rating",
+    "year": "created_year",
+    "hours": "content_length_hours",
+}
+
+
+def dashboard_filters(subcategory: List[str] = Query([]),
+                      locale: List[str] = Query([]),
+                      price: str = None,
+                      rating: str = None,
+                      year: str = None,
+                      hours: str = None):
+    # Filters are normalized (sorted, no duplicates) as they key the cache
+    filters = []
+
+    subcategories = sorted(set(subcategory) - {ALL_SUBCATEGORIES})
+    if subcategories:
+        filters.append(("subcategory", tuple(subcategories)))
+    if locale:
+        filters.append(("locale", tuple(sorted(set(locale)))))
+
+    for name, text in [("price", price), ("rating", rating), ("year", year), ("hours", hours)]:
+        if text:
+            try:
+                filters.append((name, parse_range(text)))
+            except ValueError as error:
+                raise HTTPException(status_code=400, detail=str(error))
+
+    return tuple(filters)
+
+
+def filters_query_string(filters):
+    query = []
+    for name, condition in filters:
+        if name in RANGE_FILTERS:
+            low, high = ("" if end is None else range_end_text(end) for end in condition)
+            query.append((name, f"{low}..{high}"))
+        else:
+            query.extend((name, value) for value in condition)
+    return urlencode(query)
+
+
+def range_end_text(end):
+    # Shortest text parsing back to the same float, so links filter on the exact range
+    text = repr(float(end))
+    return text[:-2] if text.endswith(".0") else text
+
+
+def filter_courses(dataset, filters):
+    # Filtering returns a view on the loaded courses, nothing is copied
+    courses_filtered = dataset
+
+    # Values are passed as lists, ranges as (low, high) tuples
+    predicates = {
+        VALUE_FILTERS[name]: list(condition)
+        for name, condition in filters
+        if name in VALUE_FILTERS
+    }
+    predicates.update({
+        RANGE_FILTERS[name]: condition
+        for name, condition in filters
+        if name in RANGE_FILTERS
+    })
+    if predicates:
+        with span("filter"):
+            courses_filtered = dataset.filter_by(**predicates)
+
+    return courses_filtered, subcategories_description(list(predicates.get("subcategory", [])))
+
+
+def build_dashboard(dataset, filters):
+    courses_filtered, subcategories_in_use = filter_courses(dataset, filters)
+
+    # Sections are only built when they are first requested, see section_future
+    return {
+        "courses": courses_filtered,
+        "subcategories_in_use": subcategories_in_use,
+        "summary_stats": submit(summarize, courses_filtered),
+        "sections": {},
+    }
+
+
+def completed(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+# Guards the submission of sections, so a section is built once per dashboard
+sections_lock = threading.Lock()
+
+
+def section_future(dashboard_content, section_id):
+    with sections_lock:
+        if section_id not in dashboard_content["sections"]:
+            dashboard_content["sections"][section_id] = submit(
+                build_section,
+                section_id,
+                dashboard_content["courses"],
+                dashboard_content["subcategories_in_use"]
+            )
+        return dashboard_content["sections"][section_id]
+
+
+def get_dashboard(dataset, filters=()):
+    key = (dataset.version, filters)
+    dashboard_content = dashboard_cache.get_or_compute(key, lambda: build_dashboard(dataset, filters))
+
+    # A failed build is not kept, the next request builds it again
+    with sections_lock:
+        futures = [dashboard_content["summary_stats"], *dashboard_content["sections"].values()]
+    if any(future.done() and future.exception() for future in futures):
+        dashboard_cache.discard(key)
+
+    return dashboard_content
+
+
+# The snapshot comes with the landing page already computed
+if "dashboard" in courses.artifacts:
+    snapshot_dashboard = deserialize_dashboard(courses.artifacts["dashboard"])
+    dashboard_cache.put((courses.version, ()), {
+        "courses": courses,
+        "subcategories_in_use": subcategories_description(),
+        "summary_stats": completed(snapshot_dashboard["summary_stats"]),
+        "sections": {
+            section["id"]: completed(section) for section in snapshot_dashboard["sections"]
+        },
+    })
+
+
+def warm_dashboard_cache():
+    # Warm the landing page first, then as many subcategories as fit in the cache.
+    # Only the summary and the first section are warmed, the others are built on scroll
+    dataset = courses
+    first_section = next(iter(SECTION_BUILDERS))
+    filters = [()] + [(("subcategory", (subcategory,)),) for subcategory in dataset.subcategories()]
+    for subcategory_filters in filters[: dashboard_cache.max_entries]:
+        # One dashboard at a time, requests are never queued behind the whole warming
+        dashboard_content = get_dashboard(dataset, subcategory_filters)
+        dashboard_content["summary_stats"].exception()
+        section_future(dashboard_content, first_section).exception()
+    print("# Finished warming dashboard cache", dashboard_cache.stats())
+
+
+@app.on_event("startup")
+def start_cache_warming():
+    # Delayed so requests right after a cold start do not compete with the warming
+    warming = threading.Timer(
+        float(os.environ.get("DASHBOARD_WARM_DELAY", 10)), warm_dashboard_cache
+    )
+    warming.daemon = True
+    warming.start()
+
+
+# Reloads of the dataset, started by POST /admin/reload or by the csv watcher
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+DATASET_WATCH_INTERVAL = float(os.environ.get("DATASET_WATCH_INTERVAL", 0))
+reload_lock = threading.Lock()
+reload_status = {"state": "idle"}
+
+
+def filters_unaffected(filters, diff):
+    # Only a dashboard restricted to unchanged subcategories is the same in the new version
+    if diff.is_empty():
+        return True
+    subcategories = dict(filters).get("subcategory")
+    return subcategories is not None and not diff.affects(subcategories)
+
+
+def succeeded(future):
+    return future.done() and not future.cancelled() and future.exception() is None
+
+
+def carry_cache_entries(previous, new_courses, diff):
+    """Key the unaffected cache entries again under the new dataset version.
+
+    Dashboards keep their computed summary and sections, on a view of the new
+    courses. Pages listing the subcategories are only kept if that list did
+    not change. Returns the number of entries carried over per cache.
+    """
+    carried = {"dashboards": 0, "pages": 0}
+    same_subcategories = list(previous.subcategories()) == list(new_courses.subcategories())
+
+    for (version, filters), content in dashboard_cache.items():
+        if version != previous.version or not filters_unaffected(filters, diff):
+            continue
+        courses_filtered, subcategories_in_use = filter_courses(new_courses, filters)
+        with sections_lock:
+            sections = {
+                section_id: future for section_id, future in content["sections"].items() if succeeded(future)
+            }
+        summary_stats = content["summary_stats"]
+        if not succeeded(summary_stats):
+            summary_stats = submit(summarize, courses_filtered)
+
+        dashboard_cache.put((new_courses.version, filters), {
+            "courses": courses_filtered,
+            "subcategories_in_use": subcategories_in_use,
+            "summary_stats": summary_stats,
+            "sections": sections,
+        })
+        carried["dashboards"] += 1
+
+    for (version, key), page in page_cache.items():
+        if version != previous.version or key[0] == "home":
+            continue
+        if key[0] == "dashboard" and not same_subcategories:
+            continue
+        if filters_unaffected(key[-1], diff):
+            page_cache.put((new_courses.version, key), page)
+            carried["pages"] += 1
+
+    return carried
+
+
+def discard_stale_entries(version):
+    # Entries of other dataset versions are never requested again
+    for cache in [dashboard_cache, page_cache, browser_cache]:
+        for key, _ in cache.items():
+            if key[0] != version:
+                cache.discard(key)
+
+
+def reload_dataset():
+    """Load the csv again and swap in the new courses when it changed.
+
+    The new courses are prepared before the swap: the indexes of unchanged
+    courses are reused and the cache entries of unaffected subcategories are
+    carried over. Requests in flight finish with the courses they started
+    with, the next ones get the new courses. Returns False if a reload is
+    already running.
+    """
+    global courses
+    if not reload_lock.acquire(blocking=False):
+        return False
+
+    try:
+        start = time.perf_counter()
+        previous = courses
+        reload_status.clear()
+        reload_status.update({"state": "running", "started": time.time()})
+
+        with span("reload.load"):
+            new_courses = load_csv_courses()
+        if new_courses.version == previous.version:
+            reload_status.update({"state": "unchanged", "version": previous.version})
+            return True
+
+        with span("reload.diff"):
+            diff = diff_courses(previous.df, new_courses.df)
+        with span("reload.indexes"):
+            new_courses.reuse_indexes(previous, diff).prepare_indexes()
+        with span("reload.caches"):
+            carried = carry_cache_entries(previous, new_courses, diff)
+
+        # A single assignment, every request sees either version as a whole
+        courses = new_courses
+        discard_stale_entries(new_courses.version)
+
+        reload_status.update({
+            "state": "reloaded",
+            "version": new_courses.version,
+            "previous_version": previous.version,
+            "diff": diff.summary(),
+            "carried": carried,
+            "seconds": time.perf_counter() - start,
+        })
+        print("# Finished reloading the dataset", reload_status)
+        return True
+    except Exception as error:
+        reload_status.update({"state": "failed", "error": repr(error)})
+        traceback.print_exc()
+        return True
+    finally:
+        reload_lock.release()
+
+
+def start_reload():
+    # Reloads run in the background, the caller does not wait for them
+    if reload_lock.locked():
+        return False
+    threading.Thread(target=reload_dataset, name="dataset-reload", daemon=True).start()
+    return True
+
+
+def watch_dataset():
+    # Poll the csv, every worker process reloads its own courses
+    state = dataset_file_state()
+    while True:
+        time.sleep(DATASET_WATCH_INTERVAL)
+        try:
+            current_state = dataset_file_state()
+        except OSError:
+            continue  # The file is being replaced
+        if current_state != state:
+            state = current_state
+            reload_dataset()
+
+
+@app.on_event("startup")
+def start_dataset_watcher():
+    if DATASET_WATCH_INTERVAL > 0:
+        threading.Thread(target=watch_dataset, name="dataset-watcher", daemon=True).start()
+
+
+async def cached_page(request, key, media_type, render, cache=page_cache):
+    """Serve a page identified by key, rendering it only when not cached.
+
+    The ETag is derived from the dataset version, the templates and the key,
+    so a matching If-None-Match is answered with a 304 before any work. The
+    page is rendered from the courses loaded when the request arrived, even if
+    a reload swaps them meanwhile. Pages are kept in page_cache unless another
+    cache is given.
+    """
+    dataset = courses
+    etag = page_etag(dataset.version, templates_version, key)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": PAGE_CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified_response(headers)
+
+    page = cache.get((dataset.version, key))
+    if page is None:
+        body = await render(dataset)
+        # Compressing is CPU work too, it runs in the section pool
+        page = await asyncio.wrap_future(
+            submit(compress_page, body, media_type)
+        )
+        cache.put((dataset.version, key), page)
+
+    return page.response(request.headers.get("accept-encoding"), headers)
+
+
+def render_template(name, context):
+    with span("render"):
+        return templates.get_template(name).render(context)
+
+
+def compress_page(body, media_type):
+    with span("compress"):
+        return PrecompressedPage(body, media_type)
+
 
 # Routes
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request,
                     hx_request: Optional[str] = Header(None)):
-    context = {
-        "request": request,
-        "summary_stats": stats,
-        "sections": dashboard_sections,
-        "subcategories": all_categories
-    }
 
-    return templates.TemplateResponse("dashboard.html", context)
+    async def render(dataset):
+        dashboard_content = get_dashboard(dataset)
+        context = {
+            "request": request,
+            "summary_stats": await asyncio.wrap_future(dashboard_content["summary_stats"]),
+            "sections": list(SECTION_BUILDERS),
+            "subcategories": dataset.subcategories(),
+            "query_string": filters_query_string(()),
+            "search_enabled": course_texts is not None
+        }
+        return render_template("dashboard.html", context)
+
+    return await cached_page(request, ("home",), "text/html", render)
 
 @app.get("/dashboard", response_class=HTMLResponse)
 async def dashboard(request: Request,
-                    subcategory: str = None,
+                    filters: tuple = Depends(dashboard_filters),
                     hx_request: Optional[str] = Header(None)):
-    
-    courses_filtered = copy.deepcopy(courses)
 
-    if subcategory is None:
-        subcategories_filter = []
-    if subcategory == "All Subcategories":
-        subcategories_filter = []
-    else:
-        subcategories_filter = [subcategory]
-        courses_filtered.filter_by_subcategories(subcategories_filter)
+    async def render(dataset):
+        dashboard_content = get_dashboard(dataset, filters)
+        # Sections are placeholders, each is loaded when scrolled into view
+        context = {
+            "request": request,
+            "summary_stats": await asyncio.wrap_future(dashboard_content["summary_stats"]),
+            "sections": list(SECTION_BUILDERS),
+            "subcategories": dataset.subcategories(),
+            "query_string": filters_query_string(filters)
+        }
+        return render_template("partials/dashboard_content.html", context)
+
+    return await cached_page(request, ("dashboard", filters), "text/html", render)
+
+@app.get("/dashboard/section/{section_id}", response_class=HTMLResponse)
+async def dashboard_section(request: Request, section_id: str,
+                            filters: tuple = Depends(dashboard_filters)):
+    if section_id not in SECTION_BUILDERS:
+        raise HTTPException(status_code=404, detail="Section not found")
+
+    async def render(dataset):
+        # Built in the section pool, the event loop only waits for it
+        section = await asyncio.wrap_future(section_future(get_dashboard(dataset, filters), section_id))
+        context = {
+            "request": request,
+            "section": section,
+            "query_string": filters_query_string(filters)
+        }
+        return render_template("partials/report_section.html", context)
+
+    return await cached_page(request, ("section", section_id, filters), "text/html", render)
+
+def courses_url(sort, limit, filters, after=None):
+    query = {"sort": sort, "limit": limit}
+    if after is not None:
+        query["after"] = after
+    return "/courses?" + "&".join(filter(None, [urlencode(query), filters_query_string(filters)]))
+
+
+def browse_courses(courses_filtered, sort, after, limit):
+    with span("browse"):
+        return courses_filtered.browse(sort, after, limit)
+
 
-    # Get data to fill dashboard
-    stats = courses_filtered.summarize()
-    dashboard_sections = load_dashboard_sections(courses=courses_filtered, subcategories_filter=subcategories_filter)
+@app.get("/courses", response_class=HTMLResponse)
+async def courses_browser(request: Request,
+                          filters: tuple = Depends(dashboard_filters),
+                          sort: str = "subscribers",
+                          after: Optional[str] = None,
+                          limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)):
+    # Keyset pages of the filtered courses, e.g. /courses?sort=rating&after=4.97_123456
+    if sort not in SORT_ORDERS:
+        raise HTTPException(status_code=400, detail=f"Unknown sort order '{sort}'")
 
+    async def render(dataset):
+        # The filtered courses are shared with the dashboard of the same filters
+        courses_filtered = get_dashboard(dataset, filters)["courses"]
+        try:
+            rows, next_cursor = await asyncio.wrap_future(
+                submit(browse_courses, courses_filtered, sort, after, limit)
+            )
+        except ValueError as error:
+            raise HTTPException(status_code=400, detail=str(error))
+
+        columns = [
+            {
+                "title": title,
+                "url": courses_url(COLUMN_SORT_ORDERS[column], limit, filters) if column in COLUMN_SORT_ORDERS else None,
+                "sorted": COLUMN_SORT_ORDERS.get(column) == sort,
+            }
+            for column, title in COLUMNS.items()
+        ]
+        context = {
+            "request": request,
+            "columns": columns,
+            "rows": rows,
+            "next_url": courses_url(sort, limit, filters, next_cursor) if next_cursor else None,
+            "append": after is not None,
+        }
+        return render_template("partials/courses_list.html", context)
+
+    return await cached_page(
+        request, ("courses", sort, after, limit, filters), "text/html", render, cache=browser_cache
+    )
+
+def search_courses(dataset, query, limit):
+    with span("search"):
+        udemy_ids, scores = course_texts.search(query, limit)
+
+    # Joined to the loaded courses by udemy_id, courses missing from them are left out
+    rows = dataset.rows_of(udemy_ids)
+    found = rows >= 0
+    return format_courses(dataset.df.take(rows[found])), scores[found]
+
+
+@app.get("/search", response_class=HTMLResponse)
+async def search(request: Request,
+                 q: str = "",
+                 limit: int = Query(20, ge=1, le=100)):
+    # Courses ranked by BM25 for the query, e.g. /search?q="machine learning" python
+    if course_texts is None:
+        raise HTTPException(status_code=503, detail="Search needs the text snapshot or the textual dataset courses_text_data.csv")
+
+    dataset = courses
+    rows, scores = await asyncio.wrap_future(submit(search_courses, dataset, q, limit))
     context = {
         "request": request,
-        "summary_stats": stats,
-        "sections": dashboard_sections,
-        "subcategories": all_categories
+        "query": q,
+        "columns": [*COLUMNS.values(), "Score"],
+        "rows": [row + [f"{score:.2f}"] for row, score in zip(rows, scores)],
+    }
+    return HTMLResponse(render_template("partials/search_results.html", context))
+
+def similar_courses(dataset, udemy_id, limit):
+    """The course and its most similar courses, in its subcategory and in the catalogue.
+
+    Raises KeyError when the course is not loaded or has no text.
+    """
+    row = dataset.rows_of([udemy_id])[0]
+    if row < 0:
+        raise KeyError(udemy_id)
+    subcategories = dataset.df["subcategory"].to_numpy()
+
+    # Neighbours are joined to the loaded courses by udemy_id
+    def loaded(udemy_ids):
+        return dataset.rows_of(udemy_ids) >= 0
+
+    def same_subcategory(udemy_ids):
+        rows = dataset.rows_of(udemy_ids)
+        return (rows >= 0) & (subcategories[rows] == subcategories[row])
+
+    def formatted(udemy_ids, similarities):
+        rows = format_courses(dataset.df.take(dataset.rows_of(udemy_ids)))
+        return [cells + [f"{similarity:.2f}"] for cells, similarity in zip(rows, similarities)]
+
+    with span("similar"):
+        in_subcategory = course_texts.similar(udemy_id, limit, allowed=same_subcategory)
+        in_catalogue = course_texts.similar(udemy_id, limit, allowed=loaded)
+
+    return {
+        "course": dict(zip(COLUMNS, format_courses(dataset.df.take([row]))[0])),
+        "subcategory": subcategories[row],
+        "in_subcategory": formatted(*in_subcategory),
+        "in_catalogue": formatted(*in_catalogue),
     }
-    return templates.TemplateResponse("partials/dashboard_content.html", context)
+
+
+@app.get("/courses/{udemy_id}/similar", response_class=HTMLResponse)
+async def similar(request: Request, udemy_id: int,
+                  limit: int = Query(10, ge=1, le=50)):
+    # Competitors of a course: the courses with the closest text, with their stats
+    if course_texts is None:
+        raise HTTPException(status_code=503, detail="Similar courses need the text snapshot or the textual dataset courses_text_data.csv")
+
+    dataset = courses
+    try:
+        content = await asyncio.wrap_future(submit(similar_courses, dataset, udemy_id, limit))
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Course not found")
+
+    context = {
+        "request": request,
+        "columns": [*COLUMNS.values(), "Similarity"],
+        **content,
+    }
+    return HTMLResponse(render_template("partials/similar_courses.html", context))
+
+@app.get("/dashboard/timings")
+async def section_timings_stats():
+    return section_timings.stats()
+
+@app.get("/api/figures/{section_id}/{chart_index}")
+async def figure(request: Request, section_id: str, chart_index: int,
+                 filters: tuple = Depends(dashboard_filters)):
+    # Figures are rendered client-side from their JSON spec
+    if section_id not in SECTION_BUILDERS:
+        raise HTTPException(status_code=404, detail="Figure not found")
+
+    async def render(dataset):
+        section = await asyncio.wrap_future(section_future(get_dashboard(dataset, filters), section_id))
+        if not 0 <= chart_index < len(section["charts"]):
+            raise HTTPException(status_code=404, detail="Figure not found")
+        return section["charts"][chart_index]["figure"]
+
+    return await cached_page(
+        request, ("figure", section_id, chart_index, filters), "application/json", render
+    )
+
+@app.get("/api/stats")
+async def stats_api(group_by: str = "",
+                    filters: List[str] = Query([], alias="filter")):
+    # Roll-ups are merged from the precomputed cube, e.g.
+    # /api/stats?group_by=created_year&filter=subcategory:Data Science|Web Development
+    cube = courses.cube
+    try:
+        rollup = cube.rollup(
+            group_by=[dimension for dimension in group_by.split(",") if dimension],
+            filters=cube.parse_filters(filters)
+        )
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+
+    return Response(content=rollup.to_json(orient="records"), media_type="application/json")
+
+def cache_samples(statistic):
+    return [
+        ({"cache": name}, cache.stats()[statistic])
+        for name, cache in [("dashboards", dashboard_cache), ("pages", page_cache), ("browser", browser_cache)]
+    ]
+
+
+metrics = [
+    request_duration,
+    response_bytes,
+    span_duration,
+    CallbackMetric("dashboard_cache_hits_total", "Cache hits", "counter", lambda: cache_samples("hits")),
+    CallbackMetric("dashboard_cache_misses_total", "Cache misses", "counter", lambda: cache_samples("misses")),
+    CallbackMetric("dashboard_cache_evictions_total", "Cache evictions", "counter", lambda: cache_samples("evictions")),
+    CallbackMetric("dashboard_cache_entries", "Entries in the cache", "gauge", lambda: cache_samples("entries")),
+]
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    # Prometheus text format
+    return PlainTextResponse(render_metrics(metrics), media_type="text/plain; version=0.0.4")
+
+def check_admin_token(token):
+    # Admin routes are disabled unless ADMIN_TOKEN is set
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(token or "", ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.post("/admin/reload", status_code=202)
+async def reload_endpoint(x_admin_token: Optional[str] = Header(None)):
+    check_admin_token(x_admin_token)
+    if not start_reload():
+        raise HTTPException(status_code=409, detail="A reload is already running")
+    return {"state": "started"}
+
+@app.get("/admin/reload")
+async def reload_status_endpoint(x_admin_token: Optional[str] = Header(None)):
+    check_admin_token(x_admin_token)
+    return reload_status
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return {"dashboards": dashboard_cache.stats(), "pages": page_cache.stats(), "browser": browser_cache.stats()}
 
 @app.get("/notebook")
 async def redirect_to_new_url():
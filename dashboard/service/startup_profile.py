@@ -0,0 +1,102 @@
+import argparse
+import os
+import subprocess
+import sys
+
+"""Startup profile of the dashboard service
+Imports the service in a fresh interpreter with `-X importtime` and reports
+the import cost of each module and the total start time:
+
+    python -m dashboard.service.startup_profile --budget 3
+
+Exits with an error when the start takes longer than the budget (seconds),
+so it can guard the start time in CI or in the Docker build.
+"""
+
+DEFAULT_MODULE = "dashboard.service.main"
+DEFAULT_BUDGET_SECONDS = float(os.environ.get("STARTUP_BUDGET_SECONDS", 5))
+
+# The child prints the wall time of the import on its last stdout line
+TIMED_IMPORT = (
+    "import time; start = time.perf_counter(); import {module}; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def parse_importtime(stderr):
+    # "import time: self [us] | cumulative | imported package" lines
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # The header line
+
+        name = fields[2].rstrip()
+        imports.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self_seconds": int(fields[0]) / 1e6,
+            "cumulative_seconds": int(fields[1]) / 1e6,
+        })
+    return imports
+
+
+def profile_startup(module=DEFAULT_MODULE):
+    environment = dict(os.environ)
+    environment.setdefault("DASHBOARD_WARM_DELAY", "3600")  # No warming while profiling
+
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", TIMED_IMPORT.format(module=module)],
+        capture_output=True, text=True, env=environment
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+
+    imports = parse_importtime(completed.stderr)
+    return {
+        "module": module,
+        "startup_seconds": float(completed.stdout.strip().splitlines()[-1]),
+        "imports": imports,
+    }
+
+
+def print_report(profile, top=15):
+    imports = profile["imports"]
+    module = next((item for item in imports if item["module"] == profile["module"]), None)
+
+    print(f"Startup of {profile['module']}: {profile['startup_seconds']:.3f}s, {len(imports)} modules imported")
+    if module is not None:
+        # The self time of the service module is its own code, e.g. loading the data
+        print(f"  {module['cumulative_seconds'] - module['self_seconds']:.3f}s importing its dependencies")
+        print(f"  {module['self_seconds']:.3f}s running {profile['module']} itself")
+
+    print(f"\nTop {top} imports by cumulative time")
+    for item in sorted(imports, key=lambda item: -item["cumulative_seconds"])[:top]:
+        print(f"  {item['cumulative_seconds']:8.3f}s  {'  ' * item['depth']}{item['module']}")
+
+    print(f"\nTop {top} imports by self time")
+    for item in sorted(imports, key=lambda item: -item["self_seconds"])[:top]:
+        print(f"  {item['self_seconds']:8.3f}s  {item['module']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile the start of the dashboard service")
+    parser.add_argument("--module", default=DEFAULT_MODULE)
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_SECONDS,
+                        help="Maximum start time in seconds")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    profile = profile_startup(args.module)
+    print_report(profile, top=args.top)
+
+    if profile["startup_seconds"] > args.budget:
+        print(f"\nStartup took {profile['startup_seconds']:.3f}s, over the budget of {args.budget:.3f}s")
+        sys.exit(1)
+    print(f"\nStartup is within the budget of {args.budget:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
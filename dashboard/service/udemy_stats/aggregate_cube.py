@@ -0,0 +1,238 @@
+# Importing analysis libraries
+import numpy as np
+import pandas as pd
+
+PRICE_BUCKETS = ['$', '$$', '$$$', '$$$$', '$$$$$']
+
+# Dimensions of the cube, every cell is one combination of their values
+DIMENSIONS = ["subcategory", "created_year", "price_bucket", "decile"]
+
+# Columns aggregated in every cell (when present in the dataset)
+MEASURES = [
+    "num_subscribers",
+    "rating",
+    "num_reviews",
+    "price",
+    "num_curriculum_items",
+    "content_length_hours",
+]
+
+# The quantile sketch answers medians within 1% of the true value
+SKETCH_RELATIVE_ACCURACY = 0.01
+SKETCH_GAMMA = (1 + SKETCH_RELATIVE_ACCURACY) / (1 - SKETCH_RELATIVE_ACCURACY)
+SKETCH_ZERO_BUCKET = np.iinfo(np.int64).min  # Bucket of the values <= 0
+
+
+class AggregateCube:
+    """Precomputed, mergeable aggregates of the courses.
+
+    There is one cell per non-empty combination of subcategory, created year,
+    price bucket and decile. For every measure a cell stores the count, sum,
+    sum of squares, min and max of its courses, plus a log-bucketed quantile
+    sketch (counts of values per bucket) to estimate medians. Cells merge by
+    adding counts and sums, so any roll-up is answered without a row scan.
+    """
+
+    def __init__(self, cells, sketches, price_bins=None):
+        self.cells = cells  # Dataframe with one row per cell
+        self.sketches = sketches  # Measure -> dataframe of (cell, bucket, count)
+        self.price_bins = price_bins  # Edges of the price buckets
+
+    @classmethod
+    def from_dataframe(cls, df, price_bins=None):
+        if "created_year" in df.columns:
+            created_year = df["created_year"].to_numpy()
+        else:
+            created_year = pd.to_datetime(df["created"]).dt.year.to_numpy()
+
+        # Five buckets over the price range, unless the edges are given
+        price_bucket, price_bins = pd.cut(
+            df["price"], bins=5 if price_bins is None else price_bins, labels=PRICE_BUCKETS, retbins=True
+        )
+
+        dimensions = pd.DataFrame({
+            "subcategory": df["subcategory"].to_numpy(),
+            "created_year": created_year,
+            "price_bucket": price_bucket.to_numpy(),
+            "decile": df["decile"].to_numpy(),
+        })
+        grouped = dimensions.groupby(DIMENSIONS, observed=True, dropna=False)
+        cell = grouped.ngroup().to_numpy()
+
+        cells = grouped.size().rename("courses").reset_index()
+        sketches = {}
+
+        for measure in [measure for measure in MEASURES if measure in df.columns]:
+            values = df[measure].to_numpy(dtype=float)
+            valid = ~np.isnan(values)
+
+            stats = (
+                pd.DataFrame({"cell": cell, "value": values, "square": values**2})
+                .groupby("cell")
+                .agg(
+                    count=("value", "count"),
+                    sum=("value", "sum"),
+                    sumsq=("square", "sum"),
+                    min=("value", "min"),
+                    max=("value", "max"),
+                )
+            )
+            for stat in stats.columns:
+                cells[f"{measure}_{stat}"] = stats[stat].to_numpy()
+
+            sketches[measure] = (
+                pd.DataFrame({"cell": cell[valid], "bucket": sketch_buckets(values[valid])})
+                .groupby(["cell", "bucket"])
+                .size()
+                .rename("count")
+                .reset_index()
+            )
+
+        return cls(cells, sketches, price_bins)
+
+    def updated(self, df, subcategories):
+        """Cube of a new version of the courses where only some subcategories changed.
+
+        The cells of the other subcategories are kept and those of the given
+        ones are computed again from their courses. When the price range moved
+        every course may change bucket, so the whole cube is built again.
+        """
+        _, price_bins = pd.cut(df["price"], bins=5, retbins=True)
+        if self.price_bins is None or not np.array_equal(price_bins, self.price_bins):
+            return self.from_dataframe(df)
+
+        subcategories = list(subcategories)
+        partial = self.from_dataframe(df[df["subcategory"].isin(subcategories).to_numpy()], price_bins=self.price_bins)
+
+        # Cells are numbered again, the kept cells first then the computed ones
+        kept = ~self.cells["subcategory"].isin(subcategories).to_numpy()
+        cell_ids = np.full(len(self.cells), -1, dtype=np.int64)
+        cell_ids[kept] = np.arange(kept.sum())
+
+        cells = self.cells[kept]
+        if len(partial.cells) > 0:
+            cells = pd.concat([cells, partial.cells], ignore_index=True)
+        cells = cells.reset_index(drop=True)
+
+        sketches = {}
+        for measure, sketch in self.sketches.items():
+            kept_sketch = sketch[kept[sketch["cell"].to_numpy()]]
+            kept_sketch = kept_sketch.assign(cell=cell_ids[kept_sketch["cell"].to_numpy()])
+            new_sketch = partial.sketches[measure]
+            if len(new_sketch) > 0:
+                new_sketch = new_sketch.assign(cell=new_sketch["cell"].to_numpy() + kept.sum())
+                kept_sketch = pd.concat([kept_sketch, new_sketch], ignore_index=True)
+            sketches[measure] = kept_sketch.reset_index(drop=True)
+
+        return AggregateCube(cells, sketches, self.price_bins)
+
+    def measures(self):
+        return list(self.sketches)
+
+    def parse_filters(self, filter_strings):
+        """Parse filters written as "dimension:value|value" into a dictionary."""
+        filters = {}
+        for filter_string in filter_strings:
+            dimension, _, values = filter_string.partition(":")
+            if dimension not in DIMENSIONS:
+                raise ValueError(f"Unknown dimension '{dimension}'")
+
+            values = values.split("|")
+            if dimension == "created_year":
+                values = [int(value) for value in values]
+            filters[dimension] = values
+        return filters
+
+    def rollup(self, group_by=(), filters=None, measures=None, medians=True):
+        """Merge the cells matching the filters, one row per group.
+
+        Returns for every measure (all of them by default) its count, sum,
+        mean, std, min, max and, unless medians is False, median (estimated
+        from the sketches), and the number of courses.
+        """
+        group_by = list(group_by)
+        for dimension in group_by + list(filters or {}):
+            if dimension not in DIMENSIONS:
+                raise ValueError(f"Unknown dimension '{dimension}'")
+
+        measures = self.measures() if measures is None else list(measures)
+        for measure in measures:
+            if measure not in self.sketches:
+                raise ValueError(f"Unknown measure '{measure}'")
+
+        selected = np.ones(len(self.cells), dtype=bool)
+        for dimension, values in (filters or {}).items():
+            selected &= self.cells[dimension].isin(values).to_numpy()
+        cells = self.cells[selected]
+
+        if group_by:
+            grouped = cells.groupby(group_by, observed=True, dropna=False)
+            group = grouped.ngroup().to_numpy()
+            result = grouped.size().index.to_frame(index=False)
+        else:
+            group = np.zeros(len(cells), dtype=np.int64)
+            result = pd.DataFrame(index=range(1 if len(cells) else 0))
+
+        merged = cells.groupby(group)
+        result["courses"] = merged["courses"].sum().to_numpy()
+
+        for measure in measures:
+            count = merged[f"{measure}_count"].sum().to_numpy()
+            total = merged[f"{measure}_sum"].sum().to_numpy()
+            sumsq = merged[f"{measure}_sumsq"].sum().to_numpy()
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                mean = total / count
+                variance = (sumsq - total * mean) / (count - 1)
+
+            result[f"{measure}_count"] = count
+            result[f"{measure}_sum"] = total
+            result[f"{measure}_mean"] = mean
+            result[f"{measure}_std"] = np.sqrt(np.maximum(variance, 0))
+            result[f"{measure}_min"] = merged[f"{measure}_min"].min().to_numpy()
+            result[f"{measure}_max"] = merged[f"{measure}_max"].max().to_numpy()
+            if medians:
+                result[f"{measure}_median"] = self._quantile(
+                    measure, cells.index.to_numpy(), group, len(result), 0.5
+                )
+
+        return result
+
+    def _quantile(self, measure, cells, group, num_groups, quantile):
+        # Merge the sketches of the selected cells per group
+        sketch = self.sketches[measure]
+        group_of_cell = pd.Series(group, index=cells)
+        sketch = sketch[sketch["cell"].isin(cells)]
+
+        merged = (
+            sketch.assign(group=group_of_cell.loc[sketch["cell"]].to_numpy())
+            .groupby(["group", "bucket"])["count"]
+            .sum()
+            .reset_index()
+        )
+
+        # First bucket of each group whose cumulative count passes the rank
+        cumulative = merged.groupby("group")["count"].cumsum()
+        total = merged.groupby("group")["count"].transform("sum")
+        passed = merged[cumulative > quantile * (total - 1)]
+        buckets = passed.groupby("group")["bucket"].first()
+
+        quantiles = np.full(num_groups, np.nan)
+        quantiles[buckets.index.to_numpy()] = sketch_values(buckets.to_numpy())
+        return quantiles
+
+
+def sketch_buckets(values):
+    # Logarithmic buckets: every value of a bucket is within the relative accuracy
+    buckets = np.full(len(values), SKETCH_ZERO_BUCKET, dtype=np.int64)
+    positive = values > 0
+    buckets[positive] = np.ceil(np.log(values[positive]) / np.log(SKETCH_GAMMA))
+    return buckets
+
+
+def sketch_values(buckets):
+    # Representative value of each bucket
+    values = np.zeros(len(buckets))
+    positive = buckets != SKETCH_ZERO_BUCKET
+    values[positive] = 2 * SKETCH_GAMMA ** buckets[positive].astype(float) / (SKETCH_GAMMA + 1)
+    return values
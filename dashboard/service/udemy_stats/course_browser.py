@@ -0,0 +1,177 @@
+# Importing analysis libraries
+import numpy as np
+import pandas as pd
+
+"""Course browser
+Keyset pagination of the courses over precomputed sort orders. Every order
+lists the rows from the highest value, ties by increasing udemy_id, so each
+course has a unique position and a page starts right after the last course of
+the previous one (the cursor) without counting the rows before it. Rows are
+formatted for display a page at a time, one vectorized pass per column.
+"""
+
+# Browser orders and the value each one sorts by
+SORT_ORDERS = ["subscribers", "revenue", "rating", "created"]
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Columns shown by the browser, with their header
+COLUMNS = {
+    "title": "Course",
+    "subcategory": "Subcategory",
+    "num_subscribers": "Subscribers",
+    "rating": "Rating",
+    "price": "Price",
+    "estimated_revenue": "Revenue (millions USD)",
+    "created": "Created",
+}
+
+# Columns the browser can be sorted by
+COLUMN_SORT_ORDERS = {
+    "num_subscribers": "subscribers",
+    "estimated_revenue": "revenue",
+    "rating": "rating",
+    "created": "created",
+}
+
+
+def estimated_revenue(df):
+    # Same estimate as Courses.top10_by_revenue: 80% discount, in millions
+    return df["num_subscribers"].to_numpy() * df["price"].to_numpy() * 0.2 * 0.0000001
+
+
+def sort_values(df, sort):
+    # Values of an order as int64 or float64, missing values sort last
+    if sort == "subscribers":
+        return df["num_subscribers"].to_numpy(dtype=np.int64)
+    if sort == "revenue":
+        return np.nan_to_num(estimated_revenue(df).astype(np.float64), nan=-np.inf)
+    if sort == "rating":
+        return np.nan_to_num(df["rating"].to_numpy(dtype=np.float64), nan=-np.inf)
+    if sort == "created":
+        # Seconds since the epoch, the earliest date for missing ones
+        created = df["created"].to_numpy(dtype="datetime64[s]")
+        return np.where(np.isnat(created), np.iinfo(np.int64).min, created.astype(np.int64))
+    raise ValueError(f"Unknown sort order '{sort}', expected one of {', '.join(SORT_ORDERS)}")
+
+
+def sort_keys(values):
+    # Increasing keys of decreasing values, the mapping is its own inverse
+    return -values if values.dtype.kind == "f" else ~values
+
+
+class SortOrders:
+    """Rows of the loaded courses in every browser order.
+
+    For each order, rows lists the dataframe positions from the first course
+    to the last, keys and ids hold the (increasing) sort key and udemy_id of
+    each of those rows, and ranks gives the position of every row in the order.
+    """
+
+    def __init__(self, rows, keys, ids, ranks):
+        self.rows = rows
+        self.keys = keys
+        self.ids = ids
+        self.ranks = ranks
+
+    @classmethod
+    def from_dataframe(cls, df):
+        udemy_id = df["udemy_id"].to_numpy()
+        # Positions on 32 bits, the orders are kept for the lifetime of the courses
+        position_dtype = np.int32 if len(df) <= np.iinfo(np.int32).max else np.int64
+
+        rows, keys, ids, ranks = {}, {}, {}, {}
+        for sort in SORT_ORDERS:
+            key = sort_keys(sort_values(df, sort))
+            # lexsort sorts by the last key first: decreasing value, then increasing id
+            order = np.lexsort((udemy_id, key))
+            rows[sort] = order.astype(position_dtype)
+            keys[sort] = key[order]
+            ids[sort] = udemy_id[order]
+            ranks[sort] = np.empty(len(order), dtype=position_dtype)
+            ranks[sort][order] = np.arange(len(order), dtype=position_dtype)
+        return cls(rows, keys, ids, ranks)
+
+    def to_snapshot(self):
+        arrays = {}
+        for sort in self.rows:
+            arrays[f"rows.{sort}"] = self.rows[sort]
+            arrays[f"keys.{sort}"] = self.keys[sort]
+            arrays[f"ids.{sort}"] = self.ids[sort]
+            arrays[f"ranks.{sort}"] = self.ranks[sort]
+        return arrays, {"sort_orders": list(self.rows)}
+
+    @classmethod
+    def from_snapshot(cls, arrays, metadata):
+        sorts = metadata["sort_orders"]
+        return cls(*(
+            {sort: arrays[f"{name}.{sort}"] for sort in sorts}
+            for name in ["rows", "keys", "ids", "ranks"]
+        ))
+
+    def cursor(self, sort, rank):
+        # Text cursor of the course at this position, e.g. 12345_987654
+        value = sort_keys(self.keys[sort][rank:rank + 1])[0]
+        return f"{value!s}_{self.ids[sort][rank]}"
+
+    def parse_cursor(self, sort, cursor):
+        value, _, udemy_id = cursor.rpartition("_")
+        try:
+            value = np.array(value).astype(self.keys[sort].dtype)
+            return value, int(udemy_id)
+        except ValueError:
+            raise ValueError(f"Invalid cursor '{cursor}'") from None
+
+    def position_after(self, sort, cursor):
+        """Position in the order of the first course after the cursor.
+
+        The cursor holds the sort value and udemy_id of the last course seen,
+        so it stays valid when the courses are reloaded.
+        """
+        value, udemy_id = self.parse_cursor(sort, cursor)
+        key = sort_keys(value.reshape(1))[0]
+        first = np.searchsorted(self.keys[sort], key, side="left")
+        last = np.searchsorted(self.keys[sort], key, side="right")
+
+        # Courses with the same value are ordered by udemy_id
+        return int(first + np.searchsorted(self.ids[sort][first:last], udemy_id, side="right"))
+
+    def page(self, sort, after=None, limit=DEFAULT_PAGE_SIZE, ranks=None):
+        """Rows of the page after the cursor and the cursor of the next page.
+
+        ranks are the sorted positions of a subset of the courses in this
+        order, None for all of them. The next cursor is None on the last page.
+        """
+        start = 0 if after is None else self.position_after(sort, after)
+
+        if ranks is None:
+            page_ranks = np.arange(start, min(start + limit + 1, len(self.rows[sort])))
+        else:
+            first = np.searchsorted(ranks, start)
+            page_ranks = ranks[first:first + limit + 1]
+
+        # One row more than the page tells whether there is a next page
+        next_cursor = None
+        if len(page_ranks) > limit:
+            page_ranks = page_ranks[:limit]
+            next_cursor = self.cursor(sort, page_ranks[-1])
+
+        return self.rows[sort][page_ranks], next_cursor
+
+
+def format_courses(df):
+    """Display text of the courses, as a list of rows of strings.
+
+    Each column is formatted at once instead of cell by cell in the template.
+    """
+    columns = [
+        df["title"].astype(str).to_numpy(),
+        df["subcategory"].astype(str).to_numpy(),
+        pd.Series(df["num_subscribers"].to_numpy()).map("{:,}".format).to_numpy(),
+        np.char.mod("%.2f", df["rating"].to_numpy(dtype=np.float64)),
+        np.char.mod("$%.2f", df["price"].to_numpy(dtype=np.float64)),
+        np.char.mod("%.2f", estimated_revenue(df).astype(np.float64)),
+        np.datetime_as_string(df["created"].to_numpy(dtype="datetime64[s]"), unit="D"),
+    ]
+    return [list(row) for row in zip(*(column.tolist() for column in columns))]
@@ -0,0 +1,101 @@
+# Importing analysis libraries
+import numpy as np
+import pandas as pd
+from functools import cached_property
+
+from dashboard.service.udemy_stats.courses_stats import file_version
+from dashboard.service.udemy_stats.similarity_index import SimilarityIndex
+from dashboard.service.udemy_stats.snapshot import read_snapshot, write_snapshot
+from dashboard.service.udemy_stats.text_index import TEXT_FIELDS, TextIndex
+
+"""Text of the courses
+Search and similarity indexes over courses_text_data.csv, written by
+transformation/transform_data_textual.py. They are built when the csv is
+loaded, or memory-mapped from a snapshot built beforehand like the one of the
+courses. Documents are numbered in the order of the csv, udemy_ids maps them
+back to the courses.
+"""
+
+# Indexes stored in the snapshot of the texts
+SNAPSHOT_INDEXES = {
+    "text_index": TextIndex,
+    "similarity_index": SimilarityIndex,
+}
+
+
+class CourseTexts:
+
+    version = None
+    udemy_ids = None
+
+    def __init__(self, csv_file_path=None):
+        if csv_file_path is not None:
+            self.load(csv_file_path)
+
+    def load(self, csv_file_path):
+        print("Reading text input")
+
+        self.version = file_version(csv_file_path)
+        df = pd.read_csv(
+            csv_file_path,
+            usecols=lambda column: column == "udemy_id" or column in TEXT_FIELDS,
+        )
+        self.udemy_ids = df["udemy_id"].to_numpy(dtype=np.int64)
+
+        # The text itself is not kept, only its indexes
+        self.text_index = TextIndex.from_dataframe(df)
+        print("Building the similarity index (TF-IDF vectors and LSH tables)")
+        self.similarity_index = SimilarityIndex.from_text_index(self.text_index)
+
+        print("Finished indexing text from csv")
+        return self
+
+    @classmethod
+    def from_snapshot(cls, snapshot_path, csv_file_path=None):
+        # Memory-map prebuilt indexes, None if the snapshot is missing or older than the csv
+        dataset_version = None
+        if csv_file_path is not None:
+            dataset_version = file_version(csv_file_path)
+
+        snapshot = read_snapshot(snapshot_path, dataset_version=dataset_version)
+        if snapshot is None or not set(SNAPSHOT_INDEXES) <= set(snapshot[3]):
+            return None
+
+        texts = cls()
+        df, manifest, _, indexes = snapshot
+        texts.version = manifest["dataset_version"]
+        texts.udemy_ids = df["udemy_id"].to_numpy()
+        for name, index_class in SNAPSHOT_INDEXES.items():
+            arrays, metadata = indexes[name]
+            setattr(texts, name, index_class.from_snapshot(arrays, metadata))
+
+        print("Finished loading text indexes from snapshot")
+        return texts
+
+    def save_snapshot(self, snapshot_path):
+        indexes = {name: getattr(self, name).to_snapshot() for name in SNAPSHOT_INDEXES}
+        return write_snapshot(
+            pd.DataFrame({"udemy_id": self.udemy_ids}), snapshot_path, self.version, indexes=indexes
+        )
+
+    def search(self, query, limit=20):
+        # udemy_id of the best courses for the query, with their BM25 scores
+        docs, scores = self.text_index.search(query, limit)
+        return self.udemy_ids[docs], scores
+
+    @cached_property
+    def doc_of(self):
+        # Hash index of udemy_id -> document
+        return pd.Index(self.udemy_ids)
+
+    def similar(self, udemy_id, limit=10, allowed=None):
+        """udemy_id of the courses most similar to this one, with their cosine similarities.
+
+        allowed filters the candidates by udemy_id (returns a boolean mask).
+        Raises KeyError when the course has no text.
+        """
+        doc = self.doc_of.get_loc(udemy_id)
+        docs, scores = self.similarity_index.similar(
+            doc, limit, allowed=None if allowed is None else lambda docs: allowed(self.udemy_ids[docs])
+        )
+        return self.udemy_ids[docs], scores
@@ -1,101 +1,529 @@
 # Importing analysis libraries
 import pandas as pd
+import numpy as np
 from ast import literal_eval
+from functools import cached_property, wraps
+import hashlib
+import os
 
 
-# Importing charting libraries
-import plotly.express as px
+# Importing charting libraries, plotly express is only imported when the first chart is built
+import plotly.colors
 import plotly.io as pio
 import plotly.graph_objects as go
 
+from dashboard.service.lazy_imports import lazy_import
+from dashboard.service.instrumentation import span
+px = lazy_import("plotly.express")
+
+from dashboard.service.udemy_stats.downsampling import reduce_points
+from dashboard.service.udemy_stats.list_index import ListColumnIndex, is_list_column
+from dashboard.service.udemy_stats.aggregate_cube import AggregateCube
+from dashboard.service.udemy_stats.course_browser import DEFAULT_PAGE_SIZE, SORT_ORDERS, SortOrders, format_courses
+from dashboard.service.udemy_stats.dataset_diff import previous_rows
+from dashboard.service.udemy_stats.parquet_courses import is_parquet_dataset, read_parquet_courses
+from dashboard.service.udemy_stats.row_index import RowIndex
+from dashboard.service.udemy_stats.snapshot import read_snapshot, write_snapshot
+from dashboard.service.udemy_stats.trendlines import TrendlineFits
+
+# Filtered views share the loaded data, copy-on-write keeps them from modifying it
+pd.set_option("mode.copy_on_write", True)
+
+DECILE_LABELS = [
+    "Decile 1",
+    "Decile 2",
+    "Decile 3",
+    "Decile 4",
+    "Decile 5",
+    "Decile 6",
+    "Decile 7",
+    "Decile 8",
+    "Decile 9",
+    "Decile 10",
+]
+
+# Plot the deciles from the most to the least subscribed, whatever the row order
+DECILE_ORDER = {"decile": DECILE_LABELS[::-1]}
+DECILE_COLORS = dict(zip(DECILE_ORDER["decile"], plotly.colors.qualitative.Plotly))
+
+# Maximum number of markers each scatter chart sends to the browser.
+# Extreme and outlier courses are always drawn, the rest is aggregated.
+SCATTER_POINT_BUDGETS = {
+    "scatter": 3000,
+    "scatter_ratings": 2000,
+    "scatter_price": 2000,
+    "scatter_curriculum_items": 2000,
+    "scatter_content_length": 2000,
+}
+
+# Explicit schema of the courses, applied once when the csv is loaded.
+# Text columns with few distinct values become categoricals (integer codes),
+# integer columns are stored on 32 bits when their values fit.
+CATEGORICAL_COLUMNS = ["category", "subcategory", "locale"]
+INTEGER_COLUMNS = [
+    "udemy_id",
+    "num_subscribers",
+    "num_reviews",
+    "num_published_lectures",
+    "num_curriculum_items",
+    "content_length_minutes",
+]
+
+# Indexes stored in the snapshot, every process mapping it shares their arrays
+SNAPSHOT_INDEXES = {
+    "instructor_index": ListColumnIndex,
+    "label_index": ListColumnIndex,
+    "row_index": RowIndex,
+    "sort_orders": SortOrders,
+}
+
+# Every index of the loaded courses, e.g. to build them before forking workers
+PREPARED_INDEXES = ["subcategory_rows", "id_rows", *SNAPSHOT_INDEXES, "cube", "trendlines"]
+
+# Predicates of filter_by that the cube dimensions can express
+CUBE_PREDICATES = {"subcategory", "created_year"}
+
+# Columns always loaded, the courses are sorted and grouped by them and they
+# are the dimensions of the cube answering summarize
+REQUIRED_COLUMNS = ["udemy_id", "num_subscribers", "subcategory", "created", "price"]
+
+
+def file_version(file_path):
+    # The dataset version changes whenever the file content changes, or any file of a dataset directory
+    digest = hashlib.sha256()
+    if os.path.isdir(file_path):
+        for directory, _, names in sorted(os.walk(file_path)):
+            for name in sorted(names):
+                digest.update(os.path.relpath(os.path.join(directory, name), file_path).encode())
+                with open(os.path.join(directory, name), "rb") as data_file:
+                    digest.update(data_file.read())
+    else:
+        with open(file_path, "rb") as data_file:
+            digest.update(data_file.read())
+    return digest.hexdigest()[:16]
+
+
+def apply_schema(df):
+    """Return the courses with the dtypes of the schema.
+
+    The creation date is parsed once (UTC, without the timezone) and its year
+    stored in a created_year column, so no chart parses the dates again.
+    """
+    columns = {
+        column: df[column].astype("category")
+        for column in CATEGORICAL_COLUMNS if column in df.columns
+    }
+
+    int32 = np.iinfo(np.int32)
+    for column in INTEGER_COLUMNS:
+        if column in df.columns and pd.api.types.is_integer_dtype(df[column]):
+            if len(df) == 0 or (df[column].min() >= int32.min and df[column].max() <= int32.max):
+                columns[column] = df[column].astype(np.int32)
+
+    if "created" in df.columns:
+        created = pd.to_datetime(df["created"], format="ISO8601", utc=True).dt.tz_localize(None)
+        columns["created"] = created
+        columns["created_year"] = created.dt.year
+        if not created.isna().any():
+            columns["created_year"] = columns["created_year"].astype(np.int16)
+
+    return df.assign(**columns)
+
+
+def created_years(df):
+    # Year of creation of the courses, precomputed on loaded courses
+    if "created_year" in df.columns:
+        return df["created_year"]
+    return pd.to_datetime(df["created"], format="ISO8601").dt.year
+
+
+def memory_footprint(df):
+    # Bytes used by the dataframe, including the strings of object columns
+    return int(df.memory_usage(deep=True).sum())
+
+
+def with_text_dates(df):
+    # Hover data with the creation dates as ISO text, plotly is slow to serialize datetimes
+    if "created" in df.columns and pd.api.types.is_datetime64_any_dtype(df["created"]):
+        return df.assign(created=np.datetime_as_string(df["created"].to_numpy(), unit="s"))
+    return df
+
 
 class Courses:
 
     df = None
-
-    def __init__(self, csv_file_path):
-        self.load(csv_file_path)
-
-    def load(self, csv_file_path):
+    version = None
+    artifacts = {}  # Precomputed results stored along with a snapshot
+    cube_filters = {}  # Cube filters selecting these courses, None if not expressible
+
+    def __init__(self, csv_file_path=None, columns=None, subcategories=None):
+        if csv_file_path is not None:
+            self.load(csv_file_path, columns=columns, subcategories=subcategories)
+
+    def load(self, csv_file_path, columns=None, subcategories=None):
+        """Load the courses of the csv, or of the parquet dataset written by the pipeline.
+
+        columns limits the columns read (the REQUIRED_COLUMNS always are, so
+        the courses can be summarized and filtered) and subcategories the
+        courses, only their files are read from a parquet dataset. Instructors
+        and labels read from parquet stay arrow lists, they are indexed
+        without parsing any text.
+        """
         print("Reading JSON input")
 
-        self.df = pd.read_csv(csv_file_path)
+        self.version = file_version(csv_file_path)
+        if columns is not None:
+            columns = list(dict.fromkeys([*REQUIRED_COLUMNS, *columns]))
+        if columns is not None or subcategories is not None:
+            # A subset of the dataset is another dataset for the caches
+            selection = repr((columns, None if subcategories is None else sorted(subcategories)))
+            self.version += "-" + hashlib.sha256(selection.encode()).hexdigest()[:8]
+
+        source = "parquet" if is_parquet_dataset(csv_file_path) else "csv"
+        if source == "parquet":
+            df = read_parquet_courses(csv_file_path, columns=columns, subcategories=subcategories)
+        else:
+            df = pd.read_csv(csv_file_path, usecols=columns)
+            if subcategories is not None:
+                df = df[df["subcategory"].isin(list(subcategories))].reset_index(drop=True)
+
+        # Release the columns as read once they are typed
+        self.df = apply_schema(df)
+        del df
         self.df.sort_values(by="num_subscribers", ascending=False, inplace=True)
 
         self.add_deciles()  # Add a decile column to the dataframe
+        self.group_by_subcategory()
 
-        print("Finished loading data from csv")
+        print(f"Finished loading data from {source}")
         return self.df
 
+    @classmethod
+    def from_snapshot(cls, snapshot_path, csv_file_path=None):
+        # Memory-map prepared courses, None if the snapshot is missing or older than the csv
+        dataset_version = None
+        if csv_file_path is not None and os.path.exists(csv_file_path):
+            dataset_version = file_version(csv_file_path)
+
+        snapshot = read_snapshot(snapshot_path, dataset_version=dataset_version)
+        if snapshot is None:
+            return None
+
+        courses = cls()
+        courses.df, manifest, courses.artifacts, indexes = snapshot
+        courses.version = manifest["dataset_version"]
+
+        # Stored indexes take the place of the cached properties building them
+        for name, (arrays, metadata) in indexes.items():
+            if name in SNAPSHOT_INDEXES:
+                courses.__dict__[name] = SNAPSHOT_INDEXES[name].from_snapshot(arrays, metadata)
+
+        print("Finished loading data from snapshot")
+        return courses
+
+    def save_snapshot(self, snapshot_path, artifacts=None):
+        indexes = {name: getattr(self, name).to_snapshot() for name in SNAPSHOT_INDEXES}
+        return write_snapshot(self.df, snapshot_path, self.version, artifacts=artifacts, indexes=indexes)
+
+    def reuse_indexes(self, previous, diff):
+        """Build the indexes from those of a previous version of the courses.
+
+        Only the changed courses have their instructors and labels parsed
+        again, and only the cells of the affected subcategories are aggregated
+        again in the cube. The other indexes are rebuilt on first use.
+        """
+        rows = previous_rows(previous.df, self.df, diff)
+        if "instructor_index" in previous.__dict__:
+            self.__dict__["instructor_index"] = previous.instructor_index.reindexed(self.df["instructors"], rows)
+        if "label_index" in previous.__dict__:
+            self.__dict__["label_index"] = previous.label_index.reindexed(
+                self.df["labels"], rows, empty_name="No Label"
+            )
+        if "cube" in previous.__dict__:
+            self.__dict__["cube"] = previous.cube.updated(self.df, diff.affected_subcategories)
+        return self
+
+    def prepare_indexes(self):
+        # Build every index now instead of on first use
+        for name in PREPARED_INDEXES:
+            getattr(self, name)
+        print("Finished preparing indexes")
+        return self
+
     def add_deciles(self):
         # Calculate deciles and add a new column to the dataframe
         self.df["decile"] = pd.qcut(
             self.df["num_subscribers"],
             q=10,
-            labels=[
-                "Decile 1",
-                "Decile 2",
-                "Decile 3",
-                "Decile 4",
-                "Decile 5",
-                "Decile 6",
-                "Decile 7",
-                "Decile 8",
-                "Decile 9",
-                "Decile 10",
-            ],
+            labels=DECILE_LABELS,
         )
         return self.df
 
+    def group_by_subcategory(self):
+        # Group the rows by subcategory, keeping them sorted by subscribers, so
+        # each subcategory is a contiguous block that can be sliced without a copy
+        self.df.sort_values(by="subcategory", kind="stable", inplace=True)
+        return self.df
+
+    # Indexes of the loaded courses, each one is built on first use
+
+    @cached_property
+    def subcategory_rows(self):
+        # Subcategory -> slice of its rows in df
+        subcategory = self.df["subcategory"].to_numpy()
+        starts = np.flatnonzero(np.r_[True, subcategory[1:] != subcategory[:-1]])
+        stops = np.r_[starts[1:], len(subcategory)]
+
+        return {
+            subcategory[start]: slice(start, stop)
+            for start, stop in zip(starts, stops)
+        }
+
+    @cached_property
+    def id_rows(self):
+        # Hash index of udemy_id -> row, to join other datasets to the courses
+        return pd.Index(self.df["udemy_id"].to_numpy())
+
+    def rows_of(self, udemy_ids):
+        # Rows of the given courses in the loaded dataframe, -1 for those not loaded
+        return self.root().id_rows.get_indexer(udemy_ids)
+
+    @cached_property
+    def instructor_index(self):
+        # Instructors lists are parsed once, every stat reuses the index
+        return ListColumnIndex.from_column(self.df["instructors"])
+
+    @cached_property
+    def label_index(self):
+        return ListColumnIndex.from_column(self.df["labels"], empty_name="No Label")
+
+    @cached_property
+    def cube(self):
+        # Precomputed aggregates answering summarize and /api/stats
+        return AggregateCube.from_dataframe(self.df)
+
+    @cached_property
+    def row_index(self):
+        # Bitmap and sorted indexes used by filter_by
+        return RowIndex.from_dataframe(self.df)
+
+    @cached_property
+    def sort_orders(self):
+        # Rows in every order of the course browser
+        return SortOrders.from_dataframe(self.df)
+
+    @cached_property
+    def trendlines(self):
+        # Trendlines of the four scatter charts, fitted together once per selection
+        return TrendlineFits.from_dataframe(self.df)
+
+    def positions(self):
+        # Row positions of this dataset in the loaded dataframe
+        return np.arange(len(self.df))
+
     def summarize(self):
         # Summary stats
         # Averaage rate
         # Total number of subscribers
+        if self.cube_filters is not None:
+            return self.summarize_from_cube()
+
         summary = {
             "num_courses": len(self.df),
-            "avg_rate": round(self.df["rating"].mean(), 2), 
+            "avg_rate": round(self.df["rating"].mean(), 2) if "rating" in self.df.columns else np.nan,
             "total_subscribers": self.df["num_subscribers"].sum(),
-            "instructors": instructors_summary_from(self.df)["instructors"].count(),
+            "instructors": self.count_instructors(),
         }
         return summary
 
-    def top10_by_revenue(self):
-        courses_with_revenue = self.df.copy()
+    def summarize_from_cube(self):
+        # Same summary merged from the precomputed cells, without a row scan
+        root = self.root()
+        measures = [measure for measure in ["rating", "num_subscribers"] if measure in root.cube.measures()]
+        totals = root.cube.rollup(filters=self.cube_filters, measures=measures, medians=False)
+        if len(totals) == 0:
+            return {"num_courses": 0, "avg_rate": np.nan, "total_subscribers": 0, "instructors": 0}
+
+        summary = {
+            "num_courses": int(totals["courses"].iloc[0]),
+            "avg_rate": round(totals["rating_mean"].iloc[0], 2) if "rating" in measures else np.nan,
+            "total_subscribers": int(totals["num_subscribers_sum"].iloc[0]),
+            "instructors": self.count_instructors(),
+        }
+        return summary
 
+    def count_instructors(self):
+        # Distinct instructors of these courses, None when their column was not loaded
+        root = self.root()
+        if "instructors" not in root.df.columns:
+            return None
+        return root.instructor_index.count_names(self.positions())
+
+    def top10_by_revenue(self):
         # Calculating potential revenue for each course
         # Adding 80% discount because Udemy courses are often on sale. This is the minimum possible revenue.
         # The 0.0000001 is moving it to millions
-        courses_with_revenue["estimated_revenue"] = round(
-            courses_with_revenue["num_subscribers"]
-            * courses_with_revenue["price"]
+        estimated_revenue = round(
+            self.df["num_subscribers"]
+            * self.df["price"]
             * 0.2
             * 0.0000001,
             2,
         )
 
-        courses_top_10_revenue = courses_with_revenue.sort_values(
-            by="estimated_revenue", ascending=False
-        ).head(10)
+        # Only the top 10 rows are copied, not the whole dataframe
+        top_10_index = estimated_revenue.sort_values(ascending=False).head(10).index
+        courses_top_10_revenue = self.df.loc[top_10_index].assign(
+            estimated_revenue=estimated_revenue.loc[top_10_index]
+        )
 
         return courses_top_10_revenue
 
+    @cached_property
+    def browse_ranks(self):
+        # Sort order -> sorted positions of these courses in it, filled on first use
+        return {}
+
+    def browse(self, sort="subscribers", after=None, limit=None):
+        """Formatted page of the courses after the cursor, in a browser order.
+
+        Returns the rows and the cursor of the next page (None on the last
+        page). A filtered view sorts its positions in the order once, then
+        every page is a binary search and a slice.
+        """
+        if sort not in SORT_ORDERS:
+            raise ValueError(f"Unknown sort order '{sort}', expected one of {', '.join(SORT_ORDERS)}")
+        root = self.root()
+        sort_orders = root.sort_orders
+
+        ranks = None
+        if self is not root:
+            if sort not in self.browse_ranks:
+                self.browse_ranks[sort] = np.sort(sort_orders.ranks[sort][self.positions()])
+            ranks = self.browse_ranks[sort]
+
+        rows, next_cursor = sort_orders.page(sort, after, limit or DEFAULT_PAGE_SIZE, ranks=ranks)
+        return format_courses(root.df.take(rows)), next_cursor
+
     def filter_by_subcategories(self, subcategories):
-        self.df = self.df[self.df["subcategory"].isin(subcategories)]
-        return self.df
+        # Look up the rows of each subcategory instead of scanning the dataframe
+        root = self.root()
+        subcategory_rows = [
+            root.subcategory_rows[subcategory]
+            for subcategory in subcategories
+            if subcategory in root.subcategory_rows
+        ]
+
+        if len(subcategory_rows) == 1 and self is root:
+            courses = CoursesView(root, subcategory_rows[0])
+        else:
+            rows = np.concatenate(
+                [np.arange(rows.start, rows.stop) for rows in subcategory_rows]
+                + [np.empty(0, dtype=np.int64)]
+            )
+            courses = self.filter_by_rows(np.sort(rows))
+
+        # Subcategory filters can be answered by the cube
+        courses.cube_filters = self.narrowed_cube_filters({"subcategory": list(subcategories)})
+        return courses
+
+    def filter_by(self, **predicates):
+        """Filter on several columns at once with the row index.
+
+        Each predicate is a list of values for a categorical column, e.g.
+        locale=["English (US)"], or a (low, high) range for a numeric column,
+        e.g. price=(10, None), where None leaves that end open.
+        """
+        root = self.root()
+
+        # A single subcategory is a zero-copy slice
+        if list(predicates) == ["subcategory"] and len(predicates["subcategory"]) == 1:
+            return self.filter_by_subcategories(predicates["subcategory"])
+
+        courses = self.filter_by_rows(root.row_index.query(predicates))
+
+        # Subcategories and publication years can still be answered by the cube
+        if set(predicates) <= CUBE_PREDICATES:
+            filters = {}
+            if "subcategory" in predicates:
+                filters["subcategory"] = list(predicates["subcategory"])
+            if "created_year" in predicates:
+                low, high = predicates["created_year"]
+                years = root.cube.cells["created_year"].unique()
+                filters["created_year"] = [
+                    year for year in years
+                    if (low is None or year >= low) and (high is None or year <= high)
+                ]
+            courses.cube_filters = self.narrowed_cube_filters(filters)
+
+        return courses
+
+    def narrowed_cube_filters(self, filters):
+        # Cube filters of a view of these courses, None unless both are answered by the cube
+        if self.cube_filters is None:
+            return None
+
+        narrowed = dict(self.cube_filters)
+        for dimension, values in filters.items():
+            if dimension in narrowed:
+                values = [value for value in values if value in narrowed[dimension]]
+            narrowed[dimension] = values
+        return narrowed
+
+    def filter_by_instructors(self, instructors):
+        return self.filter_by_rows(self.root().instructor_index.rows_with(instructors))
+
+    def filter_by_labels(self, labels):
+        return self.filter_by_rows(self.root().label_index.rows_with(labels))
+
+    def filter_by_rows(self, rows):
+        # Rows are sorted positions in the loaded dataframe
+        if self is not self.root():
+            rows = np.intersect1d(rows, self.positions())
+        return CoursesView(self.root(), rows)
+
+    def root(self):
+        return self
+
+    def instructors_summary(self):
+        # Number of courses and subscribers per instructor
+        root = self.root()
+        instructors = root.instructor_index.aggregate(
+            root.df["num_subscribers"].to_numpy(), self.positions()
+        )
+        return (
+            instructors[["sum", "count"]]
+            .rename_axis("instructors")
+            .reset_index()
+            .rename(columns={"sum": "num_subscribers", "count": "num_courses"})
+        )
+
+    def labels_summary(self):
+        # Subscribers stats per label
+        root = self.root()
+        labels = root.label_index.aggregate(
+            root.df["num_subscribers"].to_numpy(), self.positions()
+        )
+        return labels.rename_axis("labels").reset_index()
 
     def price_categories(self):
+        if len(self.df) == 0:
+            return pd.DataFrame(
+                columns=['min', 'max', 'mean', 'median', 'count'],
+                index=pd.CategoricalIndex([], name='price_category')
+            )
+
         # Creating bins for each price category
-        courses_with_price_category = self.df.copy()
-        courses_with_price_category['price_category'] = pd.cut(
-            courses_with_price_category['price'],
+        price_category = pd.cut(
+            self.df['price'],
             bins=5,
             labels=['$', '$$', '$$$', '$$$$', '$$$$$']
-        )
+        ).rename('price_category')
 
         # Calculate the stats for each price category
         price_category_summary = (
-            courses_with_price_category
-            .groupby('price_category', observed=True)['price']
+            self.df['price']
+            .groupby(price_category, observed=True)
             .agg(['min', 'max', 'mean', 'median', 'count'])
         )
         return price_category_summary
@@ -104,27 +532,117 @@ class Courses:
         return self.df["subcategory"].unique()
 
 
-def plot_scatter(courses):
+class CoursesView(Courses):
+    """Read-only subset of a loaded Courses dataset.
+
+    The view keeps the positions of its rows in the parent dataframe instead of
+    copying it. A single subcategory is a contiguous block of rows, so its view
+    shares the parent's column buffers.
+    """
+
+    def __init__(self, parent, rows):
+        self.parent = parent
+        self.version = parent.version
+        self.rows = rows  # A slice or sorted positions in the parent dataframe
+        self.cube_filters = None  # Only set by the filters the cube can answer
+
+    @cached_property
+    def df(self):
+        if isinstance(self.rows, slice):
+            return self.parent.df.iloc[self.rows]
+        return self.parent.df.take(self.rows)
+
+    def positions(self):
+        if isinstance(self.rows, slice):
+            return np.arange(self.rows.start, self.rows.stop)
+        return self.rows
+
+    def root(self):
+        return self.parent
+
+
+def timed_plot(plot):
+    # Every chart builder is timed as a span named after it
+    @wraps(plot)
+    def timed(*args, **kwargs):
+        with span(plot.__name__):
+            return plot(*args, **kwargs)
+    return timed
+
+
+def figure_to_json(fig):
+    with span("figure_to_json"):
+        return pio.to_json(fig, validate=False)
+
+
+def scatter_with_point_budget(courses, x, y, max_points, trendlines=None, **scatter_args):
+    color = scatter_args.get("color")
+    if color == "decile":
+        scatter_args.setdefault("color_discrete_map", DECILE_COLORS)
+
+    # Only the extreme and outlier courses are drawn exactly, with hover data
+    kept, binned = reduce_points(courses, x, y, max_points, color=color)
+    downsampled = len(kept) < len(courses)
+    kept = with_text_dates(kept)
 
     fig = px.scatter(
+        kept,
+        x=x,
+        y=y,
+        hover_data=[column for column in kept.columns if column != "created_year"],  # Shown by the creation date
+        **scatter_args,
+    )
+
+    # The dense region is drawn with one marker per cell sized by its courses
+    if downsampled and len(binned) > 0:
+        binned_fig = px.scatter(
+            binned,
+            x=x,
+            y=y,
+            size="courses_in_bin",
+            size_max=12,
+            opacity=0.6,
+            **scatter_args,
+        )
+        binned_fig.update_traces(showlegend=False)
+        fig.add_traces(binned_fig.data)
+
+    # Trendlines are fitted on every course beforehand, only the lines are drawn
+    if trendlines is not None:
+        fig.add_traces(trendlines.traces(
+            x,
+            color_map=scatter_args.get("color_discrete_map"),
+            category_order=scatter_args.get("category_orders", {}).get(color),
+            webgl=any(trace.type == "scattergl" for trace in fig.data),  # Same renderer as the points
+        ))
+
+    return fig
+
+
+@timed_plot
+def plot_scatter(courses, max_points=SCATTER_POINT_BUDGETS["scatter"]):
+
+    fig = scatter_with_point_budget(
         courses,
         y="num_subscribers",
         x="udemy_id",
-        hover_data=courses.columns,
+        max_points=max_points,
         render_mode="webgl",
     )
 
-    fig_html = pio.to_html(fig, full_html=False)
+    fig_json = figure_to_json(fig)
     print("# Finished creating scatter plot")
-    return {"title": "Scatter Plot of Number of Subscribers", "figure": fig_html}
+    return {"title": "Scatter Plot of Number of Subscribers", "figure": fig_json}
 
 
+@timed_plot
 def plot_box_deciles(courses, decile_filter=[]):
     # Create a box plot to visualize dispersion across deciles
     fig = px.box(
         courses[~courses["decile"].isin(decile_filter)],
         x="num_subscribers",
         color="decile",
+        category_orders=DECILE_ORDER,
     )
 
     # Configure chart labels and focus view
@@ -146,19 +664,25 @@ def plot_box_deciles(courses, decile_filter=[]):
         showarrow=False,
     )
 
-    fig_html = pio.to_html(fig, full_html=False)
+    fig_json = figure_to_json(fig)
     print("# Finished creating box plot with deciles")
-    return {"title": "Dispersion of Number of Subscribers per Decile", "figure": fig_html}
+    return {"title": "Dispersion of Number of Subscribers per Decile", "figure": fig_json}
 
 
-def plot_scatter_ratings(courses):
-    fig = px.scatter(
+@timed_plot
+def plot_scatter_ratings(courses, max_points=SCATTER_POINT_BUDGETS["scatter_ratings"], trendlines=None):
+
+    if trendlines is None:
+        trendlines = TrendlineFits.from_dataframe(courses)
+
+    fig = scatter_with_point_budget(
         courses,
         y="num_subscribers",
         x="rating",
-        trendline="ols",
+        max_points=max_points,
+        trendlines=trendlines,
         color="decile",
-        hover_data=courses.columns,
+        category_orders=DECILE_ORDER,
         render_mode="webgl",
     )
 
@@ -181,20 +705,26 @@ def plot_scatter_ratings(courses):
         showarrow=False,
     )
 
-    fig_html = pio.to_html(fig, full_html=False)
+    fig_json = figure_to_json(fig)
     print("# Finished creating scatter of ratings")
-    return {"title": "Number of Subscribers vs. Rating", "figure": fig_html}
+    return {"title": "Number of Subscribers vs. Rating", "figure": fig_json}
+
 
+@timed_plot
+def plot_scatter_price(courses, max_points=SCATTER_POINT_BUDGETS["scatter_price"], trendlines=None):
+
+    if trendlines is None:
+        trendlines = TrendlineFits.from_dataframe(courses)
 
-def plot_scatter_price(courses):
     # Create scatter plot
-    fig = px.scatter(
+    fig = scatter_with_point_budget(
         courses,
         y="num_subscribers",
         x="price",
-        trendline="ols",
+        max_points=max_points,
+        trendlines=trendlines,
         color="decile",
-        hover_data=courses.columns
+        category_orders=DECILE_ORDER,
     )
 
     # Configure chart labels and focus view
@@ -212,33 +742,28 @@ def plot_scatter_price(courses):
         showarrow=False,
     )
 
-    fig_html = pio.to_html(fig, full_html=False)
+    fig_json = figure_to_json(fig)
     print("# Finished creating scatter of price")
-    return {"title": "Number of Subscribers vs. Price", "figure": fig_html}
+    return {"title": "Number of Subscribers vs. Price", "figure": fig_json}
 
 
+@timed_plot
 def plot_time_publication(courses):
-    # Prepare a new dataframe with created year and sorted by year
-    courses_with_created_year = courses.copy()
-    courses_with_created_year['created_year'] = (
-        courses_with_created_year['created']
-        .apply(lambda date: pd.Timestamp(date).year)
-    )
+    created_year = created_years(courses)
 
-    # Sort by created date to create line plot
-    df_line_trace = courses_with_created_year.sort_values(by='created', ascending=True)
-    df_line_trace.reset_index(drop=True, inplace=True) # Reset index and drop the old index
+    # Sort the creation dates to create line plot
+    created = np.sort(courses['created'].to_numpy())
 
     # Plot line with course 'index' over the time
     line_trace = go.Scatter(
-        x=df_line_trace['created'], 
-        y=df_line_trace.index,
+        x=created,
+        y=np.arange(len(created)),
         name="Cumulative courses created"
     )
 
     # Counting the values per year
     df_bar_trace = (
-        courses_with_created_year['created_year']
+        created_year
         .value_counts()
         .reset_index()
     )
@@ -252,18 +777,17 @@ def plot_time_publication(courses):
 
     fig = go.Figure(data=[line_trace, bar_trace])
 
-    fig.update_xaxes(tickvals=courses_with_created_year['created_year'], tickformat="%Y")
+    fig.update_xaxes(tickvals=np.unique(created_year), tickformat="%Y")
     
-    fig_html = pio.to_html(fig, full_html=False)
+    fig_json = figure_to_json(fig)
     print("# Finished creating scatter of time of publication")
-    return {"title": "Courses over time", "figure": fig_html}
+    return {"title": "Courses over time", "figure": fig_json}
 
+@timed_plot
 def plot_subscribers_by_year(courses):
-    courses_with_created_year = courses.copy()
-    courses_with_created_year['created_year'] = (
-        courses_with_created_year['created']
-        .apply(lambda date: pd.Timestamp(date).year)
-    )
+    courses_with_created_year = with_text_dates(courses)
+    if 'created_year' not in courses.columns:
+        courses_with_created_year = courses_with_created_year.assign(created_year=created_years(courses))
 
     #courses_with_created_year = courses_with_created_year[~courses_with_created_year['decile'].isin(['Decile 10'])] # Remove the last decile
 
@@ -282,7 +806,7 @@ def plot_subscribers_by_year(courses):
         yaxis=dict(range=[0, 75000])  # Set the initial y-axis range to focus on lower deciles
     )
 
-    fig.update_xaxes(tickvals=courses_with_created_year['created_year'], tickformat="%Y")
+    fig.update_xaxes(tickvals=np.unique(courses_with_created_year['created_year']), tickformat="%Y")
 
     fig.add_annotation(
         text="<sup>Opened with Zoom below 75k subscribers. Use autoscale to view all data. </sup> ",
@@ -292,18 +816,24 @@ def plot_subscribers_by_year(courses):
     )
 
     # Show the box plot
-    fig_html = pio.to_html(fig, full_html=False)
+    fig_json = figure_to_json(fig)
     print("# Finished creating plot of subscribers by year")
-    return {"title": "Number of subscribers by year", "figure": fig_html}
+    return {"title": "Number of subscribers by year", "figure": fig_json}
 
-def plot_scatter_curriculum_items(courses):
-    fig = px.scatter(
+@timed_plot
+def plot_scatter_curriculum_items(courses, max_points=SCATTER_POINT_BUDGETS["scatter_curriculum_items"], trendlines=None):
+
+    if trendlines is None:
+        trendlines = TrendlineFits.from_dataframe(courses)
+
+    fig = scatter_with_point_budget(
         courses,
         x="num_curriculum_items",
         y="num_subscribers",
-        trendline="ols",
+        max_points=max_points,
+        trendlines=trendlines,
         color="decile",
-        hover_data=courses.columns
+        category_orders=DECILE_ORDER,
     )
 
     fig.update_layout(
@@ -320,18 +850,24 @@ def plot_scatter_curriculum_items(courses):
     )
 
     # Show the box plot
-    fig_html = pio.to_html(fig, full_html=False)
+    fig_json = figure_to_json(fig)
     print("# Finished creating scatter plot of curriculum items")
-    return {"title": "Number of Subscribers vs Curriculum Items", "figure": fig_html}
+    return {"title": "Number of Subscribers vs Curriculum Items", "figure": fig_json}
 
-def plot_scatter_content_length(courses):
-    fig = px.scatter(
-        courses, 
+@timed_plot
+def plot_scatter_content_length(courses, max_points=SCATTER_POINT_BUDGETS["scatter_content_length"], trendlines=None):
+
+    if trendlines is None:
+        trendlines = TrendlineFits.from_dataframe(courses)
+
+    fig = scatter_with_point_budget(
+        courses,
         x="content_length_hours",
         y="num_subscribers",
-        trendline="ols",
+        max_points=max_points,
+        trendlines=trendlines,
         color="decile",
-        hover_data=courses.columns
+        category_orders=DECILE_ORDER,
     )
 
     fig.update_layout(
@@ -347,16 +883,20 @@ def plot_scatter_content_length(courses):
         showarrow=False,
     )
 
-    fig_html = pio.to_html(fig, full_html=False)
+    fig_json = figure_to_json(fig)
     print("# Finished creating scatter plot of content length")
-    return {"title": "Number of Subscribers vs Content length (hours)", "figure": fig_html}
+    return {"title": "Number of Subscribers vs Content length (hours)", "figure": fig_json}
+
+def parsed_lists(column):
+    # Lists of the csv are text, those of the parquet dataset are already lists
+    return column if is_list_column(column) else column.apply(literal_eval)
 
 def explode_labels(df):
     # Create a working copy of the dataframe
     courses_exploded_labels = df.copy()
 
     # Ensure labels are treated as a list (not strings)
-    courses_exploded_labels['labels'] = courses_exploded_labels['labels'].apply(literal_eval)
+    courses_exploded_labels['labels'] = parsed_lists(courses_exploded_labels['labels'])
 
     # Explode the rows (one row per label in course)
     courses_exploded_labels = courses_exploded_labels.explode('labels')
@@ -369,15 +909,23 @@ def explode_labels(df):
 
     return courses_exploded_labels
 
-def plot_topn_labels_by_count(courses, n=50):
-
-    courses = explode_labels(courses)
-
-    top50_label_count = (
-        courses
+def labels_summary_from(df):
+    # Subscribers stats per label, prefer Courses.labels_summary on loaded courses
+    return (
+        explode_labels(df)
         .groupby('labels')['num_subscribers']
         .agg(['min', 'max', 'mean', 'median', 'sum', 'count'])
         .reset_index()
+    )
+
+@timed_plot
+def plot_topn_labels_by_count(courses, n=50, labels_summary=None):
+
+    if labels_summary is None:
+        labels_summary = labels_summary_from(courses)
+
+    top50_label_count = (
+        labels_summary
         .sort_values(by='count', ascending=False)
         .head(n)
     )
@@ -398,19 +946,18 @@ def plot_topn_labels_by_count(courses, n=50):
         height=600
     )
 
-    fig_html = pio.to_html(fig, full_html=False)
+    fig_json = figure_to_json(fig)
     print("# Finished creating plot of top N labels by number of courses")
-    return {"title": "Top 50 Labels by number of courses", "figure": fig_html}
+    return {"title": "Top 50 Labels by number of courses", "figure": fig_json}
 
-def plot_topn_labels_by_subscribers(courses, n=50):
+@timed_plot
+def plot_topn_labels_by_subscribers(courses, n=50, labels_summary=None):
 
-    courses = explode_labels(courses)
+    if labels_summary is None:
+        labels_summary = labels_summary_from(courses)
 
     top50_label_subscribers = (
-        courses
-        .groupby('labels')['num_subscribers']
-        .agg(['min', 'max', 'mean', 'median', 'sum', 'count'])
-        .reset_index()
+        labels_summary
         .sort_values(by='sum', ascending=False)
         .head(n)
     )
@@ -429,16 +976,16 @@ def plot_topn_labels_by_subscribers(courses, n=50):
         height=600
     )
 
-    fig_html = pio.to_html(fig, full_html=False)
+    fig_json = figure_to_json(fig)
     print("# Finished creating plot of top N labels by subscribers")
-    return {"title": "Top 50 labels by Number of subscribers", "figure": fig_html}
+    return {"title": "Top 50 labels by Number of subscribers", "figure": fig_json}
 
 def instructors_summary_from(df):
     # Create a working copy of the dataframe
     courses_exploded_instructors = df.copy()
 
     # Ensure instructors are treated as lists not strings
-    courses_exploded_instructors['instructors'] = courses_exploded_instructors['instructors'].apply(literal_eval)
+    courses_exploded_instructors['instructors'] = parsed_lists(courses_exploded_instructors['instructors'])
 
     # Explode the courses list with one instructor per row
     courses_exploded_instructors = courses_exploded_instructors.explode('instructors')
@@ -459,9 +1006,12 @@ def instructors_summary_from(df):
 
     return instructors_stats_summary
 
-def plot_topn_instructors_by_subscribers(courses, subscribers_threshold=100000):
+@timed_plot
+def plot_topn_instructors_by_subscribers(courses, subscribers_threshold=100000, instructors_summary=None):
 
-    instructors_stats_summary = instructors_summary_from(courses)
+    instructors_stats_summary = instructors_summary
+    if instructors_stats_summary is None:
+        instructors_stats_summary = instructors_summary_from(courses)
 
     # Get instructors with more than 1M subscribers then sort by number of subscribers. 
     instructors_1M_subscribers = (
@@ -482,13 +1032,16 @@ def plot_topn_instructors_by_subscribers(courses, subscribers_threshold=100000):
         height=600
     )
 
-    fig_html = pio.to_html(fig, full_html=False)
+    fig_json = figure_to_json(fig)
     print("# Finished creating plot of top instructors by subscribers count")
-    return {"title": f"Instructors with more than {subscribers_threshold} subscribers", "figure": fig_html}
+    return {"title": f"Instructors with more than {subscribers_threshold} subscribers", "figure": fig_json}
 
-def plot_topn_instructors_by_courses(courses, n=10):
+@timed_plot
+def plot_topn_instructors_by_courses(courses, n=10, instructors_summary=None):
 
-    instructors_stats_summary = instructors_summary_from(courses)
+    instructors_stats_summary = instructors_summary
+    if instructors_stats_summary is None:
+        instructors_stats_summary = instructors_summary_from(courses)
     instructors_stats_summary = (
         instructors_stats_summary
         .sort_values(by='num_courses', ascending=False)
@@ -505,6 +1058,6 @@ def plot_topn_instructors_by_courses(courses, n=10):
     fig.update_xaxes(tickfont=dict(size=10))
     fig.update_layout(height=600)
 
-    fig_html = pio.to_html(fig, full_html=False)
+    fig_json = figure_to_json(fig)
     print("# Finished creating plot of top instructors by course count")
-    return {"title": "Number of courses created by Instructors with more than 1M subscribers", "figure": fig_html}
\ No newline at end of file
+    return {"title": "Number of courses created by Instructors with more than 1M subscribers", "figure": fig_json}
\ No newline at end of file
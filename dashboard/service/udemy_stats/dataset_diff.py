@@ -0,0 +1,106 @@
+# Importing analysis libraries
+import numpy as np
+import pandas as pd
+
+from dashboard.service.udemy_stats.list_index import is_list_column, list_names
+
+"""Differences between versions of the courses
+Compares a reloaded dataset with the one being served, course by course, so
+only the indexes, aggregates and cached dashboards of the affected
+subcategories have to be rebuilt.
+"""
+
+class CoursesDiff:
+    """Differences between two versions of the prepared courses, by udemy_id.
+
+    Courses are compared through a hash of all their columns, so the derived
+    columns count too: a course moving to another decile is changed. The
+    affected subcategories are those of the added, removed and changed courses
+    (before and after the change), every other subcategory is identical.
+    """
+
+    def __init__(self, added, removed, changed, affected_subcategories, complete=False):
+        self.added = added  # udemy_id of the new courses
+        self.removed = removed
+        self.changed = changed
+        self.affected_subcategories = affected_subcategories
+        self.complete = complete  # The whole dataset changed, nothing can be reused
+
+    def is_empty(self):
+        return not self.complete and len(self.added) + len(self.removed) + len(self.changed) == 0
+
+    def affects(self, subcategories):
+        return self.complete or any(subcategory in self.affected_subcategories for subcategory in subcategories)
+
+    def summary(self):
+        return {
+            "added": len(self.added),
+            "removed": len(self.removed),
+            "changed": len(self.changed),
+            "affected_subcategories": sorted(self.affected_subcategories),
+            "complete": self.complete,
+        }
+
+
+def diff_courses(old_df, new_df, key="udemy_id"):
+    # Without the same columns and a unique key, every course is considered changed
+    if (
+        list(old_df.columns) != list(new_df.columns)
+        or not old_df[key].is_unique
+        or not new_df[key].is_unique
+    ):
+        subcategories = set(old_df["subcategory"].unique()) | set(new_df["subcategory"].unique())
+        return CoursesDiff(
+            new_df[key].to_numpy(), old_df[key].to_numpy(), np.empty(0, dtype=np.int64),
+            subcategories, complete=True
+        )
+
+    # Categorical and text columns hash the same, so a snapshot compares with a csv
+    old_hash = pd.Series(row_hashes(old_df), index=old_df[key].to_numpy())
+    new_hash = pd.Series(row_hashes(new_df), index=new_df[key].to_numpy())
+
+    in_old = new_hash.index.isin(old_hash.index)
+    in_new = old_hash.index.isin(new_hash.index)
+    common = new_hash.index[in_old]
+
+    added = new_hash.index[~in_old].to_numpy()
+    removed = old_hash.index[~in_new].to_numpy()
+    changed = common[old_hash.loc[common].to_numpy() != new_hash.loc[common].to_numpy()].to_numpy()
+
+    # Subcategories of the courses before and after the change
+    old_subcategory = pd.Series(old_df["subcategory"].to_numpy(), index=old_hash.index)
+    new_subcategory = pd.Series(new_df["subcategory"].to_numpy(), index=new_hash.index)
+    affected = (
+        set(old_subcategory.loc[np.r_[removed, changed]].unique())
+        | set(new_subcategory.loc[np.r_[added, changed]].unique())
+    )
+
+    return CoursesDiff(added, removed, changed, affected)
+
+
+def row_hashes(df):
+    # Hash of every course, arrow list columns are hashed from their names
+    list_columns = {column: list_hashes(df[column]) for column in df.columns if is_list_column(df[column])}
+    return pd.util.hash_pandas_object(df.assign(**list_columns), index=False).to_numpy()
+
+
+def list_hashes(column):
+    # Hash of the names of every course, and of their position in its list
+    lengths, flat_names = list_names(column)
+    starts = np.cumsum(lengths) - lengths
+    positions = np.arange(len(flat_names)) - np.repeat(starts, lengths)
+    name_hashes = pd.util.hash_array(flat_names) ^ pd.util.hash_array(positions.astype(np.uint64))
+
+    hashes = pd.util.hash_array(lengths.astype(np.uint64))
+    np.add.at(hashes, np.repeat(np.arange(len(lengths)), lengths), name_hashes)
+    return hashes
+
+
+def previous_rows(old_df, new_df, diff, key="udemy_id"):
+    """Row of every new course in the old dataframe, -1 when it is new or changed."""
+    if diff.complete:
+        return np.full(len(new_df), -1, dtype=np.int64)
+
+    rows = pd.Index(old_df[key].to_numpy()).get_indexer(new_df[key].to_numpy())
+    rows[np.isin(new_df[key].to_numpy(), diff.changed)] = -1
+    return rows
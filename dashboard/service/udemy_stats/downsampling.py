@@ -0,0 +1,85 @@
+# Importing analysis libraries
+import numpy as np
+import pandas as pd
+
+
+def reduce_points(courses, x, y, max_points, color=None):
+    """Reduce the courses of a scatter plot to at most max_points markers.
+
+    The extreme courses (minimum/maximum of each axis) and the outliers above
+    the upper Tukey fence of y are kept exactly. The remaining, dense, region
+    is aggregated on a grid with one marker per non-empty cell (and color
+    group) placed at the mean of its courses.
+
+    Returns the kept courses and the aggregated cells, which have the x, y and
+    color columns plus the number of courses in each cell ("courses_in_bin").
+    """
+    binned_columns = [x, y] + ([color] if color else []) + ["courses_in_bin"]
+    no_bins = pd.DataFrame(columns=binned_columns)
+
+    if max_points is None or len(courses) <= max_points:
+        return courses, no_bins
+
+    x_values = courses[x].to_numpy(dtype=float)
+    y_values = courses[y].to_numpy(dtype=float)
+    valid = ~(np.isnan(x_values) | np.isnan(y_values))
+
+    # Outliers above the upper fence, the most subscribed first
+    q1, q3 = np.percentile(y_values[valid], [25, 75])
+    outliers = np.flatnonzero(valid & (y_values > q3 + 1.5 * (q3 - q1)))
+    outliers = outliers[np.argsort(-y_values[outliers], kind="stable")]
+
+    # Extremes of each axis
+    valid_rows = np.flatnonzero(valid)
+    extremes = valid_rows[[
+        np.argmin(x_values[valid]),
+        np.argmax(x_values[valid]),
+        np.argmin(y_values[valid]),
+        np.argmax(y_values[valid]),
+    ]]
+
+    # Exact points use at most half of the budget, the bins use the rest
+    kept = np.unique(np.r_[extremes, outliers[: max(max_points // 2 - len(extremes), 0)]])
+    is_kept = np.zeros(len(courses), dtype=bool)
+    is_kept[kept] = True
+    rest = np.flatnonzero(valid & ~is_kept)
+
+    if color:
+        group_codes, group_labels = pd.factorize(courses[color].to_numpy()[rest])
+    else:
+        group_codes, group_labels = np.zeros(len(rest), dtype=np.int64), [None]
+
+    # Square grid per color group sized to fit the remaining budget
+    cells_per_group = (max_points - len(kept)) // max(len(group_labels), 1)
+    grid_size = max(int(np.sqrt(cells_per_group)), 1)
+
+    x_bins = _grid_positions(x_values[rest], grid_size)
+    y_bins = _grid_positions(y_values[rest], grid_size)
+    cells = (group_codes * grid_size + x_bins) * grid_size + y_bins
+
+    binned = (
+        pd.DataFrame({"cell": cells, x: x_values[rest], y: y_values[rest]})
+        .groupby("cell")
+        .agg(**{
+            x: (x, "mean"),
+            y: (y, "mean"),
+            "courses_in_bin": (y, "size"),
+        })
+    )
+    if color:
+        binned[color] = np.asarray(group_labels)[binned.index // (grid_size * grid_size)]
+
+    return courses.take(kept), binned.reset_index(drop=True)[binned_columns]
+
+
+def _grid_positions(values, grid_size):
+    # Position of each value on an equal-width grid over its range
+    if len(values) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    low, high = values.min(), values.max()
+    if high == low:
+        return np.zeros(len(values), dtype=np.int64)
+
+    positions = ((values - low) / (high - low) * grid_size).astype(np.int64)
+    return np.minimum(positions, grid_size - 1)
@@ -0,0 +1,177 @@
+# Importing analysis libraries
+import numpy as np
+import pandas as pd
+from ast import literal_eval
+
+
+class ListColumnIndex:
+    """Integer-coded index of a column holding a list of names per course.
+
+    Each distinct name (an instructor, a label) gets an integer code, its
+    position in `names`. Both directions are stored CSR-style:
+
+    - course -> names: the codes of course i are
+      row_codes[row_offsets[i]:row_offsets[i + 1]]
+    - name -> courses: the courses of code c are
+      name_rows[name_offsets[c]:name_offsets[c + 1]]
+    """
+
+    def __init__(self, names, row_offsets, row_codes, name_rows=None, name_offsets=None):
+        self.names = names
+        self.row_offsets = row_offsets
+        self.row_codes = row_codes
+
+        # Transpose the course -> names index, unless it was stored
+        if name_rows is None:
+            course_rows = np.repeat(np.arange(len(row_offsets) - 1), np.diff(row_offsets))
+            order = np.argsort(row_codes, kind="stable")
+            name_rows = course_rows[order]
+            name_offsets = np.r_[0, np.cumsum(np.bincount(row_codes, minlength=len(names)))]
+        self.name_rows = name_rows
+        self.name_offsets = name_offsets
+
+    @classmethod
+    def from_column(cls, column, empty_name=None):
+        lengths, flat_names = parse_lists(column, empty_name)
+        return cls.from_names(lengths, np.asarray(flat_names, dtype=object))
+
+    @classmethod
+    def from_names(cls, lengths, flat_names):
+        # The names of every course, one after the other
+        row_codes, names = pd.factorize(pd.Series(flat_names, dtype=object), sort=True)
+        row_offsets = np.r_[0, np.cumsum(lengths)]
+
+        return cls(np.asarray(names, dtype=object), row_offsets, row_codes.astype(np.int64))
+
+    def reindexed(self, column, previous_rows, empty_name=None):
+        """Index a new version of the column, only parsing its changed values.
+
+        previous_rows gives for every course of the new column its row in this
+        index when the course is unchanged, or -1 to parse its value again.
+        """
+        reused = previous_rows >= 0
+        parsed_lengths, parsed_names = parse_lists(column[~reused], empty_name)
+
+        lengths = np.empty(len(previous_rows), dtype=np.int64)
+        lengths[reused] = np.diff(self.row_offsets)[previous_rows[reused]]
+        lengths[~reused] = parsed_lengths
+
+        # The names of the reused courses come from this index, in their new order
+        is_reused_name = np.repeat(reused, lengths)
+
+        flat_names = np.empty(lengths.sum(), dtype=object)
+        reused_codes, _ = self.codes_of(previous_rows[reused])
+        flat_names[is_reused_name] = np.asarray(self.names, dtype=object)[reused_codes]
+        flat_names[~is_reused_name] = np.asarray(parsed_names, dtype=object)
+
+        return self.from_names(lengths, flat_names)
+
+    def to_snapshot(self):
+        # Names are stored as fixed-width strings so they can be memory-mapped too
+        arrays = {
+            "names": np.asarray(self.names, dtype=str),
+            "row_offsets": self.row_offsets,
+            "row_codes": self.row_codes,
+            "name_rows": self.name_rows,
+            "name_offsets": self.name_offsets,
+        }
+        return arrays, {}
+
+    @classmethod
+    def from_snapshot(cls, arrays, metadata):
+        return cls(**arrays)
+
+    def codes_of(self, rows=None):
+        """Return the codes of the given courses and, for each code, its course."""
+        if rows is None:
+            course_rows = np.repeat(np.arange(len(self.row_offsets) - 1), np.diff(self.row_offsets))
+            return self.row_codes, course_rows
+
+        starts = self.row_offsets[rows]
+        lengths = self.row_offsets[rows + 1] - starts
+        course_rows = np.repeat(rows, lengths)
+
+        # Positions of every code of the selected courses in row_codes
+        first_position = np.cumsum(lengths) - lengths
+        positions = np.repeat(starts - first_position, lengths) + np.arange(lengths.sum())
+
+        return self.row_codes[positions], course_rows
+
+    def rows_with(self, names):
+        """Return the sorted positions of the courses having any of the names."""
+        codes = np.flatnonzero(np.isin(self.names, list(names)))
+        rows = [self.name_rows[self.name_offsets[code]:self.name_offsets[code + 1]] for code in codes]
+        return np.unique(np.concatenate(rows + [np.empty(0, dtype=np.int64)]))
+
+    def count_names(self, rows=None):
+        """Return the number of distinct names used by the given courses."""
+        codes, _ = self.codes_of(rows)
+        return np.count_nonzero(np.bincount(codes, minlength=len(self.names)))
+
+    def aggregate(self, values, rows=None):
+        """Aggregate the values of the given courses per name.
+
+        Returns a dataframe indexed by name with the min, max, mean, median,
+        sum and count of the values of the courses having that name.
+        """
+        codes, course_rows = self.codes_of(rows)
+        course_values = values[course_rows]
+
+        # Sort by name then value so each name is a block with its values in order
+        order = np.lexsort((course_values, codes))
+        codes, course_values = codes[order], course_values[order]
+
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.empty(0, dtype=np.int64)
+        count = np.diff(np.r_[starts, len(codes)])
+        ends = starts + count - 1
+        total = np.add.reduceat(course_values, starts) if len(codes) else course_values[:0]
+
+        return pd.DataFrame(
+            {
+                "min": course_values[starts],
+                "max": course_values[ends],
+                "mean": total / count,
+                "median": (course_values[starts + (count - 1) // 2] + course_values[starts + count // 2]) / 2,
+                "sum": total,
+                "count": count,
+            },
+            index=pd.Index(self.names[codes[starts]], name="name"),
+        )
+
+
+def is_list_column(column):
+    # Lists read from the parquet dataset are arrow lists, those of the csv are text
+    return isinstance(column.dtype, pd.ArrowDtype) and column.dtype.type is list
+
+
+def list_names(column, empty_name=None):
+    """Number of names of every course of an arrow list column and all the names one after the other.
+
+    Courses without any name can be indexed under a placeholder name.
+    """
+    lengths = column.list.len().fillna(0).to_numpy(dtype=np.int64)
+    flat_names = column.list.flatten().to_numpy(dtype=object)
+
+    if empty_name is not None:
+        empty = lengths == 0
+        flat_names = np.insert(flat_names, (np.cumsum(lengths) - lengths)[empty], empty_name)
+        lengths = np.maximum(lengths, 1)
+    return lengths, flat_names
+
+
+def parse_lists(column, empty_name=None):
+    # Arrow lists are already lists, the stringified ones are parsed only once
+    if is_list_column(column):
+        return list_names(column, empty_name)
+
+    lists = [
+        literal_eval(value) if isinstance(value, str) else list(value)
+        for value in column
+    ]
+
+    # Courses without any name can be indexed under a placeholder name
+    if empty_name is not None:
+        lists = [names if len(names) > 0 else [empty_name] for names in lists]
+
+    lengths = np.fromiter((len(names) for names in lists), dtype=np.int64, count=len(lists))
+    return lengths, [name for names in lists for name in names]
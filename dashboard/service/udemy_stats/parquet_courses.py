@@ -0,0 +1,47 @@
+# Importing analysis libraries
+import os
+import pandas as pd
+
+from dashboard.service.lazy_imports import lazy_import
+
+# Optional, only needed to read the parquet dataset
+pa_dataset = lazy_import("pyarrow.dataset")
+pa_types = lazy_import("pyarrow.types")
+
+"""Parquet courses
+Reads the parquet dataset written by the transformation pipeline
+(transformation/columnar.py): one directory of files per subcategory, so only
+the requested columns of the requested subcategories are read. Instructors
+and labels stay arrow lists in the dataframe, their indexes are built from
+the flat names without parsing or writing any text.
+"""
+
+
+def is_parquet_dataset(path):
+    return os.path.isdir(path) or path.endswith(".parquet")
+
+
+def arrow_lists(arrow_type):
+    # List columns are kept as arrow lists, the other columns get their usual pandas dtype
+    return pd.ArrowDtype(arrow_type) if pa_types.is_list(arrow_type) else None
+
+
+def read_parquet_courses(dataset_path, columns=None, subcategories=None):
+    """Courses of the dataset as a dataframe, with the list columns as arrow lists."""
+    dataset = pa_dataset.dataset(
+        dataset_path, format="parquet",
+        partitioning=pa_dataset.HivePartitioning.discover(infer_dictionary=True),
+    )
+    # A filter on the partition column skips the files of the other subcategories
+    partition_filter = None
+    if subcategories is not None:
+        partition_filter = pa_dataset.field("subcategory").isin(list(subcategories))
+
+    # Columns in the order of the csv, where the subcategory follows the category
+    names = [name for name in dataset.schema.names if name != "subcategory"]
+    names.insert(names.index("category") + 1 if "category" in names else len(names), "subcategory")
+    if columns is not None:
+        names = [name for name in names if name in columns]
+    table = dataset.to_table(columns=names, filter=partition_filter)
+
+    return table.to_pandas(coerce_temporal_nanoseconds=True, types_mapper=arrow_lists)
@@ -0,0 +1,141 @@
+# Importing analysis libraries
+import numpy as np
+import pandas as pd
+
+# Columns indexed with one bitmap per value
+BITMAP_COLUMNS = ["subcategory", "category", "locale", "decile"]
+
+# Columns indexed with a sorted array for range queries
+SORTED_COLUMNS = [
+    "price",
+    "rating",
+    "created_year",
+    "content_length_hours",
+    "num_subscribers",
+]
+
+
+class RowIndex:
+    """Bitmap and sorted indexes over the rows of the loaded courses.
+
+    Categorical columns get one bitmap (packed bits, one per row) for each of
+    their values. Numeric columns get their values sorted along with the row of
+    each value, so a range is two binary searches. A query turns every
+    predicate into a bitmap and intersects them to get the matching rows.
+    """
+
+    def __init__(self, num_rows, bitmaps, sorted_values, sorted_rows):
+        self.num_rows = num_rows
+        self.bitmaps = bitmaps  # Column -> value -> packed bitmap
+        self.sorted_values = sorted_values  # Column -> sorted values
+        self.sorted_rows = sorted_rows  # Column -> row of each sorted value
+
+    @classmethod
+    def from_dataframe(cls, df):
+        columns = {column: df[column] for column in BITMAP_COLUMNS + SORTED_COLUMNS if column in df.columns}
+        if "created_year" not in columns:
+            columns["created_year"] = pd.to_datetime(df["created"]).dt.year
+
+        bitmaps = {}
+        for column in BITMAP_COLUMNS:
+            if column not in columns:
+                continue
+            codes, values = pd.factorize(columns[column].to_numpy())
+            bitmaps[column] = {
+                value: np.packbits(codes == code) for code, value in enumerate(values)
+            }
+
+        sorted_values, sorted_rows = {}, {}
+        for column in SORTED_COLUMNS:
+            if column not in columns:
+                continue
+            values = columns[column].to_numpy(dtype=float)
+            order = np.argsort(values, kind="stable")  # NaN values are sorted last
+            sorted_values[column] = values[order]
+            sorted_rows[column] = order
+
+        return cls(len(df), bitmaps, sorted_values, sorted_rows)
+
+    def to_snapshot(self):
+        # The bitmaps of a column are stacked, one row per value
+        arrays, bitmap_values = {}, {}
+        for column, bitmaps in self.bitmaps.items():
+            bitmap_values[column] = list(bitmaps)
+            arrays[f"bitmaps.{column}"] = (
+                np.stack(list(bitmaps.values())) if bitmaps else np.empty((0, len(self.empty_bitmap())), dtype=np.uint8)
+            )
+        for column in self.sorted_values:
+            arrays[f"sorted_values.{column}"] = self.sorted_values[column]
+            arrays[f"sorted_rows.{column}"] = self.sorted_rows[column]
+
+        return arrays, {"num_rows": self.num_rows, "bitmap_values": bitmap_values}
+
+    @classmethod
+    def from_snapshot(cls, arrays, metadata):
+        bitmaps = {
+            column: dict(zip(values, arrays[f"bitmaps.{column}"]))
+            for column, values in metadata["bitmap_values"].items()
+        }
+        sorted_columns = [name.partition(".")[2] for name in arrays if name.startswith("sorted_values.")]
+        return cls(
+            metadata["num_rows"],
+            bitmaps,
+            {column: arrays[f"sorted_values.{column}"] for column in sorted_columns},
+            {column: arrays[f"sorted_rows.{column}"] for column in sorted_columns},
+        )
+
+    def columns(self):
+        return list(self.bitmaps) + list(self.sorted_values)
+
+    def values_bitmap(self, column, values):
+        # Rows having any of the values
+        bitmaps = [self.bitmaps[column][value] for value in values if value in self.bitmaps[column]]
+        if not bitmaps:
+            return self.empty_bitmap()
+        return np.bitwise_or.reduce(bitmaps)
+
+    def range_bitmap(self, column, low=None, high=None):
+        # Rows with a value between low and high (inclusive, None is open)
+        values = self.sorted_values[column]
+        start = 0 if low is None else np.searchsorted(values, low, side="left")
+        stop = np.searchsorted(values, np.inf if high is None else high, side="right")
+
+        bits = np.zeros(self.num_rows, dtype=bool)
+        bits[self.sorted_rows[column][start:stop]] = True
+        return np.packbits(bits)
+
+    def empty_bitmap(self):
+        return np.zeros((self.num_rows + 7) // 8, dtype=np.uint8)
+
+    def query(self, predicates):
+        """Return the sorted rows matching every predicate.
+
+        A predicate maps a column to a list of values (bitmap columns) or to a
+        (low, high) range (sorted columns).
+        """
+        bitmap = None
+        for column, condition in predicates.items():
+            if column in self.bitmaps and not isinstance(condition, tuple):
+                predicate_bitmap = self.values_bitmap(column, condition)
+            elif column in self.sorted_values and isinstance(condition, tuple):
+                predicate_bitmap = self.range_bitmap(column, *condition)
+            else:
+                raise ValueError(f"Column '{column}' can not be filtered by {condition!r}")
+
+            bitmap = predicate_bitmap if bitmap is None else bitmap & predicate_bitmap
+
+        if bitmap is None:
+            return np.arange(self.num_rows)
+        return np.flatnonzero(np.unpackbits(bitmap, count=self.num_rows))
+
+
+def parse_range(text):
+    """Parse a "low..high" range where either end may be left empty."""
+    low, separator, high = text.partition("..")
+    if not separator:
+        low = high = text  # A single value is a range of one value
+
+    try:
+        return (float(low) if low else None, float(high) if high else None)
+    except ValueError:
+        raise ValueError(f"Invalid range '{text}', expected low..high")
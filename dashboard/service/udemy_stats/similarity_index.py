@@ -0,0 +1,161 @@
+# Importing analysis libraries
+import numpy as np
+
+from dashboard.service.lazy_imports import lazy_import
+
+# Only needed to build the index, not to query a stored one
+scipy_sparse = lazy_import("scipy.sparse")
+sklearn_text = lazy_import("sklearn.feature_extraction.text")
+sklearn_projection = lazy_import("sklearn.random_projection")
+
+"""Similar courses
+TF-IDF vectors of the courses' text with random-projection LSH tables. Each
+table hashes a course to the signs of a few random projections of its vector,
+so courses with close vectors share buckets. A lookup reads the buckets of
+the course (and those one bit away) in every table, then ranks only those
+candidates by cosine similarity.
+"""
+
+NUM_TABLES = 32
+
+# Courses per bucket the number of bits aims for. Unrelated courses still share
+# common words, small buckets keep them out of the candidates; the tables and
+# the buckets one bit away bring back the similar ones.
+BUCKET_SIZE = 2
+MAX_BITS = 24
+
+
+def bits_for(num_docs):
+    return int(np.clip(np.ceil(np.log2(max(num_docs, 1) / BUCKET_SIZE)), 1, MAX_BITS))
+
+
+class SimilarityIndex:
+    """Unit TF-IDF vectors of the courses and their LSH tables.
+
+    The vector of document d is stored CSR-style: its terms are
+    vector_terms[vector_offsets[d]:vector_offsets[d + 1]] with the weights in
+    vector_weights. codes[t, d] is the bucket of d in table t, and table t
+    lists the documents by bucket in table_docs[t] (with their buckets in
+    table_codes[t]), so a bucket is found by binary search.
+    """
+
+    def __init__(self, vector_offsets, vector_terms, vector_weights, codes, table_docs, table_codes, bits):
+        self.vector_offsets = vector_offsets
+        self.vector_terms = vector_terms
+        self.vector_weights = vector_weights
+        self.codes = codes
+        self.table_docs = table_docs
+        self.table_codes = table_codes
+        self.bits = int(bits)
+
+    @classmethod
+    def from_text_index(cls, text_index, num_tables=NUM_TABLES, seed=42):
+        """Index the term frequencies of the text index, one vector per document."""
+        num_docs, num_terms = text_index.num_docs, len(text_index.terms)
+
+        # The postings are the term -> documents transpose of the vectors
+        frequencies = scipy_sparse.csc_matrix(
+            (text_index.posting_tf, text_index.posting_docs, text_index.term_offsets),
+            shape=(num_docs, num_terms),
+        ).tocsr()
+        vectors = sklearn_text.TfidfTransformer(sublinear_tf=True).fit_transform(frequencies)
+        vectors = vectors.astype(np.float32)
+        vectors.sort_indices()
+
+        # Signs of the random projections, packed into one bucket code per table
+        bits = bits_for(num_docs)
+        # Gaussian projections, sparse ones leave most short vectors at exactly zero
+        projection = sklearn_projection.GaussianRandomProjection(
+            n_components=num_tables * bits, random_state=seed
+        )
+        signs = projection.fit_transform(vectors).reshape(num_docs, num_tables, bits) > 0
+        codes = (signs * (1 << np.arange(bits, dtype=np.int64))).sum(axis=2).T.astype(np.uint32)
+
+        table_docs = np.argsort(codes, axis=1, kind="stable").astype(np.int32)
+        table_codes = np.take_along_axis(codes, table_docs, axis=1)
+
+        return cls(
+            vector_offsets=vectors.indptr.astype(np.int64),
+            vector_terms=vectors.indices.astype(np.int32),
+            vector_weights=vectors.data,
+            codes=codes,
+            table_docs=table_docs,
+            table_codes=table_codes,
+            bits=bits,
+        )
+
+    def to_snapshot(self):
+        arrays = {
+            name: getattr(self, name)
+            for name in ["vector_offsets", "vector_terms", "vector_weights", "codes", "table_docs", "table_codes"]
+        }
+        return arrays, {"bits": self.bits}
+
+    @classmethod
+    def from_snapshot(cls, arrays, metadata):
+        return cls(**arrays, bits=metadata["bits"])
+
+    def probes(self, code, radius):
+        # The bucket and those with up to radius bits flipped
+        flips = [0]
+        if radius >= 1:
+            flips += [1 << bit for bit in range(self.bits)]
+        if radius >= 2:
+            flips += [(1 << a) | (1 << b) for a in range(self.bits) for b in range(a + 1, self.bits)]
+        return np.sort(np.uint32(code) ^ np.asarray(flips, dtype=np.uint32))
+
+    def candidates(self, doc, radius=1):
+        """Documents sharing a probed bucket with doc in any table."""
+        found = []
+        for table in range(len(self.codes)):
+            probes = self.probes(self.codes[table, doc], radius)
+            starts = np.searchsorted(self.table_codes[table], probes, side="left")
+            stops = np.searchsorted(self.table_codes[table], probes, side="right")
+            lengths = stops - starts
+            positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+            found.append(self.table_docs[table][positions])
+
+        candidates = np.unique(np.concatenate(found))
+        return candidates[candidates != doc]
+
+    def similarities(self, doc, candidates):
+        # Cosine similarity of unit vectors: the dot product over the terms of doc
+        terms = slice(self.vector_offsets[doc], self.vector_offsets[doc + 1])
+        query_terms, query_weights = self.vector_terms[terms], self.vector_weights[terms]
+        if len(query_terms) == 0:
+            return np.zeros(len(candidates), dtype=np.float64)
+
+        starts = self.vector_offsets[candidates]
+        lengths = self.vector_offsets[candidates + 1] - starts
+        entries = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+
+        # Terms of every vector are sorted, those of the candidates are looked up in the query's
+        entry_terms = self.vector_terms[entries]
+        matches = np.minimum(np.searchsorted(query_terms, entry_terms), len(query_terms) - 1)
+        shared = query_terms[matches] == entry_terms
+        products = np.where(shared, self.vector_weights[entries] * query_weights[matches], 0)
+
+        # Sum the products of each candidate, empty vectors have no products
+        totals = np.zeros(len(candidates), dtype=np.float64)
+        nonempty = lengths > 0
+        if nonempty.any():
+            totals[nonempty] = np.add.reduceat(products, (np.cumsum(lengths) - lengths)[nonempty])
+        return totals
+
+    def similar(self, doc, limit=10, allowed=None):
+        """Most similar documents to doc, best first, with their similarities.
+
+        allowed filters the candidates (a function of an array of documents
+        returning a boolean mask), e.g. to keep one subcategory. Buckets two
+        bits away are probed when one bit away does not find enough of them.
+        """
+        for radius in [1, 2]:
+            candidates = self.candidates(doc, radius)
+            if allowed is not None:
+                candidates = candidates[allowed(candidates)]
+            if len(candidates) >= limit:
+                break
+
+        scores = self.similarities(doc, candidates)
+        best = np.lexsort((candidates, -scores))[:limit]
+        return candidates[best], scores[best]
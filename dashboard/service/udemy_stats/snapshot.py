@@ -0,0 +1,165 @@
+# Importing analysis libraries
+import numpy as np
+import pandas as pd
+
+import json
+import os
+import shutil
+
+from dashboard.service.lazy_imports import lazy_import
+from dashboard.service.udemy_stats.list_index import is_list_column, list_names
+
+# Optional, only needed for the list columns of courses read from parquet
+pa = lazy_import("pyarrow")
+
+# Bump whenever the layout of the snapshot changes, older snapshots are ignored
+SNAPSHOT_FORMAT_VERSION = 4
+
+MANIFEST_FILE = "manifest.json"
+ARTIFACTS_FILE = "artifacts.json"
+INDEX_FILE = "index.npy"
+
+
+def write_snapshot(df, snapshot_path, dataset_version, artifacts=None, indexes=None):
+    """Write the prepared courses as one .npy file per column.
+
+    Numeric columns are stored as they are. Text and categorical columns are
+    dictionary-encoded: their codes are stored as an array and their
+    categories as JSON. Arrow list columns store the offsets of every course
+    in their dictionary-encoded names. Everything can be memory-mapped back
+    by read_snapshot, but list columns are rebuilt in memory.
+    Artifacts are any JSON data computed from the courses (e.g. rendered
+    sections) that should be served without computing them again.
+    Indexes are (arrays, metadata) pairs: their arrays are stored like the
+    columns so every process mapping the snapshot shares them read-only.
+    """
+    # Write next to the snapshot and swap it in once complete
+    temporary_path = snapshot_path + ".tmp"
+    shutil.rmtree(temporary_path, ignore_errors=True)
+    os.makedirs(temporary_path)
+
+    columns = []
+    for position, name in enumerate(df.columns):
+        column = {"name": name, "file": f"column_{position}.npy"}
+        values = df[name]
+
+        if is_list_column(values):
+            lengths, flat_names = list_names(values)
+            categorical = pd.Categorical(flat_names)
+            column["kind"] = "list"
+            column["offsets"] = f"column_{position}.offsets.npy"
+            column["categories"] = f"column_{position}.categories.json"
+
+            np.save(os.path.join(temporary_path, column["offsets"]), np.r_[0, np.cumsum(lengths)].astype(np.int32))
+            np.save(os.path.join(temporary_path, column["file"]), categorical.codes)
+            with open(os.path.join(temporary_path, column["categories"]), "w") as categories_file:
+                json.dump(categorical.categories.tolist(), categories_file)
+        elif values.dtype == object or isinstance(values.dtype, pd.CategoricalDtype):
+            categorical = pd.Categorical(values)
+            column["kind"] = "categorical"
+            column["categories"] = f"column_{position}.categories.json"
+            column["ordered"] = bool(categorical.ordered)
+
+            # The codes keep pandas' own (smallest) dtype so loading them is zero-copy
+            np.save(os.path.join(temporary_path, column["file"]), categorical.codes)
+            with open(os.path.join(temporary_path, column["categories"]), "w") as categories_file:
+                json.dump(categorical.categories.tolist(), categories_file, default=_to_builtin)
+        else:
+            column["kind"] = "array"
+            np.save(os.path.join(temporary_path, column["file"]), values.to_numpy())
+
+        columns.append(column)
+
+    np.save(os.path.join(temporary_path, INDEX_FILE), df.index.to_numpy())
+
+    stored_indexes = {}
+    for index_name, (arrays, metadata) in (indexes or {}).items():
+        files = {}
+        for array_name, values in arrays.items():
+            files[array_name] = f"{index_name}.{array_name}.npy"
+            np.save(os.path.join(temporary_path, files[array_name]), values, allow_pickle=False)
+        stored_indexes[index_name] = {"arrays": files, "metadata": metadata}
+
+    with open(os.path.join(temporary_path, ARTIFACTS_FILE), "w") as artifacts_file:
+        json.dump(artifacts or {}, artifacts_file, default=_to_builtin)
+
+    # The manifest is written last, a snapshot without it is incomplete
+    manifest = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "dataset_version": dataset_version,
+        "num_rows": len(df),
+        "columns": columns,
+        "indexes": stored_indexes,
+    }
+    with open(os.path.join(temporary_path, MANIFEST_FILE), "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2, default=_to_builtin)
+
+    shutil.rmtree(snapshot_path, ignore_errors=True)
+    os.replace(temporary_path, snapshot_path)
+    return manifest
+
+
+def read_snapshot(snapshot_path, dataset_version=None):
+    """Memory-map a snapshot written by write_snapshot.
+
+    Returns the dataframe, the manifest, the artifacts and the indexes (name
+    -> (memory-mapped arrays, metadata)), or None when the snapshot is
+    missing, has another format version, or was built from another dataset
+    version than the one given.
+    """
+    manifest_path = os.path.join(snapshot_path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+
+    with open(manifest_path) as manifest_file:
+        manifest = json.load(manifest_file)
+
+    if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        return None
+    if dataset_version is not None and manifest["dataset_version"] != dataset_version:
+        return None
+
+    columns = {}
+    for column in manifest["columns"]:
+        values = np.load(os.path.join(snapshot_path, column["file"]), mmap_mode="r")
+
+        if column["kind"] == "categorical":
+            with open(os.path.join(snapshot_path, column["categories"])) as categories_file:
+                categories = json.load(categories_file)
+            values = pd.Categorical.from_codes(values, categories=categories, ordered=column["ordered"])
+        elif column["kind"] == "list":
+            offsets = np.load(os.path.join(snapshot_path, column["offsets"]), mmap_mode="r")
+            with open(os.path.join(snapshot_path, column["categories"])) as categories_file:
+                categories = json.load(categories_file)
+            values = list_column(offsets, values, categories)
+
+        columns[column["name"]] = values
+
+    index = np.load(os.path.join(snapshot_path, INDEX_FILE), mmap_mode="r")
+    df = pd.DataFrame(columns, index=pd.Index(index), copy=False)
+
+    with open(os.path.join(snapshot_path, ARTIFACTS_FILE)) as artifacts_file:
+        artifacts = json.load(artifacts_file)
+
+    indexes = {}
+    for index_name, stored in manifest.get("indexes", {}).items():
+        arrays = {
+            array_name: np.load(os.path.join(snapshot_path, file_name), mmap_mode="r")
+            for array_name, file_name in stored["arrays"].items()
+        }
+        indexes[index_name] = (arrays, stored["metadata"])
+
+    return df, manifest, artifacts, indexes
+
+
+def list_column(offsets, codes, categories):
+    # Arrow lists of the names of every course, from their offsets and codes
+    names = pa.array(categories, type=pa.string()).take(pa.array(codes))
+    return pd.arrays.ArrowExtensionArray(pa.ListArray.from_arrays(pa.array(offsets), names))
+
+
+def _to_builtin(value):
+    # JSON encoder fallback for numpy scalars
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
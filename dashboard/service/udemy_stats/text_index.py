@@ -0,0 +1,212 @@
+# Importing analysis libraries
+import numpy as np
+import pandas as pd
+import re
+
+"""Full-text index of the courses
+Positional inverted index over the text fields of the courses, ranked with
+BM25. The postings of every term are stored in flat arrays (CSR-style), so a
+query only reads the postings of its own terms, never every course.
+"""
+
+# Fields of courses_text_data.csv that are indexed, with the weight of their terms
+TEXT_FIELDS = {
+    "title": 3.0,
+    "headline": 2.0,
+    "description": 1.0,
+    "objectives": 1.0,
+    "target_audiences": 1.0,
+}
+
+# Positions skipped between two fields, so phrases do not match across them
+FIELD_GAP = 100
+
+# Longer tokens are urls or noise, they are not indexed
+MAX_TOKEN_LENGTH = 32
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+PHRASE_PATTERN = re.compile(r'"([^"]*)"')
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text):
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if len(token) <= MAX_TOKEN_LENGTH]
+
+
+def parse_query(query):
+    # Quoted phrases must match as they are, the other words only rank the courses
+    phrases = [tokenize(phrase) for phrase in PHRASE_PATTERN.findall(query)]
+    words = tokenize(PHRASE_PATTERN.sub(" ", query))
+    return words, [phrase for phrase in phrases if phrase]
+
+
+class TextIndex:
+    """Positional inverted index of the courses' text.
+
+    Terms are sorted, so a term is looked up by binary search. The postings
+    of term t are the courses posting_docs[term_offsets[t]:term_offsets[t + 1]]
+    with their (field-weighted) term frequencies in posting_tf. The positions
+    of posting p are positions[position_offsets[p]:position_offsets[p + 1]].
+    """
+
+    def __init__(self, terms, term_offsets, posting_docs, posting_tf, position_offsets, positions, doc_lengths):
+        self.terms = terms
+        self.term_offsets = term_offsets
+        self.posting_docs = posting_docs
+        self.posting_tf = posting_tf
+        self.position_offsets = position_offsets
+        self.positions = positions
+        self.doc_lengths = doc_lengths
+        self.num_docs = len(doc_lengths)
+        self.average_length = float(doc_lengths.mean()) if len(doc_lengths) else 0.0
+
+    @classmethod
+    def from_dataframe(cls, df, fields=TEXT_FIELDS):
+        """Index the text fields of the courses, one document per row."""
+        num_docs = len(df)
+        tokens, docs, positions, weights = [], [], [], []
+        field_start = np.zeros(num_docs, dtype=np.int64)
+
+        for field, weight in fields.items():
+            if field not in df.columns:
+                continue
+            field_tokens = [tokenize(text) for text in df[field].fillna("").astype(str)]
+            lengths = np.fromiter((len(doc_tokens) for doc_tokens in field_tokens), dtype=np.int64, count=num_docs)
+            total = lengths.sum()
+
+            # Position of each token in its document, after the previous fields
+            field_docs = np.repeat(np.arange(num_docs), lengths)
+            doc_starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+            tokens.append(np.fromiter(
+                (token for doc_tokens in field_tokens for token in doc_tokens), dtype=object, count=total
+            ))
+            docs.append(field_docs)
+            positions.append(field_start[field_docs] + np.arange(total) - doc_starts)
+            weights.append(np.full(total, weight, dtype=np.float32))
+            field_start += lengths + FIELD_GAP
+
+        tokens = np.concatenate(tokens) if tokens else np.empty(0, dtype=object)
+        docs = np.concatenate(docs) if docs else np.empty(0, dtype=np.int64)
+        positions = np.concatenate(positions) if positions else np.empty(0, dtype=np.int64)
+        weights = np.concatenate(weights) if weights else np.empty(0, dtype=np.float32)
+
+        # Sorted terms, then the tokens sorted by term, document and position
+        codes, terms = pd.factorize(tokens, sort=True)
+        order = np.lexsort((positions, docs, codes))
+        codes, docs, positions, weights = codes[order], docs[order], positions[order], weights[order]
+
+        # One posting per term and document
+        posting_starts = np.flatnonzero(np.r_[True, (codes[1:] != codes[:-1]) | (docs[1:] != docs[:-1])])
+        posting_starts = posting_starts[:len(codes)] if len(codes) else np.empty(0, dtype=np.int64)
+        posting_terms = codes[posting_starts]
+
+        return cls(
+            terms=np.asarray(terms, dtype=f"U{MAX_TOKEN_LENGTH}"),
+            term_offsets=np.searchsorted(posting_terms, np.arange(len(terms) + 1)).astype(np.int64),
+            posting_docs=docs[posting_starts].astype(np.int32),
+            posting_tf=(
+                np.add.reduceat(weights, posting_starts) if len(posting_starts) else np.empty(0, dtype=np.float32)
+            ),
+            position_offsets=np.r_[posting_starts, len(codes)].astype(np.int64),
+            positions=positions.astype(np.int32),
+            doc_lengths=np.bincount(docs, weights=weights, minlength=num_docs).astype(np.float32),
+        )
+
+    def to_snapshot(self):
+        arrays = {
+            name: getattr(self, name)
+            for name in ["terms", "term_offsets", "posting_docs", "posting_tf",
+                         "position_offsets", "positions", "doc_lengths"]
+        }
+        return arrays, {"num_docs": self.num_docs}
+
+    @classmethod
+    def from_snapshot(cls, arrays, metadata):
+        return cls(**arrays)
+
+    def term_id(self, term):
+        # Position of the term in the sorted terms, None if it is not indexed
+        position = np.searchsorted(self.terms, term)
+        if position < len(self.terms) and self.terms[position] == term:
+            return int(position)
+        return None
+
+    def postings(self, term_id):
+        return slice(self.term_offsets[term_id], self.term_offsets[term_id + 1])
+
+    def phrase_docs(self, phrase):
+        """Documents containing the words of the phrase one after the other."""
+        term_ids = [self.term_id(term) for term in phrase]
+        if any(term_id is None for term_id in term_ids):
+            return np.empty(0, dtype=np.int32)
+
+        # Candidates hold every word, then their positions are checked
+        postings = [self.postings(term_id) for term_id in term_ids]
+        docs = self.posting_docs[postings[0]]
+        for posting in postings[1:]:
+            docs = np.intersect1d(docs, self.posting_docs[posting], assume_unique=True)
+
+        # Phrase starts as (document, position) keys, the word at offset i starts i positions earlier
+        starts = None
+        for offset, posting in enumerate(postings):
+            posting_ids = posting.start + np.searchsorted(self.posting_docs[posting], docs)
+            first = self.position_offsets[posting_ids]
+            lengths = self.position_offsets[posting_ids + 1] - first
+            position_ids = np.repeat(first - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+
+            keys = (np.repeat(docs.astype(np.int64), lengths) << 32) + (self.positions[position_ids] - offset)
+            starts = keys if starts is None else np.intersect1d(starts, keys, assume_unique=True)
+
+        return np.unique(starts >> 32).astype(np.int32)
+
+    def search(self, query, limit=20):
+        """Documents ranked by BM25 for the query, best first, with their scores.
+
+        Every word of the query (and of its phrases) adds to the score of the
+        documents containing it. When the query has quoted phrases, only the
+        documents matching all of them are returned.
+        """
+        words, phrases = parse_query(query)
+        term_ids = {
+            term_id for term_id in (self.term_id(term) for term in words + sum(phrases, []))
+            if term_id is not None
+        }
+        if not term_ids or self.num_docs == 0:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+
+        docs, scores = [], []
+        for term_id in term_ids:
+            posting = self.postings(term_id)
+            term_docs = self.posting_docs[posting]
+            tf = self.posting_tf[posting]
+            idf = np.log(1 + (self.num_docs - len(term_docs) + 0.5) / (len(term_docs) + 0.5))
+            length_norm = 1 - B + B * self.doc_lengths[term_docs] / self.average_length
+            docs.append(term_docs)
+            scores.append(idf * tf * (K1 + 1) / (tf + K1 * length_norm))
+
+        # Sum the scores of each document over the postings read. Sorting the
+        # postings costs more than an accumulator per document once they are many.
+        docs, scores = np.concatenate(docs), np.concatenate(scores)
+        if len(docs) > self.num_docs // 8:
+            totals = np.bincount(docs, weights=scores, minlength=self.num_docs)
+            matched = np.zeros(self.num_docs, dtype=bool)
+            matched[docs] = True
+            docs = np.flatnonzero(matched).astype(np.int32)
+            scores = totals[docs]
+        else:
+            docs, inverse = np.unique(docs, return_inverse=True)
+            scores = np.bincount(inverse, weights=scores)
+
+        for phrase in phrases:
+            matching = np.isin(docs, self.phrase_docs(phrase))
+            docs, scores = docs[matching], scores[matching]
+
+        # Only the best documents are sorted
+        if len(docs) > limit:
+            best = np.argpartition(-scores, limit - 1)[:limit]
+            docs, scores = docs[best], scores[best]
+        order = np.lexsort((docs, -scores))
+        return docs[order], scores[order]
@@ -0,0 +1,135 @@
+# Importing analysis libraries
+import numpy as np
+import pandas as pd
+
+# Importing charting libraries
+import plotly.graph_objects as go
+
+# Columns plotted against the number of subscribers with a trendline
+TRENDLINE_COLUMNS = [
+    "rating",
+    "price",
+    "num_curriculum_items",
+    "content_length_hours",
+]
+
+
+class TrendlineFits:
+    """Least-squares trendlines of y against several columns, one per group.
+
+    Every fit comes from sufficient statistics (count and sums of x, y, x², xy
+    and y²) aggregated for all columns and groups in a single groupby, so no
+    regression is run row by row. The lines and their hover text are the same
+    as plotly express' trendline="ols".
+    """
+
+    def __init__(self, fits, y, group):
+        self.fits = fits  # Dataframe indexed by (column, group)
+        self.y = y
+        self.group = group
+
+    @classmethod
+    def from_dataframe(cls, df, columns=TRENDLINE_COLUMNS, y="num_subscribers", group="decile"):
+        columns = [column for column in columns if column in df.columns]
+        y_values = df[y].to_numpy(dtype=float)
+
+        # Sums over the rows where both x and y are known, like the OLS of plotly
+        sums = {}
+        for column in columns:
+            x_values = df[column].to_numpy(dtype=float)
+            valid = ~(np.isnan(x_values) | np.isnan(y_values))
+            x_valid = np.where(valid, x_values, 0.0)
+            y_valid = np.where(valid, y_values, 0.0)
+
+            sums[(column, "n")] = valid.astype(float)
+            sums[(column, "x")] = x_valid
+            sums[(column, "y")] = y_valid
+            sums[(column, "xx")] = x_valid * x_valid
+            sums[(column, "xy")] = x_valid * y_valid
+            sums[(column, "yy")] = y_valid * y_valid
+            sums[(column, "x_min")] = np.where(valid, x_values, np.inf)
+            sums[(column, "x_max")] = np.where(valid, x_values, -np.inf)
+
+        aggregations = {
+            key: {"x_min": "min", "x_max": "max"}.get(key[1], "sum") for key in sums
+        }
+        totals = (
+            pd.DataFrame(sums)
+            .groupby(df[group].to_numpy(), sort=False)
+            .agg(aggregations)
+        )
+
+        # Columns x groups rows, then one closed-form fit per row
+        fits = totals.stack(level=0, future_stack=True).swaplevel().sort_index()
+        fits.index.names = ["column", group]
+        return cls(cls._fit(fits), y, group)
+
+    @staticmethod
+    def _fit(fits):
+        n = fits["n"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_mean = fits["x"] / n
+            y_mean = fits["y"] / n
+            sxx = fits["xx"] - fits["x"] * x_mean
+            sxy = fits["xy"] - fits["x"] * y_mean
+            syy = fits["yy"] - fits["y"] * y_mean
+
+            # A constant x (up to rounding) has no slope, the line is the mean of y
+            varying = sxx > 1e-12 * fits["xx"]
+            slope = np.where(varying, sxy / sxx, 0.0)
+            rsquared = np.where(varying, sxy * sxy / (sxx * syy), 1 - syy / syy)
+
+        return pd.DataFrame({
+            "n": n,
+            "slope": slope,
+            "intercept": y_mean - slope * x_mean,
+            "rsquared": rsquared,
+            "constant_x": ~varying,
+            "x_min": fits["x_min"],
+            "x_max": fits["x_max"],
+        }, index=fits.index)
+
+    def traces(self, x, color_map=None, category_order=None, webgl=False):
+        """Two-point line traces of the x column, one per group."""
+        if x not in self.fits.index.get_level_values("column"):
+            return []
+
+        fits = self.fits.loc[x]
+        groups = [name for name in (category_order or fits.index) if name in fits.index]
+        trace_type = go.Scattergl if webgl else go.Scatter
+
+        traces = []
+        for name in groups:
+            fit = fits.loc[name]
+            # Plotly draws no trendline for fewer than two courses
+            if fit["n"] < 2:
+                continue
+
+            line_x = np.array([fit["x_min"], fit["x_max"]])
+            if fit["constant_x"] and fit["x_min"] != 0:
+                # statsmodels takes a non-zero constant x as the constant term, its
+                # single coefficient is the mean of y divided by x
+                equation = f"{self.y} = {fit['intercept'] / fit['x_min']:g}"
+            else:
+                equation = f"{self.y} = {fit['slope']:g} * {x} + {fit['intercept']:g}"
+            hover_header = (
+                "<b>OLS trendline</b><br>"
+                f"{equation}<br>"
+                f"R<sup>2</sup>={fit['rsquared']:f}<br><br>"
+            )
+            traces.append(trace_type(
+                x=line_x,
+                y=fit["intercept"] + fit["slope"] * line_x,
+                mode="lines",
+                name=name,
+                legendgroup=name,
+                showlegend=False,
+                marker=dict(color=(color_map or {}).get(name), symbol="circle"),
+                hovertemplate=(
+                    hover_header
+                    + f"{self.group}={name}<br>{x}=%{{x}}<br>{self.y}=%{{y}} <b>(trend)</b><extra></extra>"
+                ),
+                xaxis="x",
+                yaxis="y",
+            ))
+        return traces
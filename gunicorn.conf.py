@@ -0,0 +1,33 @@
+import gc
+import os
+
+"""Gunicorn configuration of the dashboard
+Runs the FastAPI app in uvicorn workers:
+
+    gunicorn -c gunicorn.conf.py dashboard.service.main:app
+
+The app is preloaded: the master loads the courses (memory-mapped from the
+snapshot) and builds their indexes once, then forks the workers, which share
+all of it read-only instead of loading their own copy. WEB_CONCURRENCY sets
+the number of workers.
+"""
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = 120
+
+# Load the data in the master, before forking
+preload_app = True
+os.environ.setdefault("DASHBOARD_PREPARE_INDEXES", "1")
+
+
+def pre_fork(server, worker):
+    # Objects created by the master are never collected in the workers, so the
+    # garbage collector does not write to (and copy) the pages holding them
+    gc.freeze()
+
+
+def when_ready(server):
+    # Modules the service imports on first use are imported once, in the master
+    import plotly.express  # noqa: F401
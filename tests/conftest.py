@@ -0,0 +1,69 @@
+import contextlib
+import io
+import os
+
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic_courses import write_courses_csv, write_courses_text_csv
+from dashboard.service.udemy_stats.courses_stats import Courses
+
+# Synthetic courses shared by the tests, small enough to load in a fraction of a second
+NUM_COURSES = 5000
+SEED = 7
+
+# Courses with a text, enough for several LSH buckets and few enough to compare with a scan
+NUM_TEXTS = 1000
+
+
+@pytest.fixture(scope="session")
+def courses_csv(tmp_path_factory):
+    return write_courses_csv(str(tmp_path_factory.mktemp("courses") / "courses.csv"), NUM_COURSES, seed=SEED)
+
+
+@pytest.fixture(scope="session")
+def courses(courses_csv):
+    # Loaded once, the tests only read it through views
+    return Courses(courses_csv)
+
+
+@pytest.fixture(scope="session")
+def courses_parquet(courses_csv, tmp_path_factory):
+    # Same courses as a parquet dataset, skipped without the optional pyarrow
+    pytest.importorskip("pyarrow")
+    from transformation.columnar import write_courses_parquet
+
+    return write_courses_parquet(
+        pd.read_csv(courses_csv), str(tmp_path_factory.mktemp("courses") / "courses.parquet")
+    )
+
+
+@pytest.fixture(scope="session")
+def service(courses_csv, tmp_path_factory):
+    # The service loads its dataset when imported, here the synthetic courses without texts
+    folder = tmp_path_factory.mktemp("service")
+    os.environ.update({
+        "COURSES_CSV_PATH": courses_csv,
+        "COURSES_SNAPSHOT_PATH": str(folder / "courses_snapshot"),
+        "COURSES_TEXT_CSV_PATH": str(folder / "courses_text_data.csv"),
+        "COURSES_TEXT_SNAPSHOT_PATH": str(folder / "courses_text_snapshot"),
+    })
+    with contextlib.redirect_stdout(io.StringIO()):
+        from dashboard.service import main
+    return main
+
+
+@pytest.fixture(scope="session")
+def texts_csv(courses_csv, tmp_path_factory):
+    courses = pd.read_csv(courses_csv, nrows=NUM_TEXTS)
+    return write_courses_text_csv(str(tmp_path_factory.mktemp("texts") / "courses_text_data.csv"), courses)
+
+
+@pytest.fixture(scope="session")
+def course_texts(texts_csv):
+    # Building the similarity index needs the optional scikit-learn
+    pytest.importorskip("sklearn")
+    from dashboard.service.udemy_stats.course_texts import CourseTexts
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        return CourseTexts(texts_csv)
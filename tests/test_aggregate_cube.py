@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from dashboard.service.udemy_stats.aggregate_cube import SKETCH_RELATIVE_ACCURACY, AggregateCube
+
+
+def test_rollup_matches_a_groupby(courses):
+    df = courses.df
+    rollup = courses.cube.rollup(group_by=["subcategory"]).set_index("subcategory")
+    expected = df.groupby("subcategory", observed=True)["rating"].agg(["count", "sum", "mean", "std", "min", "max"])
+
+    assert rollup["courses"].to_dict() == df["subcategory"].value_counts().to_dict()
+    for stat in expected.columns:
+        assert rollup[f"rating_{stat}"].to_numpy() == pytest.approx(expected.loc[rollup.index, stat].to_numpy())
+
+
+def test_rollup_medians_are_within_the_sketch_accuracy(courses):
+    df = courses.df
+    rollup = courses.cube.rollup(group_by=["subcategory"], measures=["num_subscribers"]).set_index("subcategory")
+    medians = df.groupby("subcategory", observed=True)["num_subscribers"].median()
+
+    assert rollup["num_subscribers_median"].to_numpy() == pytest.approx(
+        medians.loc[rollup.index].to_numpy(), rel=2 * SKETCH_RELATIVE_ACCURACY, abs=1
+    )
+
+
+def test_rollup_filters_cells(courses):
+    df = courses.df
+    filters = {"subcategory": ["Data Science", "Web Development"], "created_year": [2016, 2017]}
+    totals = courses.cube.rollup(filters=filters)
+    selected = df[df["subcategory"].isin(filters["subcategory"]) & df["created_year"].isin(filters["created_year"])]
+
+    assert totals["courses"].iloc[0] == len(selected)
+    assert totals["price_sum"].iloc[0] == pytest.approx(selected["price"].sum())
+    assert len(courses.cube.rollup(filters={"subcategory": ["Cooking"]})) == 0
+
+
+def test_rollup_only_computes_the_requested_measures(courses):
+    totals = courses.cube.rollup(measures=["rating"], medians=False)
+    assert list(totals.columns) == [
+        "courses", "rating_count", "rating_sum", "rating_mean", "rating_std", "rating_min", "rating_max"
+    ]
+
+    with pytest.raises(ValueError):
+        courses.cube.rollup(measures=["title"])
+    with pytest.raises(ValueError):
+        courses.cube.rollup(group_by=["locale"])
+
+
+def test_parse_filters(courses):
+    filters = courses.cube.parse_filters(["subcategory:Data Science|Web Development", "created_year:2019"])
+    assert filters == {"subcategory": ["Data Science", "Web Development"], "created_year": [2019]}
+
+    with pytest.raises(ValueError):
+        courses.cube.parse_filters(["locale:English (US)"])
+
+
+def test_updated_cube_matches_a_rebuilt_one(courses):
+    df = courses.df
+    changed = df.assign(num_subscribers=np.where(
+        df["subcategory"] == "Data Science", df["num_subscribers"] + 1, df["num_subscribers"]
+    ))
+
+    updated = courses.cube.updated(changed, ["Data Science"])
+    rebuilt = AggregateCube.from_dataframe(changed)
+
+    group_by = ["subcategory", "created_year"]
+    assert updated.rollup(group_by=group_by).equals(rebuilt.rollup(group_by=group_by))
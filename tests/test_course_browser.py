@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from dashboard.service.udemy_stats.course_browser import SORT_ORDERS, SortOrders, sort_values
+
+
+def all_pages(courses, sort, limit):
+    # udemy_id of every course, following the cursors from the first page
+    ids, after = [], None
+    while True:
+        rows, after = courses.browse(sort, after=after, limit=limit)
+        ids.append(rows)
+        if after is None:
+            return ids
+
+
+@pytest.mark.parametrize("sort", SORT_ORDERS)
+def test_order_is_by_value_then_udemy_id(courses, sort):
+    sort_orders = courses.sort_orders
+    values = sort_values(courses.df, sort)[sort_orders.rows[sort]]
+    ids = courses.df["udemy_id"].to_numpy()[sort_orders.rows[sort]]
+
+    assert (np.diff(values) <= 0).all()
+    ties = np.diff(values) == 0
+    assert (np.diff(ids)[ties] > 0).all()
+    assert np.array_equal(sort_orders.ranks[sort][sort_orders.rows[sort]], np.arange(len(courses.df)))
+
+
+@pytest.mark.parametrize("sort", SORT_ORDERS)
+def test_pages_cover_every_course_once(courses, sort):
+    sort_orders = courses.sort_orders
+    rows, after, seen = [], None, 0
+    while True:
+        page, after = sort_orders.page(sort, after, limit=700)
+        rows.extend(page.tolist())
+        seen += 1
+        if after is None:
+            break
+
+    assert rows == sort_orders.rows[sort].tolist()
+    assert seen == -(-len(courses.df) // 700)
+
+
+def test_cursor_survives_a_reload(courses):
+    # The cursor is the value and udemy_id of the last course, not a position
+    sort_orders = courses.sort_orders
+    _, after = sort_orders.page("subscribers", limit=100)
+
+    reversed_df = courses.df.iloc[::-1].reset_index(drop=True)
+    reloaded = SortOrders.from_dataframe(reversed_df)
+    page, _ = reloaded.page("subscribers", after, limit=10)
+    expected, _ = sort_orders.page("subscribers", limit=110)
+
+    assert reversed_df["udemy_id"].to_numpy()[page].tolist() == (
+        courses.df["udemy_id"].to_numpy()[expected[100:]].tolist()
+    )
+
+
+def test_filtered_view_pages(courses):
+    subcategory = courses.df["subcategory"].iloc[0]
+    view = courses.filter_by_subcategories([subcategory])
+
+    titles = [row[0] for page in all_pages(view, "rating", limit=50) for row in page]
+    expected = courses.df.iloc[courses.sort_orders.rows["rating"]]
+    expected = expected[expected["subcategory"] == subcategory]["title"].astype(str).tolist()
+    assert titles == expected
+
+
+def test_invalid_cursor_and_sort(courses):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        courses.browse("subscribers", after="many_courses")
+    with pytest.raises(ValueError, match="Unknown sort order"):
+        courses.browse("title")
+
+
+def test_snapshot_round_trip(courses):
+    restored = SortOrders.from_snapshot(*courses.sort_orders.to_snapshot())
+    _, after = courses.sort_orders.page("created", limit=25)
+    assert restored.page("created", after)[0].tolist() == courses.sort_orders.page("created", after)[0].tolist()
@@ -0,0 +1,114 @@
+from ast import literal_eval
+
+import numpy as np
+import pytest
+
+
+def scan_summary(courses):
+    # Summary computed from the rows of the view, the reference for the cube
+    df = courses.df
+    return {
+        "num_courses": len(df),
+        "avg_rate": round(df["rating"].mean(), 2),
+        "total_subscribers": int(df["num_subscribers"].sum()),
+        "instructors": len({name for names in df["instructors"] for name in literal_eval(names)}),
+    }
+
+
+def assert_same_summary(summary, expected):
+    assert summary["num_courses"] == expected["num_courses"]
+    assert summary["total_subscribers"] == expected["total_subscribers"]
+    assert summary["instructors"] == expected["instructors"]
+    if np.isnan(expected["avg_rate"]):
+        assert np.isnan(summary["avg_rate"])
+    else:
+        assert summary["avg_rate"] == pytest.approx(expected["avg_rate"], abs=0.01)
+
+
+# Views answered by the cube, and views its dimensions cannot express
+CUBE_VIEWS = {
+    "root": lambda courses: courses,
+    "one subcategory": lambda courses: courses.filter_by(subcategory=["Data Science"]),
+    "subcategories": lambda courses: courses.filter_by(subcategory=["Data Science", "Web Development"]),
+    "years": lambda courses: courses.filter_by(created_year=(2015, 2018)),
+    "subcategory and years": lambda courses: courses.filter_by(subcategory=["Data Science"], created_year=(2020, None)),
+    "unknown subcategory": lambda courses: courses.filter_by(subcategory=["Cooking"]),
+    "subcategories then one": lambda courses: (
+        courses.filter_by(subcategory=["Data Science", "Web Development"]).filter_by_subcategories(["Data Science"])
+    ),
+    "subcategory then years": lambda courses: courses.filter_by(subcategory=["Data Science"]).filter_by(
+        created_year=(None, 2016)
+    ),
+    "disjoint subcategories": lambda courses: (
+        courses.filter_by(subcategory=["Data Science"]).filter_by_subcategories(["Web Development"])
+    ),
+}
+SCAN_VIEWS = {
+    "price": lambda courses: courses.filter_by(price=(None, 20.0)),
+    "empty rating range": lambda courses: courses.filter_by(rating=(5, 4)),
+    "subcategory and locale": lambda courses: courses.filter_by(subcategory=["Data Science"], locale=["English (US)"]),
+    "labels": lambda courses: courses.filter_by_labels(["Label 1", "Label 2"]),
+    "instructors": lambda courses: courses.filter_by_instructors(["Instructor 1"]),
+    "rows": lambda courses: courses.filter_by_rows(np.arange(0, 5000, 7)),
+    "price then subcategory": lambda courses: (
+        courses.filter_by(price=(None, 20.0)).filter_by_subcategories(["Data Science"])
+    ),
+    "labels then subcategory": lambda courses: courses.filter_by_labels(["Label 1"]).filter_by(
+        subcategory=["Data Science", "Web Development"]
+    ),
+    "subcategory then locale": lambda courses: courses.filter_by(subcategory=["Data Science"]).filter_by(
+        locale=["English (US)"]
+    ),
+    "years then hours": lambda courses: courses.filter_by(created_year=(2015, None)).filter_by(
+        content_length_hours=(2.0, 10.0)
+    ),
+}
+
+
+@pytest.mark.parametrize("view", CUBE_VIEWS.values(), ids=CUBE_VIEWS.keys())
+def test_cube_summary_matches_row_scan(courses, view):
+    filtered = view(courses)
+    assert filtered.cube_filters is not None
+    assert_same_summary(filtered.summarize(), scan_summary(filtered))
+
+
+@pytest.mark.parametrize("view", SCAN_VIEWS.values(), ids=SCAN_VIEWS.keys())
+def test_views_outside_the_cube_scan_their_rows(courses, view):
+    filtered = view(courses)
+    assert filtered.cube_filters is None
+    assert_same_summary(filtered.summarize(), scan_summary(filtered))
+
+
+def test_filtered_view_does_not_report_the_catalogue(courses):
+    cheap = courses.filter_by(price=(None, 20.0))
+    assert 0 < cheap.summarize()["num_courses"] < len(courses.df)
+    assert courses.filter_by(rating=(5, 4)).summarize()["num_courses"] == 0
+
+
+def test_filter_by_matches_a_mask(courses):
+    df = courses.df
+    filtered = courses.filter_by(
+        subcategory=["Data Science", "Mobile Development"],
+        locale=["English (US)", "Spanish (Spain)"],
+        price=(20.0, 100.0),
+        rating=(4.0, None),
+        created_year=(2014, 2020),
+    )
+    mask = (
+        df["subcategory"].isin(["Data Science", "Mobile Development"])
+        & df["locale"].isin(["English (US)", "Spanish (Spain)"])
+        & df["price"].between(20.0, 100.0)
+        & (df["rating"] >= 4.0)
+        & df["created_year"].between(2014, 2020)
+    )
+    assert np.array_equal(filtered.positions(), np.flatnonzero(mask.to_numpy()))
+
+
+def test_chained_filters_intersect(courses):
+    chained = courses.filter_by(subcategory=["Data Science"]).filter_by(price=(None, 50.0))
+    at_once = courses.filter_by(subcategory=["Data Science"], price=(None, 50.0))
+    assert np.array_equal(chained.positions(), at_once.positions())
+
+    labelled = courses.filter_by_labels(["Label 3"])
+    names = courses.df["labels"].map(lambda labels: "Label 3" in literal_eval(labels))
+    assert np.array_equal(labelled.positions(), np.flatnonzero(names.to_numpy()))
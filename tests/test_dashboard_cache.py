@@ -0,0 +1,66 @@
+import threading
+import time
+
+import pytest
+
+from dashboard.service.dashboard_cache import DashboardCache
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = DashboardCache(max_entries=2)
+    cache.put(("v1", ()), "all")
+    cache.put(("v1", ("Data Science",)), "data science")
+    assert cache.get(("v1", ())) == "all"  # Now the most recently used
+
+    cache.put(("v1", ("Web Development",)), "web")
+    assert ("v1", ("Data Science",)) not in cache
+    assert [key for key, _ in cache.items()] == [("v1", ()), ("v1", ("Web Development",))]
+    assert cache.stats() == {"entries": 2, "max_entries": 2, "hits": 1, "misses": 0, "evictions": 1}
+
+
+def test_keys_of_another_version_miss():
+    cache = DashboardCache()
+    cache.put(("v1", ()), "all")
+    assert cache.get(("v2", ())) is None
+    assert cache.get(("v1", ())) == "all"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    cache.discard(("v1", ()))
+    assert len(cache) == 0
+
+
+def test_values_are_computed_once():
+    cache = DashboardCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return "dashboard"
+
+    values = []
+    threads = [
+        threading.Thread(target=lambda: values.append(cache.get_or_compute(("v1", ()), compute)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert values == ["dashboard"] * 8
+    assert len(calls) == 1
+    assert cache._key_locks == {}
+
+
+def test_failed_computations_release_their_key():
+    cache = DashboardCache()
+
+    def compute():
+        raise RuntimeError("Building the dashboard failed")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute(("v1", ()), compute)
+    assert ("v1", ()) not in cache
+    assert cache._key_locks == {}
+    assert cache.get_or_compute(("v1", ()), lambda: "dashboard") == "dashboard"
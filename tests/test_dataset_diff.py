@@ -0,0 +1,87 @@
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.service.udemy_stats.courses_stats import Courses
+from dashboard.service.udemy_stats.dataset_diff import diff_courses, previous_rows
+
+
+@pytest.fixture(scope="module")
+def reloaded(courses_csv, tmp_path_factory):
+    # A new version of the csv with one course added, one removed and one changed
+    df = pd.read_csv(courses_csv)
+    removed, changed = df.loc[10], df.loc[20]
+    added = df.loc[30].copy()
+    added["udemy_id"] = df["udemy_id"].max() + 1
+    added["subcategory"] = removed["subcategory"]
+
+    df.loc[20, "rating"] = 1.0 if changed["rating"] != 1.0 else 2.0
+    df = pd.concat([df.drop(index=10), added.to_frame().T], ignore_index=True)
+
+    csv_file_path = str(tmp_path_factory.mktemp("reloaded") / "courses.csv")
+    df.to_csv(csv_file_path, index=False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        courses = Courses(csv_file_path)
+    return courses, added, removed, changed, csv_file_path
+
+
+def test_diff_finds_every_change(courses, reloaded):
+    new, added, removed, changed, _ = reloaded
+    diff = diff_courses(courses.df, new.df)
+
+    assert diff.added.tolist() == [added["udemy_id"]]
+    assert diff.removed.tolist() == [removed["udemy_id"]]
+    assert diff.changed.tolist() == [changed["udemy_id"]]
+    assert diff.affected_subcategories == {removed["subcategory"], changed["subcategory"]}
+    assert diff.affects([changed["subcategory"]])
+    assert not diff.complete and not diff.is_empty()
+
+
+def test_same_courses_have_no_diff(courses):
+    diff = diff_courses(courses.df, courses.df.iloc[::-1].reset_index(drop=True))
+    assert diff.is_empty()
+    assert diff.affected_subcategories == set()
+
+
+def test_other_columns_give_a_complete_diff(courses):
+    diff = diff_courses(courses.df, courses.df.drop(columns=["rating"]))
+    assert diff.complete and not diff.is_empty()
+    assert diff.affected_subcategories == set(courses.df["subcategory"].unique())
+    assert (previous_rows(courses.df, courses.df, diff) == -1).all()
+
+
+def test_previous_rows(courses, reloaded):
+    new, added, _, changed, _ = reloaded
+    diff = diff_courses(courses.df, new.df)
+    rows = previous_rows(courses.df, new.df, diff)
+
+    new_ids, old_ids = new.df["udemy_id"].to_numpy(), courses.df["udemy_id"].to_numpy()
+    reused = rows >= 0
+    assert (old_ids[rows[reused]] == new_ids[reused]).all()
+    assert set(new_ids[~reused]) == {added["udemy_id"], changed["udemy_id"]}
+
+
+def test_reused_indexes_match_rebuilt_ones(courses, reloaded):
+    csv_file_path = reloaded[-1]
+    for name in ["instructor_index", "label_index", "cube"]:
+        getattr(courses, name)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        new, rebuilt = Courses(csv_file_path), Courses(csv_file_path)
+    new.reuse_indexes(courses, diff_courses(courses.df, new.df))
+    assert {"instructor_index", "label_index", "cube"} <= set(new.__dict__)
+
+    for name in ["instructor_index", "label_index"]:
+        index, fresh = getattr(new, name), getattr(rebuilt, name)
+        assert index.names.tolist() == fresh.names.tolist()
+        assert np.array_equal(index.row_offsets, fresh.row_offsets)
+        assert np.array_equal(index.row_codes, fresh.row_codes)
+
+    assert new.summarize() == rebuilt.summarize()
+    subcategory = new.df["subcategory"].iloc[0]
+    assert new.filter_by_subcategories([subcategory]).summarize() == (
+        rebuilt.filter_by_subcategories([subcategory]).summarize()
+    )
@@ -0,0 +1,18 @@
+from dashboard.service.http_cache import accepted_encodings, etag_matches, page_etag
+
+
+def test_etags_change_with_the_dataset_and_the_key():
+    etag = page_etag("v1", "templates", ("dashboard", ("Data Science",)))
+    assert etag == page_etag("v1", "templates", ("dashboard", ("Data Science",)))
+    assert etag != page_etag("v2", "templates", ("dashboard", ("Data Science",)))
+    assert etag != page_etag("v1", "templates", ("dashboard", ()))
+
+    assert etag_matches(f'"other", {etag}', etag)
+    assert etag_matches(etag.removeprefix("W/"), etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+
+
+def test_accepted_encodings():
+    assert accepted_encodings("gzip, br;q=0.5, deflate;q=0") == {"gzip", "br"}
+    assert accepted_encodings(None) == set()
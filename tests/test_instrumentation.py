@@ -0,0 +1,40 @@
+import numpy as np
+
+from dashboard.service.instrumentation import CallbackMetric, Counter, Histogram, render_metrics, server_timing_header
+
+
+def test_counters_are_rendered_in_full():
+    counter = Counter("response_bytes_total", "Bytes sent", label_names=["route"])
+    counter.inc(12345678, route="/dashboard")
+    counter.inc(1, route="/dashboard")
+
+    assert 'response_bytes_total{route="/dashboard"} 12345679\n' in render_metrics([counter])
+
+
+def test_floats_keep_every_digit():
+    histogram = Histogram("duration_seconds", "Durations", buckets=[0.1, 1])
+    for seconds in [0.05, 0.5, 0.123456789, 2]:
+        histogram.observe(seconds)
+
+    lines = render_metrics([histogram]).splitlines()
+    assert lines[:2] == ["# HELP duration_seconds Durations", "# TYPE duration_seconds histogram"]
+    assert lines[2:] == [
+        'duration_seconds_bucket{le="0.1"} 1',
+        'duration_seconds_bucket{le="1"} 3',
+        'duration_seconds_bucket{le="+Inf"} 4',
+        f"duration_seconds_sum {repr(0.05 + 0.5 + 0.123456789 + 2)}",
+        "duration_seconds_count 4",
+    ]
+
+
+def test_callback_values_and_label_escaping():
+    metric = CallbackMetric(
+        "cache_entries", "Entries", "gauge", lambda: [({"cache": 'page "html"\n'}, np.int64(3)), ({}, 0.5)]
+    )
+    lines = render_metrics([metric]).splitlines()
+    assert lines[2:] == ['cache_entries{cache="page \\"html\\"\\n"} 3', "cache_entries 0.5"]
+
+
+def test_server_timing_sums_spans_of_the_same_name():
+    header = server_timing_header([("filter", 0.002), ("figure_to_json", 0.01), ("figure_to_json", 0.005)])
+    assert header == 'filter;dur=2.0, figure_to_json;dur=15.0;desc="2 calls"'
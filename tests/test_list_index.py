@@ -0,0 +1,64 @@
+from ast import literal_eval
+
+import numpy as np
+import pandas as pd
+
+from dashboard.service.udemy_stats.list_index import ListColumnIndex, parse_lists
+
+# Lists of names as written in the csv
+LISTS = pd.Series(["['Ann', 'Bob']", "[]", "['Bob']", "['Cid', 'Ann', 'Bob']"])
+
+
+def test_parse_lists():
+    lengths, flat_names = parse_lists(LISTS, empty_name="Nobody")
+    assert lengths.tolist() == [2, 1, 1, 3]
+    assert list(flat_names) == ["Ann", "Bob", "Nobody", "Bob", "Cid", "Ann", "Bob"]
+
+
+def test_list_index_lookups():
+    index = ListColumnIndex.from_column(LISTS)
+    assert index.names.tolist() == ["Ann", "Bob", "Cid"]
+    assert index.rows_with(["Ann"]).tolist() == [0, 3]
+    assert index.rows_with(["Cid", "Bob"]).tolist() == [0, 2, 3]
+    assert index.rows_with(["Nobody"]).tolist() == []
+    assert index.count_names() == 3
+    assert index.count_names(np.array([0, 2])) == 2
+
+
+def test_list_index_aggregate_matches_explode():
+    index = ListColumnIndex.from_column(LISTS)
+    values = np.array([10.0, 20.0, 30.0, 40.0])
+    rows = np.array([0, 2, 3])
+
+    exploded = pd.DataFrame({"name": LISTS.map(literal_eval), "value": values}).iloc[rows].explode("name")
+    expected = exploded.groupby("name")["value"].agg(["min", "max", "mean", "median", "sum", "count"])
+
+    aggregated = index.aggregate(values, rows)
+    pd.testing.assert_frame_equal(aggregated, expected, check_names=False, check_dtype=False)
+
+
+def test_list_index_of_the_courses(courses):
+    index = courses.label_index
+    exploded = courses.df["labels"].reset_index(drop=True).map(literal_eval).explode()
+    for name in index.names[:5]:
+        expected = np.flatnonzero((exploded == name).groupby(level=0).any().to_numpy())
+        assert index.rows_with([name]).tolist() == expected.tolist()
+
+
+def test_reindexed_only_parses_changed_courses():
+    index = ListColumnIndex.from_column(LISTS)
+    column = pd.Series(["['Bob']", "['Dee']", "['Ann', 'Bob']"])
+    previous_rows = np.array([2, -1, 0])
+
+    reindexed = index.reindexed(column, previous_rows)
+    fresh = ListColumnIndex.from_column(column)
+    assert reindexed.names.tolist() == fresh.names.tolist()
+    assert reindexed.row_codes.tolist() == fresh.row_codes.tolist()
+    assert reindexed.row_offsets.tolist() == fresh.row_offsets.tolist()
+
+
+def test_list_index_snapshot_round_trip():
+    index = ListColumnIndex.from_column(LISTS, empty_name="Nobody")
+    restored = ListColumnIndex.from_snapshot(*index.to_snapshot())
+    assert restored.names.tolist() == index.names.tolist()
+    assert restored.rows_with(["Nobody", "Cid"]).tolist() == [1, 3]
@@ -0,0 +1,106 @@
+import contextlib
+import io
+
+import pandas as pd
+import pytest
+
+from dashboard.service.udemy_stats import courses_stats
+from dashboard.service.udemy_stats.courses_stats import Courses, file_version
+from dashboard.service.udemy_stats.dataset_diff import diff_courses
+from dashboard.service.udemy_stats.list_index import is_list_column, list_names, parse_lists
+
+# Names of a list column, as arrow lists
+NAMES = [["Ann", "Bob"], [], ["Bob"], ["Cid", "Ann", "Bob"]]
+
+
+@pytest.fixture(scope="module")
+def parquet_courses(courses_parquet):
+    return Courses(courses_parquet)
+
+
+def names_per_course(courses, index_name):
+    # (udemy_id, name) of every name of every course, whatever the row order
+    index = getattr(courses, index_name)
+    codes, rows = index.codes_of()
+    return sorted(zip(courses.df["udemy_id"].to_numpy()[rows].tolist(), index.names[codes].tolist()))
+
+
+def test_list_columns_stay_arrow_lists(parquet_courses, courses):
+    assert is_list_column(parquet_courses.df["instructors"])
+    assert is_list_column(parquet_courses.df["labels"])
+    assert list(parquet_courses.df.columns) == list(courses.df.columns)
+
+
+@pytest.mark.parametrize("index_name", ["instructor_index", "label_index"])
+def test_list_indexes_match_the_csv(parquet_courses, courses, index_name):
+    assert names_per_course(parquet_courses, index_name) == names_per_course(courses, index_name)
+
+
+def test_summaries_match_the_csv(parquet_courses, courses):
+    assert parquet_courses.summarize() == courses.summarize()
+
+    predicates = {"subcategory": ["Data Science"], "price": (None, 50.0)}
+    from_parquet, from_csv = parquet_courses.filter_by(**predicates), courses.filter_by(**predicates)
+    assert from_parquet.summarize() == from_csv.summarize()
+    assert from_parquet.labels_summary().equals(from_csv.labels_summary())
+    assert from_parquet.instructors_summary().equals(from_csv.instructors_summary())
+
+
+def test_exploded_lists_match_the_csv(parquet_courses, courses):
+    labels = courses_stats.labels_summary_from(parquet_courses.df)
+    assert labels.to_numpy().tolist() == courses_stats.labels_summary_from(courses.df).to_numpy().tolist()
+
+    instructors = courses_stats.instructors_summary_from(parquet_courses.df)
+    assert instructors.to_numpy().tolist() == courses_stats.instructors_summary_from(courses.df).to_numpy().tolist()
+
+
+def test_snapshot_keeps_the_lists(parquet_courses, tmp_path):
+    snapshot_path = str(tmp_path / "snapshot")
+    with contextlib.redirect_stdout(io.StringIO()):
+        parquet_courses.save_snapshot(snapshot_path)
+        snapshot = Courses.from_snapshot(snapshot_path)
+
+    assert is_list_column(snapshot.df["labels"])
+    assert snapshot.df["labels"].list.flatten().tolist() == parquet_courses.df["labels"].list.flatten().tolist()
+    assert diff_courses(snapshot.df, parquet_courses.df).is_empty()
+
+
+def test_diff_finds_changed_lists(parquet_courses, courses_csv, tmp_path):
+    from transformation.columnar import write_courses_parquet
+
+    df = pd.read_csv(courses_csv)
+    df.loc[5, "labels"] = "['Label 1', 'New label']"
+    with contextlib.redirect_stdout(io.StringIO()):
+        changed = Courses(write_courses_parquet(df, str(tmp_path / "changed.parquet")))
+
+    diff = diff_courses(parquet_courses.df, changed.df)
+    assert diff.changed.tolist() == [df.loc[5, "udemy_id"]]
+    assert diff.affected_subcategories == {df.loc[5, "subcategory"]}
+
+    # Only the changed course has its labels indexed again
+    parquet_courses.label_index
+    changed.reuse_indexes(parquet_courses, diff)
+    assert "label_index" in changed.__dict__
+    rebuilt = courses_stats.ListColumnIndex.from_column(changed.df["labels"], empty_name="No Label")
+    assert changed.label_index.names.tolist() == rebuilt.names.tolist()
+    assert changed.label_index.row_codes.tolist() == rebuilt.row_codes.tolist()
+
+
+def test_arrow_lists_give_the_same_names():
+    pa = pytest.importorskip("pyarrow")
+    column = pd.Series(NAMES, dtype=pd.ArrowDtype(pa.list_(pa.string())))
+
+    lengths, flat_names = list_names(column, empty_name="Nobody")
+    expected_lengths, expected_names = parse_lists(pd.Series([str(names) for names in NAMES]), empty_name="Nobody")
+    assert lengths.tolist() == expected_lengths.tolist()
+    assert list(flat_names) == list(expected_names)
+
+
+def test_dataset_version_follows_every_file(tmp_path):
+    dataset_path = tmp_path / "courses.parquet"
+    (dataset_path / "subcategory=Go").mkdir(parents=True)
+    (dataset_path / "subcategory=Go" / "part-0.parquet").write_bytes(b"courses")
+    version = file_version(str(dataset_path))
+
+    (dataset_path / "subcategory=Go" / "part-0.parquet").write_bytes(b"other courses")
+    assert file_version(str(dataset_path)) != version
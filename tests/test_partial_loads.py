@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from dashboard.service.udemy_stats.courses_stats import REQUIRED_COLUMNS, Courses
+
+SUBCATEGORY = "Data Science"
+
+
+@pytest.fixture(params=["csv", "parquet"])
+def dataset_path(request):
+    return request.getfixturevalue(f"courses_{request.param}")
+
+
+@pytest.mark.parametrize("columns", [["rating"], ["rating", "instructors"], []])
+def test_partial_load_can_be_summarized(courses, dataset_path, columns):
+    partial = Courses(dataset_path, columns=columns, subcategories=[SUBCATEGORY])
+    assert set(REQUIRED_COLUMNS) <= set(partial.df.columns)
+
+    expected = courses.filter_by(subcategory=[SUBCATEGORY]).summarize()
+    for view in [partial, partial.filter_by(price=(None, 1000.0))]:
+        summary = view.summarize()
+        assert summary["num_courses"] == expected["num_courses"]
+        assert summary["total_subscribers"] == expected["total_subscribers"]
+        if "rating" in columns:
+            assert summary["avg_rate"] == pytest.approx(expected["avg_rate"])
+        else:
+            assert np.isnan(summary["avg_rate"])
+        assert summary["instructors"] == (expected["instructors"] if "instructors" in columns else None)
+
+
+def test_partial_load_filters_by_year(courses, dataset_path):
+    partial = Courses(dataset_path, columns=["rating"], subcategories=[SUBCATEGORY])
+    recent = partial.filter_by(created_year=(2020, None))
+    expected = courses.filter_by(subcategory=[SUBCATEGORY], created_year=(2020, None))
+
+    assert recent.cube_filters is not None
+    assert recent.summarize()["num_courses"] == len(expected.df)
+    assert sorted(recent.df["udemy_id"]) == sorted(expected.df["udemy_id"])
+
+
+def test_partial_load_is_another_version(courses, dataset_path):
+    partial = Courses(dataset_path, columns=["rating"])
+    assert partial.version != Courses(dataset_path).version
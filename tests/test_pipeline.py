@@ -0,0 +1,108 @@
+import contextlib
+import io
+import os
+
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic_courses import generate_courses, write_raw_courses_json
+from transformation.pipeline import run_pipeline
+from transformation.raw_courses import (
+    NUMERICAL_CATEGORICAL_COLUMNS,
+    iter_batches,
+    iter_courses,
+    numerical_categorical_batch,
+    textual_batch,
+    write_csv,
+)
+
+# More than one batch, so the csv files are appended to
+NUM_RAW_COURSES = 2500
+DATASETS = {
+    "courses_numerical_categorical_data": numerical_categorical_batch,
+    "courses_text_data": textual_batch,
+}
+
+
+@pytest.fixture(scope="module")
+def raw_json(tmp_path_factory):
+    return write_raw_courses_json(str(tmp_path_factory.mktemp("raw") / "courses_udemy_raw.json"), NUM_RAW_COURSES)
+
+
+@pytest.fixture(scope="module")
+def pipeline_output(raw_json, tmp_path_factory):
+    output_folder_path = str(tmp_path_factory.mktemp("pipeline"))
+    with contextlib.redirect_stdout(io.StringIO()):
+        _, num_rows = run_pipeline(raw_json, output_folder_path, workers=0, parquet=False)
+    assert num_rows == NUM_RAW_COURSES
+    return output_folder_path
+
+
+def read_file(path):
+    with open(path, encoding="utf-8") as csv_file:
+        return csv_file.read()
+
+
+@pytest.mark.parametrize("csv_name", DATASETS)
+def test_pipeline_writes_what_the_scripts_write(raw_json, pipeline_output, tmp_path, csv_name):
+    # The transformation scripts flatten and write one dataset each
+    flatten = DATASETS[csv_name]
+    write_csv(
+        (flatten(courses) for courses in iter_batches(iter_courses(raw_json))),
+        str(tmp_path / (csv_name + ".csv")),
+        str(tmp_path / (csv_name + "_sample.csv")),
+    )
+
+    for suffix in [".csv", "_sample.csv"]:
+        assert read_file(os.path.join(pipeline_output, csv_name + suffix)) == read_file(
+            str(tmp_path / (csv_name + suffix))
+        )
+    assert not any(name.endswith(".partial") for name in os.listdir(pipeline_output))
+
+
+def test_courses_are_flattened(pipeline_output):
+    df = pd.read_csv(os.path.join(pipeline_output, "courses_numerical_categorical_data.csv"))
+    courses = generate_courses(NUM_RAW_COURSES)
+
+    assert list(df.columns) == NUMERICAL_CATEGORICAL_COLUMNS
+    assert df["udemy_id"].tolist() == courses["udemy_id"].tolist()
+    assert df["num_subscribers"].tolist() == courses["num_subscribers"].tolist()
+    assert df["subcategory"].tolist() == courses["subcategory"].tolist()
+    assert df["instructors"].tolist() == courses["instructors"].tolist()
+    assert df["labels"].tolist() == courses["labels"].tolist()
+
+
+def test_samples_hold_the_same_courses(pipeline_output):
+    ids = {
+        csv_name: pd.read_csv(os.path.join(pipeline_output, csv_name + "_sample.csv"))["udemy_id"].tolist()
+        for csv_name in DATASETS
+    }
+    assert ids["courses_numerical_categorical_data"] == ids["courses_text_data"]
+    assert 0.05 * NUM_RAW_COURSES < len(ids["courses_text_data"]) < 0.15 * NUM_RAW_COURSES
+
+
+def test_json_lines_give_the_same_csv(raw_json, pipeline_output, tmp_path):
+    ndjson = write_raw_courses_json(str(tmp_path / "courses_udemy_raw.jsonl"), NUM_RAW_COURSES, ndjson=True)
+    output_folder_path = str(tmp_path / "output")
+    os.mkdir(output_folder_path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_pipeline(ndjson, output_folder_path, workers=0, parquet=False)
+
+    for csv_name in DATASETS:
+        assert read_file(os.path.join(output_folder_path, csv_name + ".csv")) == read_file(
+            os.path.join(pipeline_output, csv_name + ".csv")
+        )
+
+
+def test_parquet_holds_the_csv_courses(raw_json, tmp_path):
+    pytest.importorskip("pyarrow")
+    from dashboard.service.udemy_stats.courses_stats import Courses
+
+    output_folder_path = str(tmp_path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_pipeline(raw_json, output_folder_path, workers=0, parquet=True)
+        from_csv = Courses(os.path.join(output_folder_path, "courses_numerical_categorical_data.csv"))
+        from_parquet = Courses(os.path.join(output_folder_path, "courses_numerical_categorical_data.parquet"))
+
+    assert from_parquet.summarize() == from_csv.summarize()
+    assert sorted(from_parquet.df["udemy_id"]) == sorted(from_csv.df["udemy_id"])
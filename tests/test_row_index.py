@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from dashboard.service.udemy_stats.row_index import RowIndex, parse_range
+
+
+@pytest.fixture(scope="module")
+def row_index(courses):
+    return RowIndex.from_dataframe(courses.df)
+
+
+def test_row_index_query_matches_a_mask(courses, row_index):
+    df = courses.df
+    subcategories = list(df["subcategory"].unique()[:2])
+    predicates = {"subcategory": subcategories, "price": (20.0, 100.0), "created_year": (2016.0, None)}
+
+    mask = (
+        df["subcategory"].isin(subcategories)
+        & df["price"].between(20.0, 100.0)
+        & (df["created_year"] >= 2016)
+    )
+    assert row_index.query(predicates).tolist() == np.flatnonzero(mask.to_numpy()).tolist()
+
+
+def test_row_index_edge_cases(courses, row_index):
+    assert row_index.query({}).tolist() == list(range(len(courses.df)))
+    assert len(row_index.query({"subcategory": ["No such subcategory"]})) == 0
+    with pytest.raises(ValueError):
+        row_index.query({"price": ["Data Science"]})
+    with pytest.raises(ValueError):
+        row_index.query({"title": ["Python"]})
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("10..50", (10.0, 50.0)),
+    ("..50", (None, 50.0)),
+    ("10..", (10.0, None)),
+    ("2020", (2020.0, 2020.0)),
+])
+def test_parse_range(text, expected):
+    assert parse_range(text) == expected
+
+
+def test_parse_range_rejects_text():
+    with pytest.raises(ValueError, match="Invalid range"):
+        parse_range("cheap..expensive")
+
+
+def test_row_index_snapshot_round_trip(row_index):
+    restored = RowIndex.from_snapshot(*row_index.to_snapshot())
+    predicates = {"locale": ["English (US)"], "rating": (4.0, None)}
+    assert restored.query(predicates).tolist() == row_index.query(predicates).tolist()
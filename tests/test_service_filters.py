@@ -0,0 +1,23 @@
+from urllib.parse import parse_qsl
+
+import pytest
+
+
+@pytest.mark.parametrize("name, text", [
+    ("price", "..1234567.5"),
+    ("hours", "0.123456789.."),
+    ("rating", "4.25..4.75"),
+    ("year", "2016..2019"),
+    ("price", "1e+16.."),
+])
+def test_range_filters_round_trip(service, name, text):
+    # Section, figure and browser links must filter on the range of the dashboard
+    filters = service.dashboard_filters(subcategory=[], locale=[], **{name: text})
+    query = dict(parse_qsl(service.filters_query_string(filters)))
+
+    assert service.dashboard_filters(subcategory=[], locale=[], **{name: query[name]}) == filters
+
+
+def test_whole_ranges_are_written_without_decimals(service):
+    filters = service.dashboard_filters(subcategory=["Data Science"], locale=[], year="2016..")
+    assert service.filters_query_string(filters) == "subcategory=Data+Science&year=2016.."
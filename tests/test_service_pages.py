@@ -0,0 +1,36 @@
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+
+NEXT_URL = re.compile(r'hx-get="([^"]*)"')
+
+
+@pytest.fixture(scope="module")
+def client(service):
+    # Without the context manager the startup events (cache warming, dataset watcher) do not run
+    return TestClient(service.app)
+
+
+def test_browser_pages_do_not_evict_the_dashboards(service, client):
+    response = client.get("/dashboard", params={"subcategory": "Data Science"})
+    assert response.status_code == 200
+    dashboard_keys = [key for key, _ in service.page_cache.items()]
+    assert dashboard_keys
+
+    # Follow "Load more" through many more pages than the browser cache holds
+    url = "/courses?sort=rating&limit=5"
+    for _ in range(service.browser_cache.max_entries + 10):
+        response = client.get(url)
+        assert response.status_code == 200
+        url = NEXT_URL.findall(response.text)[-1].replace("&amp;", "&")
+
+    assert len(service.browser_cache) == service.browser_cache.max_entries
+    assert all(key in service.page_cache for key in dashboard_keys)
+    assert not any(key[1][0] == "courses" for key, _ in service.page_cache.items())
+
+
+def test_browser_pages_are_revalidated(client):
+    response = client.get("/courses?sort=created&limit=10")
+    revalidated = client.get("/courses?sort=created&limit=10", headers={"If-None-Match": response.headers["ETag"]})
+    assert revalidated.status_code == 304
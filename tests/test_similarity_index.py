@@ -0,0 +1,90 @@
+import contextlib
+import io
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from dashboard.service.udemy_stats.course_texts import CourseTexts
+
+# Loads the text snapshot as the service does, then looks up similar courses
+SERVICE_LOOKUP = """
+import sys
+from dashboard.service.datasets import load_course_texts
+
+texts = load_course_texts()
+texts.similar(texts.udemy_ids[0])
+print(sorted(name for name in ["sklearn", "scipy"] if name in sys.modules))
+"""
+
+
+def index_vectors(index):
+    # The unit TF-IDF vectors of the similarity index as a sparse matrix
+    from scipy.sparse import csr_matrix
+
+    num_terms = index.vector_terms.max() + 1
+    return csr_matrix(
+        (index.vector_weights, index.vector_terms, index.vector_offsets),
+        shape=(len(index.vector_offsets) - 1, num_terms),
+    )
+
+
+def test_similar_courses_are_close_to_exact(course_texts):
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    index = course_texts.similarity_index
+    vectors = index_vectors(index)
+    exact = cosine_similarity(vectors)
+    np.fill_diagonal(exact, -1)
+
+    found, docs_checked = 0, range(0, len(course_texts.udemy_ids), 50)
+    for doc in docs_checked:
+        docs, scores = index.similar(doc, limit=10)
+        assert doc not in docs
+        assert np.allclose(scores, exact[doc, docs], atol=1e-5)
+        assert (np.diff(scores) <= 0).all()
+        found += len(set(docs) & set(np.argsort(-exact[doc], kind="stable")[:10]))
+
+    assert found / (10 * len(docs_checked)) >= 0.9
+
+
+def test_similar_courses_can_be_filtered(course_texts):
+    udemy_ids = course_texts.udemy_ids
+    allowed = set(udemy_ids[::2].tolist())
+    similar, _ = course_texts.similar(udemy_ids[1], limit=10, allowed=lambda ids: np.isin(ids, list(allowed)))
+
+    assert len(similar) == 10
+    assert set(similar.tolist()) <= allowed
+    with pytest.raises(KeyError):
+        course_texts.similar(-1)
+
+
+def test_similar_courses_from_the_snapshot(course_texts, texts_csv, tmp_path):
+    snapshot_path = str(tmp_path / "texts_snapshot")
+    with contextlib.redirect_stdout(io.StringIO()):
+        course_texts.save_snapshot(snapshot_path)
+        restored = CourseTexts.from_snapshot(snapshot_path, texts_csv)
+
+    udemy_id = course_texts.udemy_ids[7]
+    for left, right in zip(restored.similar(udemy_id), course_texts.similar(udemy_id)):
+        assert np.array_equal(left, right)
+
+
+def test_snapshot_lookups_do_not_import_scikit_learn(course_texts, tmp_path):
+    # The index is built offline, the service only reads the stored vectors and tables
+    snapshot_path = str(tmp_path / "texts_snapshot")
+    with contextlib.redirect_stdout(io.StringIO()):
+        course_texts.save_snapshot(snapshot_path)
+
+    environment = dict(
+        os.environ,
+        COURSES_TEXT_CSV_PATH=str(tmp_path / "courses_text_data.csv"),
+        COURSES_TEXT_SNAPSHOT_PATH=snapshot_path,
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", SERVICE_LOOKUP], env=environment, capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    assert result.stdout.splitlines()[-1] == "[]"
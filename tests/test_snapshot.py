@@ -0,0 +1,62 @@
+import contextlib
+import io
+import shutil
+
+import pandas as pd
+import pytest
+
+from dashboard.service.udemy_stats.courses_stats import Courses, file_version
+
+
+@pytest.fixture(scope="module")
+def snapshot_path(courses, tmp_path_factory):
+    snapshot_path = str(tmp_path_factory.mktemp("snapshot") / "courses_snapshot")
+    with contextlib.redirect_stdout(io.StringIO()):
+        courses.save_snapshot(snapshot_path, artifacts={"dashboard": {"title": "Courses"}})
+    return snapshot_path
+
+
+def load_snapshot(snapshot_path, csv_file_path=None):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return Courses.from_snapshot(snapshot_path, csv_file_path=csv_file_path)
+
+
+def test_snapshot_round_trip(courses, courses_csv, snapshot_path):
+    snapshot = load_snapshot(snapshot_path, courses_csv)
+
+    # Columns are memory-mapped, and text is stored as categories
+    pd.testing.assert_frame_equal(snapshot.df.copy(), courses.df, check_dtype=False, check_categorical=False)
+    assert snapshot.version == courses.version == file_version(courses_csv)
+    assert snapshot.artifacts["dashboard"] == {"title": "Courses"}
+    assert snapshot.summarize() == courses.summarize()
+
+
+def test_stale_or_missing_snapshots_are_not_loaded(courses_csv, snapshot_path, tmp_path):
+    changed_csv = str(tmp_path / "courses.csv")
+    shutil.copy(courses_csv, changed_csv)
+    with open(changed_csv, "a", encoding="utf-8") as csv_file:
+        csv_file.write("\n")
+
+    assert load_snapshot(snapshot_path, changed_csv) is None
+    assert load_snapshot(str(tmp_path / "no_snapshot"), courses_csv) is None
+
+
+def test_dataset_version_follows_the_content(tmp_path):
+    csv_file_path = tmp_path / "courses.csv"
+    csv_file_path.write_text("udemy_id\n1\n")
+    version = file_version(str(csv_file_path))
+    assert file_version(str(csv_file_path)) == version
+
+    csv_file_path.write_text("udemy_id\n2\n")
+    assert file_version(str(csv_file_path)) != version
+
+
+def test_snapshot_shares_the_indexes(courses, snapshot_path):
+    # The indexes are mapped from the snapshot instead of being built again
+    snapshot = load_snapshot(snapshot_path)
+    assert {"instructor_index", "label_index", "row_index"} <= set(snapshot.__dict__)
+
+    predicates = {"subcategory": list(courses.df["subcategory"].unique()[:2]), "rating": (4.0, None)}
+    assert snapshot.row_index.query(predicates).tolist() == courses.row_index.query(predicates).tolist()
+    assert snapshot.label_index.names.tolist() == courses.label_index.names.tolist()
+    assert snapshot.instructors_summary().equals(courses.instructors_summary())
@@ -0,0 +1,114 @@
+import contextlib
+import io
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.service import datasets
+from dashboard.service.udemy_stats.course_texts import CourseTexts
+from dashboard.service.udemy_stats.text_index import B, K1, TEXT_FIELDS, TextIndex, tokenize
+
+
+@pytest.fixture(scope="module")
+def texts_df(texts_csv):
+    return pd.read_csv(texts_csv)
+
+
+def scan_scores(df, words):
+    # BM25 of every document, from the field-weighted term counts of its text
+    counts = []
+    for row in df.itertuples(index=False):
+        doc = Counter()
+        for field, weight in TEXT_FIELDS.items():
+            for token in tokenize(str(getattr(row, field))):
+                doc[token] += weight
+        counts.append(doc)
+
+    lengths = np.array([sum(doc.values()) for doc in counts])
+    scores = np.zeros(len(df))
+    for word in set(words):
+        tf = np.array([doc[word] for doc in counts])
+        num_docs = np.count_nonzero(tf)
+        idf = np.log(1 + (len(df) - num_docs + 0.5) / (num_docs + 0.5))
+        scores += np.where(tf > 0, idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * lengths / lengths.mean())), 0)
+    return scores
+
+
+@pytest.mark.parametrize("query", ["python", "python django", "learn data"])
+def test_bm25_matches_a_scan(texts_df, query):
+    index = TextIndex.from_dataframe(texts_df)
+    docs, scores = index.search(query, limit=20)
+
+    expected = scan_scores(texts_df, tokenize(query))
+    assert len(docs) == min(20, np.count_nonzero(expected))
+    assert np.allclose(scores, expected[docs], rtol=1e-4)
+    assert np.allclose(scores, np.sort(expected)[::-1][:len(docs)], rtol=1e-4)
+
+
+def test_phrases_must_match(texts_df):
+    index = TextIndex.from_dataframe(texts_df)
+    titles = [tokenize(title) for title in texts_df["title"]]
+    phrase = titles[0][:2]
+
+    docs, _ = index.search(f'"{" ".join(phrase)}"', limit=len(texts_df))
+    assert 0 in docs
+    for doc in docs:
+        text = [
+            tokenize(str(texts_df[field].iloc[doc])) for field in TEXT_FIELDS
+        ]
+        assert any(
+            tokens[i:i + len(phrase)] == phrase for tokens in text for i in range(len(tokens))
+        )
+
+
+def test_unknown_words_find_nothing(texts_df):
+    index = TextIndex.from_dataframe(texts_df)
+    docs, scores = index.search("xylophone", limit=20)
+    assert len(docs) == len(scores) == 0
+
+
+def test_search_returns_udemy_ids(course_texts, texts_df):
+    udemy_ids, _ = course_texts.search(texts_df["title"].iloc[3], limit=5)
+    assert udemy_ids[0] == texts_df["udemy_id"].iloc[3]
+
+
+def test_text_snapshot_round_trip(course_texts, texts_csv, tmp_path):
+    snapshot_path = str(tmp_path / "texts_snapshot")
+    with contextlib.redirect_stdout(io.StringIO()):
+        course_texts.save_snapshot(snapshot_path)
+        restored = CourseTexts.from_snapshot(snapshot_path, texts_csv)
+
+    for left, right in zip(restored.search("python web", 10), course_texts.search("python web", 10)):
+        assert np.array_equal(left, right)
+
+
+def load_course_texts(monkeypatch, text_file_path, text_snapshot_path):
+    monkeypatch.setattr(datasets, "text_file_path", str(text_file_path))
+    monkeypatch.setattr(datasets, "text_snapshot_path", str(text_snapshot_path))
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        return datasets.load_course_texts(), output.getvalue()
+
+
+def test_texts_load_from_the_snapshot_alone(course_texts, monkeypatch, tmp_path):
+    # The image ships the text snapshot without the csv it was built from
+    course_texts.save_snapshot(str(tmp_path / "texts_snapshot"))
+    texts, _ = load_course_texts(monkeypatch, tmp_path / "courses_text_data.csv", tmp_path / "texts_snapshot")
+
+    assert texts is not None
+    assert np.array_equal(texts.search("python", 5)[0], course_texts.search("python", 5)[0])
+
+
+def test_search_is_disabled_without_texts(monkeypatch, tmp_path):
+    texts, output = load_course_texts(monkeypatch, tmp_path / "courses_text_data.csv", tmp_path / "texts_snapshot")
+    assert texts is None
+    assert "search and similar courses are disabled" in output
+
+
+def test_texts_are_indexed_without_a_snapshot(texts_csv, monkeypatch, tmp_path):
+    pytest.importorskip("sklearn")
+    texts, output = load_course_texts(monkeypatch, texts_csv, tmp_path / "texts_snapshot")
+    assert texts is not None
+    assert "indexes at startup" in output
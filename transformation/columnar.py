@@ -0,0 +1,141 @@
+import os
+import pandas as pd
+import shutil
+from ast import literal_eval
+from urllib.parse import quote
+
+try:
+    import pyarrow as pa  # Optional, the pipeline only writes csv files without it
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+"""Columnar courses
+Parquet dataset of the numerical and categorical courses, partitioned by
+subcategory: one directory per subcategory, named hive-style (e.g.
+subcategory=Web%20Development), so a reader selecting subcategories only
+opens their files. Instructors and labels are stored as lists of strings,
+locale and category are dictionary-encoded and the creation date is a
+timestamp, so nothing has to be parsed back from text. The subcategory is
+only stored in the directory names, readers get it back dictionary-encoded.
+"""
+
+PARTITION_COLUMN = "subcategory"
+
+# Partition of the courses without a subcategory, the default of hive readers
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+# Courses buffered per subcategory before they are written as a row group
+ROW_GROUP_SIZE = 10_000
+
+LIST_COLUMNS = ["labels", "instructors"]
+
+
+def parquet_available():
+    return pa is not None
+
+
+def courses_schema():
+    # Columns of every file, in the order of courses_numerical_categorical_data.csv
+    text = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ("udemy_id", pa.int64()),
+        ("title", pa.string()),
+        ("num_subscribers", pa.int64()),
+        ("rating", pa.float64()),
+        ("num_reviews", pa.int64()),
+        ("created", pa.timestamp("ms", tz="UTC")),
+        ("num_published_lectures", pa.int64()),
+        ("num_curriculum_items", pa.int64()),
+        ("content_length_hours", pa.float64()),
+        ("content_length_minutes", pa.int64()),
+        ("locale", text),
+        ("category", text),
+        ("labels", pa.list_(pa.string())),
+        ("instructors", pa.list_(pa.string())),
+        ("price", pa.float64()),
+    ])
+
+
+def courses_table(df):
+    """Arrow table of flattened courses (or of courses read back from the csv)."""
+    columns = {
+        # "4.8 " once the text around the hours is removed, 0 for practice tests
+        "content_length_hours": pd.to_numeric(
+            df["content_length_hours"].astype("string").str.strip(), errors="coerce"
+        ),
+        "created": pd.to_datetime(df["created"], format="ISO8601", utc=True),
+    }
+    for column in LIST_COLUMNS:
+        columns[column] = [
+            literal_eval(names) if isinstance(names, str) else names for names in df[column]
+        ]
+
+    schema = courses_schema()
+    table = pa.Table.from_pandas(df.assign(**columns)[schema.names], schema=schema, preserve_index=False)
+    return table.replace_schema_metadata(None)
+
+
+class CoursesParquetWriter:
+    """Appends flattened courses to the parquet dataset, a batch at a time.
+
+    The dataset is written next to its final path and swapped in by close(),
+    so readers never see half of it.
+    """
+
+    def __init__(self, dataset_path, row_group_size=ROW_GROUP_SIZE):
+        self.dataset_path = dataset_path
+        self.partial_path = dataset_path + ".partial"
+        self.row_group_size = row_group_size
+        self.writers = {}  # Subcategory -> writer of its file
+        self.pending = {}  # Subcategory -> tables not written yet
+        self.num_pending = {}
+
+        shutil.rmtree(self.partial_path, ignore_errors=True)
+        os.makedirs(self.partial_path)
+
+    def write(self, df):
+        table = courses_table(df)
+        subcategories = df[PARTITION_COLUMN].fillna(NULL_PARTITION)
+        for subcategory, rows in subcategories.groupby(subcategories, sort=False).indices.items():
+            self.pending.setdefault(subcategory, []).append(table.take(rows))
+            self.num_pending[subcategory] = self.num_pending.get(subcategory, 0) + len(rows)
+            if self.num_pending[subcategory] >= self.row_group_size:
+                self.flush(subcategory)
+
+    def flush(self, subcategory):
+        table = pa.concat_tables(self.pending.pop(subcategory))
+        del self.num_pending[subcategory]
+
+        if subcategory not in self.writers:
+            directory = os.path.join(self.partial_path, f"{PARTITION_COLUMN}={quote(subcategory, safe='')}")
+            os.makedirs(directory)
+            self.writers[subcategory] = pq.ParquetWriter(os.path.join(directory, "part-0.parquet"), table.schema)
+        self.writers[subcategory].write_table(table, row_group_size=self.row_group_size)
+
+    def close(self):
+        for subcategory in list(self.pending):
+            self.flush(subcategory)
+        for writer in self.writers.values():
+            writer.close()
+
+        shutil.rmtree(self.dataset_path, ignore_errors=True)
+        os.replace(self.partial_path, self.dataset_path)
+
+    def abort(self):
+        for writer in self.writers.values():
+            writer.close()
+        shutil.rmtree(self.partial_path, ignore_errors=True)
+
+
+def write_courses_parquet(df, dataset_path, batch_size=ROW_GROUP_SIZE):
+    # Whole dataframe at once, e.g. the courses of a csv
+    writer = CoursesParquetWriter(dataset_path)
+    try:
+        for start in range(0, len(df), batch_size):
+            writer.write(df.iloc[start:start + batch_size].reset_index(drop=True))
+    except BaseException:
+        writer.abort()
+        raise
+    writer.close()
+    return dataset_path
@@ -0,0 +1,187 @@
+import argparse
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+
+from transformation.columnar import CoursesParquetWriter, parquet_available
+from transformation.raw_courses import (
+    data_folder_path,
+    iter_batches,
+    iter_courses,
+    numerical_categorical_batch,
+    raw_json_path,
+    textual_batch,
+    write_csv,
+)
+
+"""Transformation pipeline
+Single pass over courses_udemy_raw.json writing both datasets. The parse
+stage decodes the scrape once and hands every batch of courses to the
+numerical/categorical branch and to the textual branch, which flatten and
+write their csv files in their own threads while the next batches are parsed.
+With several CPUs, the textual branch converts the descriptions from HTML in
+a pool of processes, as it outweighs the rest of the pipeline. The queues
+between the stages are bounded, so the parser waits for a branch that is
+QUEUE_SIZE batches behind and memory stays independent of the size of the
+scrape. When pyarrow is installed, the numerical/categorical branch also
+writes its courses as a parquet dataset partitioned by subcategory
+(see columnar.py).
+"""
+
+# Batches waiting for each branch
+QUEUE_SIZE = 4
+
+
+class Stage:
+    """Wall time of a stage, and the part of it spent waiting for the other stages."""
+
+    def __init__(self, name):
+        self.name = name
+        self.wall = 0.0
+        self.waiting = 0.0
+
+
+class Branch(Stage):
+    """Flattens the batches it receives into one dataset and writes its csv and sample."""
+
+    def __init__(self, name, flatten, csv_name, parquet=False):
+        super().__init__(name)
+        self.flatten = flatten
+        self.csv_name = csv_name
+        self.parquet = parquet
+        self.parquet_writer = None
+        self.batches = queue.Queue(maxsize=QUEUE_SIZE)
+        self.done = threading.Event()
+
+    def send(self, item):
+        # Wait for room in the queue, unless the branch has stopped
+        start = time.perf_counter()
+        while not self.done.is_set():
+            try:
+                self.batches.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                pass
+        return time.perf_counter() - start
+
+    def frames(self):
+        # Flattened batches until the parser sends None, or the error it failed with
+        while True:
+            start = time.perf_counter()
+            batch = self.batches.get()
+            self.waiting += time.perf_counter() - start
+
+            if batch is None:
+                return
+            if isinstance(batch, BaseException):
+                raise RuntimeError("Parsing the courses failed") from batch
+
+            df = self.flatten(batch)
+            if self.parquet_writer is not None:
+                self.parquet_writer.write(df)
+            yield df
+
+    def run(self, output_folder_path):
+        start = time.perf_counter()
+        try:
+            if self.parquet:
+                self.parquet_writer = CoursesParquetWriter(os.path.join(output_folder_path, self.csv_name + ".parquet"))
+            num_rows = write_csv(
+                self.frames(),
+                os.path.join(output_folder_path, self.csv_name + ".csv"),
+                os.path.join(output_folder_path, self.csv_name + "_sample.csv"),
+            )
+            if self.parquet_writer is not None:
+                self.parquet_writer.close()
+            return num_rows
+        except BaseException:
+            if self.parquet_writer is not None:
+                self.parquet_writer.abort()
+            raise
+        finally:
+            self.done.set()
+            self.wall = time.perf_counter() - start
+
+
+def parse(json_file_path, branches, stage):
+    # Send every batch to every branch, then None, or the error parsing failed with
+    start = time.perf_counter()
+    try:
+        for batch in iter_batches(iter_courses(json_file_path)):
+            for branch in branches:
+                stage.waiting += branch.send(batch)
+    except BaseException as error:
+        for branch in branches:
+            branch.send(error)
+        raise
+    else:
+        for branch in branches:
+            branch.send(None)
+    finally:
+        stage.wall = time.perf_counter() - start
+
+
+def run_pipeline(json_file_path, output_folder_path=data_folder_path, workers=None, parquet=None):
+    """Write both datasets from one pass over the scrape.
+
+    workers are the processes converting the descriptions, none with a
+    single CPU (the default). parquet writes the parquet dataset too, by
+    default when pyarrow is installed. Returns the stages with their timings
+    and the number of courses written.
+    """
+    if parquet is None:
+        parquet = parquet_available()
+    if workers is None:
+        workers = os.cpu_count() - 1 if os.cpu_count() > 1 else 0
+
+    # The processes start once the threads run, they are spawned as forking them would be unsafe
+    html_executor = None
+    if workers > 0:
+        html_executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+
+    with html_executor or nullcontext():
+        stages = [
+            Stage("parse"),
+            Branch("numerical_categorical", numerical_categorical_batch, "courses_numerical_categorical_data",
+                   parquet=parquet),
+            Branch("textual", partial(textual_batch, executor=html_executor), "courses_text_data"),
+        ]
+        branches = stages[1:]
+
+        # The branches run in the pool, the parser in this thread
+        with ThreadPoolExecutor(max_workers=len(branches), thread_name_prefix="transformation") as executor:
+            futures = [executor.submit(branch.run, output_folder_path) for branch in branches]
+            parse(json_file_path, branches, stages[0])
+            num_rows = [future.result() for future in futures]
+
+    return stages, num_rows[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write both datasets from courses_udemy_raw.json")
+    parser.add_argument("--input", default=raw_json_path(), help="JSON array or JSON lines scrape")
+    parser.add_argument("--output", default=os.path.normpath(data_folder_path))
+    parser.add_argument("--workers", type=int, help="Processes converting the descriptions, 0 for none")
+    parser.add_argument("--no-parquet", action="store_true", help="Only write the csv files")
+    args = parser.parse_args()
+
+    print(f"Transforming {args.input}")
+    start = time.perf_counter()
+    stages, num_rows = run_pipeline(
+        args.input, args.output, workers=args.workers, parquet=False if args.no_parquet else None
+    )
+    seconds = time.perf_counter() - start
+
+    print(f"Finished exporting {num_rows} courses in {seconds:.2f}s")
+    print(f"{'Stage':<24}{'Wall (s)':>10}{'Busy (s)':>10}")
+    for stage in stages:
+        print(f"{stage.name:<24}{stage.wall:>10.2f}{stage.wall - stage.waiting:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
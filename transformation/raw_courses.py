@@ -0,0 +1,232 @@
+import json
+import numpy as np
+import os
+import pandas as pd
+import re
+from bs4 import BeautifulSoup
+from itertools import islice
+
+"""Raw courses
+Streaming reader of courses_udemy_raw.json for the transformation scripts.
+The scrape (a JSON array, or one course per line) is decoded a course at a
+time from fixed-size chunks of the file, the courses are flattened a batch at
+a time and every batch is appended to the csv files before the next one is
+read. Memory depends on the batch size, not on the size of the scrape.
+"""
+
+data_folder_path = os.path.join(os.path.dirname(__file__), "../data/")
+
+# Courses flattened and written at once
+BATCH_SIZE = 1000
+
+# Characters read from the file at once, and the longest course accepted
+CHUNK_SIZE = 1 << 20
+MAX_COURSE_LENGTH = 64 << 20
+
+SAMPLE_FRACTION = 0.1
+
+# Descriptions sent to a process at once when they are converted in a pool
+HTML_CHUNK_SIZE = 50
+
+# Whitespace and commas between the courses
+SEPARATORS = re.compile(r"[\s,]*")
+
+NUMERICAL_CATEGORICAL_COLUMNS = [
+    "udemy_id",
+    "title",
+    "num_subscribers",
+    "rating",
+    "num_reviews",
+    "created",
+    "num_published_lectures",
+    "num_curriculum_items",
+    "content_length_hours",
+    "content_length_minutes",
+    "locale",
+    "category",
+    "subcategory",
+    "labels",
+    "instructors",
+    "price",
+]
+
+TEXTUAL_COLUMNS = [
+    "udemy_id",
+    "title",
+    "url",
+    "description",
+    "headline",
+    "image",
+    "requirements_data",
+    "what_you_will_learn_data",
+    "target_audiences",
+    "objectives",
+]
+
+# Integer and float columns get the same dtype in every batch, even when
+# a batch has missing values or only round numbers
+INTEGER_COLUMNS = [
+    "udemy_id",
+    "num_subscribers",
+    "num_reviews",
+    "num_published_lectures",
+    "num_curriculum_items",
+    "content_length_minutes",
+]
+FLOAT_COLUMNS = ["rating", "price"]
+
+
+def raw_json_path():
+    return os.environ.get(
+        "COURSES_RAW_JSON_PATH", os.path.normpath(data_folder_path + "courses_udemy_raw.json")
+    )
+
+
+def iter_courses(json_file_path, chunk_size=CHUNK_SIZE):
+    """Courses of a JSON array or of a JSON lines file, one dict at a time."""
+    decoder = json.JSONDecoder()
+    buffer, position, end_of_file, in_array = "", 0, False, None
+
+    with open(json_file_path, encoding="utf-8") as json_file:
+        while True:
+            position = SEPARATORS.match(buffer, position).end()
+            if position == len(buffer):
+                if end_of_file:
+                    return
+                chunk = json_file.read(chunk_size)
+                buffer, position, end_of_file = buffer[position:] + chunk, 0, not chunk
+                continue
+
+            # A scrape starting with [ is an array, otherwise one course per line
+            if in_array is None:
+                in_array = buffer[position] == "["
+                position += in_array
+                continue
+            if in_array and buffer[position] == "]":
+                return
+
+            try:
+                course, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # The course goes on in the next chunk, unless the file is invalid
+                if end_of_file or len(buffer) - position > MAX_COURSE_LENGTH:
+                    raise
+                chunk = json_file.read(chunk_size)
+                buffer, position, end_of_file = buffer[position:] + chunk, 0, not chunk
+                continue
+            yield course
+
+
+def iter_batches(courses, batch_size=BATCH_SIZE):
+    courses = iter(courses)
+    while batch := list(islice(courses, batch_size)):
+        yield batch
+
+
+def title_of(item):
+    # Title of a nested object (locale, category, ...), None when it is missing
+    return item.get("title") if isinstance(item, dict) else None
+
+
+def titles_of(items):
+    # Titles of a list of nested objects (labels, instructors)
+    return [item["title"] for item in items or []]
+
+
+def with_dtypes(df):
+    for column in df.columns.intersection(INTEGER_COLUMNS):
+        df[column] = df[column].astype("Int64")
+    for column in df.columns.intersection(FLOAT_COLUMNS):
+        df[column] = df[column].astype("float64")
+    return df
+
+
+def content_length_hours(content_info):
+    # Keep only the number of "12.5 total hours" or "45 total mins", practice tests count 0 hours
+    content_info = pd.Series(content_info, dtype=object)
+    content_info = content_info.str.replace("total hours?", "", case=False, regex=True)
+    content_info = content_info.str.replace("total mins?", "", case=False, regex=True)
+    content_info[content_info.str.contains("questions?", case=False, na=False, regex=True)] = 0
+    return content_info
+
+
+def numerical_categorical_batch(courses):
+    """Numerical and categorical columns of a batch of raw courses.
+
+    is_paid, has_certificate, features and the discounts are dropped, as
+    well as the text (but the title). Nested objects keep their title, the
+    price keeps its amount (the currency is the same across the dataset).
+    """
+    def values(key):
+        return [course.get(key) for course in courses]
+
+    df = pd.DataFrame({
+        "udemy_id": values("id"),
+        **{column: values(column) for column in NUMERICAL_CATEGORICAL_COLUMNS[1:8]},
+        "content_length_hours": content_length_hours(values("content_info")),
+        "content_length_minutes": values("estimated_content_length"),
+        "locale": [title_of(locale) for locale in values("locale")],
+        "category": [title_of(category) for category in values("primary_category")],
+        "subcategory": [title_of(subcategory) for subcategory in values("primary_subcategory")],
+        "labels": [titles_of(labels) for labels in values("labels")],
+        "instructors": [titles_of(instructors) for instructors in values("visible_instructors")],
+        "price": [(price_detail or {}).get("amount") for price_detail in values("price_detail")],
+    })
+    return with_dtypes(df)
+
+
+def html_to_string(html):
+    soup = BeautifulSoup(html, "html.parser")
+    return soup.get_text()
+
+
+def textual_batch(courses, executor=None):
+    """Text columns of a batch of raw courses, with the description converted from HTML to text.
+
+    With a process pool executor, the descriptions are converted in its
+    processes (BeautifulSoup is pure Python and holds the GIL).
+    """
+    df = pd.DataFrame({
+        "udemy_id": [course.get("id") for course in courses],
+        **{column: [course.get(column) for course in courses] for column in TEXTUAL_COLUMNS[1:]},
+    })
+    if executor is None:
+        df["description"] = df["description"].map(html_to_string)
+    else:
+        df["description"] = list(executor.map(html_to_string, df["description"], chunksize=HTML_CHUNK_SIZE))
+    return with_dtypes(df)
+
+
+def in_sample(udemy_ids, sample_fraction=SAMPLE_FRACTION):
+    # A hash of udemy_id picks the sample, so every dataset and every run sample the same courses
+    hashes = udemy_ids.fillna(0).to_numpy(dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    return (hashes >> np.uint64(11)) < sample_fraction * (1 << 53)
+
+
+def write_csv(frames, csv_file_path, sample_file_path, sample_fraction=SAMPLE_FRACTION):
+    """Append every dataframe to the csv, and its rows in_sample to the sample.
+
+    Both files are written under a temporary name and renamed once complete,
+    so a reader (e.g. the dashboard watching the csv) never sees half of them.
+    Returns the number of rows written.
+    """
+    num_rows = 0
+    partial_paths = [csv_file_path + ".partial", sample_file_path + ".partial"]
+
+    try:
+        with open(partial_paths[0], "w", encoding="utf-8", newline="") as csv_file, \
+                open(partial_paths[1], "w", encoding="utf-8", newline="") as sample_file:
+            for df in frames:
+                header = num_rows == 0
+                df.to_csv(csv_file, index=False, header=header)
+                df[in_sample(df["udemy_id"], sample_fraction)].to_csv(sample_file, index=False, header=header)
+                num_rows += len(df)
+    except BaseException:
+        for path in partial_paths:
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+
+    os.replace(partial_paths[0], csv_file_path)
+    os.replace(partial_paths[1], sample_file_path)
+    return num_rows
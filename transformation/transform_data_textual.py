@@ -1,76 +1,46 @@
-import pandas as pd
-import os
-from bs4 import BeautifulSoup
-
-data_folder_path = os.path.join(os.path.dirname(__file__), "../data/")
-json_file_path = os.path.normpath(data_folder_path + "courses_udemy_raw.json")
+from transformation.raw_courses import (
+    BATCH_SIZE,
+    data_folder_path,
+    iter_batches,
+    iter_courses,
+    raw_json_path,
+    textual_batch,
+    write_csv,
+)
 
-print("Reading JSON input")
-df = pd.read_json(json_file_path)
+json_file_path = raw_json_path()
 
 
 """
-Changing ID column name
+Streaming the courses
+The JSON input is read a batch of courses at a time, each batch is flattened
+and written before the next one is read (see raw_courses.py)
 """
 
-
-# Setting the primary key clearly
-print("Renaming id column to udemy_id")
-df = df.rename(columns={"id": "udemy_id"})
+print(f"Reading JSON input in batches of {BATCH_SIZE} courses")
+batches = iter_batches(iter_courses(json_file_path))
 
 
 """
-Selecting only textual columns from the dataframe
+Selecting only textual columns
+id is renamed udemy_id and the description is converted from HTML to text
 """
 
-
 print("Extracting full text fields")
-df_text = df[
-    [
-        "udemy_id",
-        "title",
-        "url",
-        "description",
-        "headline",
-        "image",
-        "requirements_data",
-        "what_you_will_learn_data",
-        "target_audiences",
-        "objectives",
-    ]
-]
-
-
-"""
-Transforming description field
-"""
-
-print("Converting description from HTML to text")
-
-
-# Convertor description from HTML to text
-def html_to_string(html):
-    soup = BeautifulSoup(html, "html.parser")
-    return soup.get_text()
-
-
-df_text.loc[:, 'description'] = df_text["description"].apply(html_to_string)
+frames = (textual_batch(courses) for courses in batches)
 
 
 """
 Exporting results to CSV
 """
 
-
-print("Exporting csv files to data folder")
+print("Exporting csv files and 10% samples to data folder")
 
 courses_text_csv = "courses_text_data"
 
-df_text.to_csv(data_folder_path + courses_text_csv + ".csv", index=False)
-
-print("Exporting 10% samples to data folder")
-shuffled_df_text = df_text.sample(frac=1)  # Shuffle total set
-shuffled_df_text = df_text.sample(frac=0.1)  # 10% sample
-shuffled_df_text.to_csv(
-    data_folder_path + courses_text_csv + "_sample.csv", index=False
+num_rows = write_csv(
+    frames,
+    data_folder_path + courses_text_csv + ".csv",
+    data_folder_path + courses_text_csv + "_sample.csv",
 )
+print(f"Finished exporting {num_rows} courses")